@@ -1,7 +1,9 @@
 """Backtesting engine utilities for computing evaluation metrics in NEXUSA.
 
 This module provides lightweight evaluation over generated trade signals
-against a price series. Side effects are minimized; heavy operations are
+against a price series; the trade simulation itself runs on
+``backtesting.vector_engine`` (multi-symbol, fees, slippage and SL/TP live
+there). Side effects are minimized; heavy operations are
 avoided at import time.
 """
 
@@ -9,6 +11,8 @@ from __future__ import annotations
 import pandas as pd
 import numpy as np
 
+from backtesting.vector_engine import EngineConfig, max_drawdown_array, run_backtest
+
 
 def evaluate(signals_df: pd.DataFrame, price_df: pd.DataFrame) -> dict:
     """Evaluate signals against prices and compute basic performance metrics.
@@ -31,19 +35,15 @@ def evaluate(signals_df: pd.DataFrame, price_df: pd.DataFrame) -> dict:
         .sort_values("timestamp")
     )
 
-    pnl = 0.0
-    trades = 0
-    pos = 0
-    entry = 0.0
-
-    for row in df.itertuples(index=False):
-        if row.direction == "Long" and pos == 0:
-            pos = 1
-            entry = row.close
-            trades += 1
-        elif row.direction == "Short" and pos == 1:
-            pnl += (row.close - entry) / entry
-            pos = 0
+    codes = df["direction"].map({"Long": 1, "Short": -1}).fillna(0).to_numpy(dtype=np.int8)
+    res = run_backtest(
+        df["close"].to_numpy(dtype=float),
+        codes,
+        config=EngineConfig(sltp=None, allow_short=False),
+    )
+    ledger = res.trades
+    trades = len(ledger)
+    pnl = float(ledger.loc[ledger["reason"] == "signal", "pnl"].sum())
 
     # metrics
     ret = df["close"].pct_change().fillna(0)
@@ -61,11 +61,4 @@ def _max_drawdown(series: np.ndarray) -> float:
     Returns:
         float: Maximum drawdown ratio in [0, 1].
     """
-    import numpy as np
-    peak = -np.inf
-    max_dd = 0.0
-    for x in series:
-        peak = max(peak, x)
-        dd = (peak - x) / (peak + 1e-9)
-        max_dd = max(max_dd, dd)
-    return max_dd
+    return max_drawdown_array(series)
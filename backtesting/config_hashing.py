@@ -293,7 +293,7 @@ def _new_hasher(algorithm: str = DEFAULT_ALGO, *, digest_size: int = DEFAULT_DIG
     """Return a new hash object for given algorithm, size, and optional namespace."""
     algorithm = algorithm.lower()
     if algorithm == "blake2b":
-        person = namespace.encode("utf-8")[:16] if namespace else None
+        person = namespace.encode("utf-8")[:16] if namespace else b""
         return hashlib.blake2b(digest_size=digest_size, person=person)
     if algorithm == "sha256":
         return hashlib.sha256()
@@ -30,14 +30,18 @@ from typing import Optional, Dict, Any, Tuple
 import numpy as np
 import pandas as pd
 
+from core.schema.validator_cache import ValidatorCache
+
 # ✅ لایه‌بندی: وابستگی به storage حذف شد.
 # به‌جای import از storage.schema_registry، یک رجیستری سبک داخلی داریم.
 _SCHEMA_REGISTRY: dict[tuple[str, str], dict] = {}
+_VALIDATORS = ValidatorCache()
 
 
 def register(name: str, version: str, schema: dict) -> None:
     """Register a JSON schema under (name, version)."""
     _SCHEMA_REGISTRY[(name, version)] = schema
+    _VALIDATORS.invalidate(lambda k: k == (name, version))
 
 
 def _get_schema(name: str, version: str) -> dict:
@@ -78,10 +82,8 @@ def _ensure_schema(name: str, version: str, payload: Dict[str, Any]) -> None:
         return
 
     try:
-        validator = Draft7Validator(schema)
-        errs = sorted(validator.iter_errors(payload), key=lambda er: er.path)
-        if errs:
-            err = errs[0]
+        err = _VALIDATORS.get((name, version), lambda: schema).first_error(payload)
+        if err is not None:
             path = ".".join(str(p) for p in err.path)
             raise ValueError(f"[{name} v{version}] schema failed at {path}: {err.message}")
     except SchemaError as se:  # pragma: no cover
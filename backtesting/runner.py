@@ -11,10 +11,9 @@ Goals:
 
 CLI:
     python -m backtesting.runner --mode batch --exchange __EXCHANGE_NAME__ --symbol BTC/USDT --tf 1h --limit 200
+    python -m backtesting.runner --mode universe --symbols-file universe.txt --tfs 1m,1h --concurrency 16
 """
 from __future__ import annotations
-...
-ap.add_argument("--exchange", default="__EXCHANGE_NAME__", help="Exchange name (for metadata)")
 
 
 
@@ -23,8 +22,12 @@ import asyncio
 import importlib
 import logging
 import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
 from typing import Any, Dict, List, Optional, Tuple, Callable
 
+import numpy as np
 import pandas as pd
 
 # Telemetry setup (best-effort)
@@ -70,6 +73,19 @@ def _load_storage_reader() -> Optional[Callable[..., pd.DataFrame]]:
 # =============================================================================
 # Local pipeline (layer-safe)
 # =============================================================================
+#
+# Data stays columnar (one DataFrame / NumPy arrays) from load to the final
+# write; per-row dicts are produced only at the storage boundary
+# (`feature_records` / `signal_records` / `_rows_from_df`).
+
+_FRAME_COLS = ["ts_event", "o", "h", "l", "c", "v", "symbol", "tf"]
+_FEATURE_COLS = ["ret", "ma_5", "ma_20", "vol_20"]
+
+
+def _epoch_ms(ts: pd.Series) -> np.ndarray:
+    """Epoch milliseconds (int64) of a tz-aware datetime Series, independent of its resolution."""
+    return ((ts - pd.Timestamp(0, tz="UTC")) // pd.Timedelta(1, "ms")).to_numpy(dtype=np.int64)
+
 
 def _rows_to_frame(rows: List[Dict[str, Any]]) -> pd.DataFrame:
     """Convert list of OHLCV-like rows into a sorted DataFrame with canonical columns.
@@ -83,26 +99,77 @@ def _rows_to_frame(rows: List[Dict[str, Any]]) -> pd.DataFrame:
         }
     """
     if not rows:
-        return pd.DataFrame(columns=["ts_event", "o", "h", "l", "c", "v", "symbol", "tf"])
-    recs = []
-    for r in rows:
-        ohlcv = r.get("ohlcv", {}) or {}
-        ts = r.get("ts_event", 0)
-        ts_dt = pd.to_datetime(ts, unit="ms", utc=True) if isinstance(ts, (int, float)) else pd.to_datetime(ts, utc=True)
-        recs.append({
-            "ts_event": ts_dt,
-            "o": float(ohlcv.get("o", 0.0)),
-            "h": float(ohlcv.get("h", 0.0)),
-            "l": float(ohlcv.get("l", 0.0)),
-            "c": float(ohlcv.get("c", 0.0)),
-            "v": float(ohlcv.get("v", 0.0)),
-            "symbol": (r.get("symbol") or "").replace("/", ""),
-            "tf": r.get("tf"),
-        })
-    df = pd.DataFrame.from_records(recs).sort_values("ts_event")
+        return pd.DataFrame(columns=_FRAME_COLS)
+    ts_raw = [r.get("ts_event", 0) for r in rows]
+    bars = [r.get("ohlcv", {}) or {} for r in rows]
+    if all(isinstance(t, (int, float)) for t in ts_raw):
+        ts = pd.to_datetime(pd.Series(ts_raw), unit="ms", utc=True)
+    else:  # mixed ms / ISO strings: convert element-wise like the row path
+        ts = pd.Series([
+            pd.to_datetime(t, unit="ms", utc=True) if isinstance(t, (int, float)) else pd.to_datetime(t, utc=True)
+            for t in ts_raw
+        ])
+    cols: Dict[str, Any] = {"ts_event": ts}
+    for k in ("o", "h", "l", "c", "v"):
+        cols[k] = np.array([b.get(k, 0.0) for b in bars], dtype=float)
+    cols["symbol"] = [(r.get("symbol") or "").replace("/", "") for r in rows]
+    cols["tf"] = [r.get("tf") for r in rows]
+    return pd.DataFrame(cols).sort_values("ts_event")
+
+
+def compute_features_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """Add the toy feature columns (ret, ma_5, ma_20, vol_20) to a canonical OHLCV frame."""
+    df = df.copy()
+    df["ret"] = df["c"].pct_change().fillna(0.0)
+    df["ma_5"] = df["c"].rolling(5, min_periods=1).mean()
+    df["ma_20"] = df["c"].rolling(20, min_periods=1).mean()
+    df["vol_20"] = df["ret"].rolling(20, min_periods=1).std().fillna(0.0)
     return df
 
 
+def detect_crossovers(df: pd.DataFrame) -> pd.DataFrame:
+    """MA(5)/MA(20) crossovers as a frame: position, ts_event, direction (LONG/SHORT), score."""
+    long_mask = (df["ma_5"] > df["ma_20"]).to_numpy(dtype=np.int8)
+    step = np.diff(long_mask)  # +1 cross up, -1 cross down (aligned with bar i+1)
+    pos = np.flatnonzero(step) + 1
+    return pd.DataFrame({
+        "pos": pos,
+        "ts_event": df["ts_event"].iloc[pos].to_numpy(),
+        "direction": np.where(step[pos - 1] > 0, "LONG", "SHORT"),
+        "score": np.abs(df["ret"].to_numpy(dtype=float)[pos]),
+    })
+
+
+def feature_records(feat: pd.DataFrame, sym: str, tf: str) -> List[Dict[str, Any]]:
+    """Storage-boundary conversion of a feature frame into the feature row dicts."""
+    ts_ms = _epoch_ms(feat["ts_event"]).tolist()
+    values = feat[_FEATURE_COLS].astype(float).to_dict("records")
+    return [{"symbol": sym, "tf": tf, "ts_event": t, "features": f} for t, f in zip(ts_ms, values)]
+
+
+def signal_records(sig: pd.DataFrame, sym: str, tf: str) -> List[Dict[str, Any]]:
+    """Storage-boundary conversion of a crossover frame into the signal row dicts."""
+    ts = pd.to_datetime(sig["ts_event"], utc=True)
+    ts_ms = _epoch_ms(ts).tolist()
+    return [
+        {
+            "signal_id": f"{sym}:{tf}:{t}",
+            "symbol": sym,
+            "tf": tf,
+            "created_at": stamp.isoformat(),
+            "direction": d,
+            "score": float(s),
+        }
+        for t, stamp, d, s in zip(ts_ms, ts, sig["direction"].tolist(), sig["score"].tolist())
+    ]
+
+
+def pipeline_frames(df: pd.DataFrame) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """Columnar pipeline: canonical OHLCV frame → (feature frame, crossover frame)."""
+    feat = compute_features_frame(df)
+    return feat, detect_crossovers(feat)
+
+
 def batch_pipeline_local(rows: List[Dict[str, Any]], symbol: str, tf: str) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
     """Local, self-contained feature + signal pipeline (toy for backtesting).
 
@@ -111,112 +178,89 @@ def batch_pipeline_local(rows: List[Dict[str, Any]], symbol: str, tf: str) -> Tu
       2) features: ret, ma_5, ma_20, vol_20
       3) signals: MA crossovers (LONG on 5>20 cross up, SHORT on cross down)
     """
-    df = _rows_to_frame(rows)
-    if df.empty:
-        return [], []
+    return batch_pipeline_frame(_rows_to_frame(rows), symbol, tf)
 
-    df["ret"] = df["c"].pct_change().fillna(0.0)
-    df["ma_5"] = df["c"].rolling(5, min_periods=1).mean()
-    df["ma_20"] = df["c"].rolling(20, min_periods=1).mean()
-    df["vol_20"] = df["ret"].rolling(20, min_periods=1).std().fillna(0.0)
 
-    feats: List[Dict[str, Any]] = []
+def batch_pipeline_frame(df: pd.DataFrame, symbol: str, tf: str) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """`batch_pipeline_local` for an already canonical frame (skips the row round-trip)."""
+    if df.empty:
+        return [], []
+    feat, sig = pipeline_frames(df)
     sym = symbol.replace("/", "")
-    for _, r in df.iterrows():
-        feats.append({
-            "symbol": sym,
-            "tf": tf,
-            "ts_event": int(pd.Timestamp(r["ts_event"]).timestamp() * 1000),
-            "features": {
-                "ret": float(r["ret"]),
-                "ma_5": float(r["ma_5"]),
-                "ma_20": float(r["ma_20"]),
-                "vol_20": float(r["vol_20"]),
-            },
-        })
-
-    sigs: List[Dict[str, Any]] = []
-    long_mask = df["ma_5"] > df["ma_20"]
-    for i in range(1, len(df)):
-        crossed_up = bool(long_mask.iloc[i] and not long_mask.iloc[i - 1])
-        crossed_dn = bool((not long_mask.iloc[i]) and long_mask.iloc[i - 1])
-        if crossed_up or crossed_dn:
-            ts_ms = int(df["ts_event"].iloc[i].timestamp() * 1000)
-            sigs.append({
-                "signal_id": f"{sym}:{tf}:{ts_ms}",
-                "symbol": sym,
-                "tf": tf,
-                "created_at": df["ts_event"].iloc[i].isoformat(),
-                "direction": "LONG" if crossed_up else "SHORT",
-                "score": float(abs(df["ret"].iloc[i])),
-            })
-
-    return feats, sigs
+    return feature_records(feat, sym, tf), signal_records(sig, sym, tf)
 
 
 # =============================================================================
 # Storage-backed fetcher (dynamic import; fallback to local files)
 # =============================================================================
 
-def _rows_from_df(df: pd.DataFrame, symbol: str, tf: str) -> List[Dict[str, Any]]:
-    """Normalize OHLCV DataFrame to rows expected by `_rows_to_frame`/pipeline."""
-    df = df.copy()
-
-    # Determine timestamps (ms)
+def _frame_from_df(df: pd.DataFrame, symbol: str, tf: str) -> pd.DataFrame:
+    """Normalize an OHLCV DataFrame (o/h/l/c/v or long names) into the canonical frame, sorted by `ts_event`."""
+    # Determine timestamps
     if "ts_event" in df.columns:
         ts = pd.to_datetime(df["ts_event"], unit="ms", utc=True)
     elif "timestamp" in df.columns:
         ts = pd.to_datetime(df["timestamp"], utc=True)
     else:
         ts = pd.to_datetime(df.index, utc=True)
+    ts = pd.Series(ts).reset_index(drop=True)
 
     # Map price/vol columns
-    def col(*names: str) -> pd.Series:
+    def col(*names: str) -> np.ndarray:
         for n in names:
             if n in df.columns:
-                return df[n]
+                return df[n].to_numpy(dtype=float)
         raise KeyError(f"Missing columns among {names!r}")
 
-    o = col("o", "open")
-    h = col("h", "high")
-    l = col("l", "low")
-    c = col("c", "close")
-    v = col("v", "volume")
+    frame = pd.DataFrame({
+        "ts_event": ts,
+        "o": col("o", "open"),
+        "h": col("h", "high"),
+        "l": col("l", "low"),
+        "c": col("c", "close"),
+        "v": col("v", "volume"),
+        "symbol": symbol.replace("/", ""),
+        "tf": tf,
+    })
+    # Storage/file data may be newest-first or unordered; features need bars in time order.
+    return frame.sort_values("ts_event", kind="mergesort").reset_index(drop=True)
 
-    out: List[Dict[str, Any]] = []
-    sym = symbol.replace("/", "")
-    for i in range(len(df)):
-        out.append({
-            "symbol": sym,
-            "exchange": "STORAGE",
-            "ts_event": int(pd.Timestamp(ts.iloc[i]).timestamp() * 1000),
-            "ingest_ts": int(pd.Timestamp.utcnow().timestamp() * 1000),
-            "tf": tf,
-            "ohlcv": {
-                "o": float(o.iloc[i]),
-                "h": float(h.iloc[i]),
-                "l": float(l.iloc[i]),
-                "c": float(c.iloc[i]),
-                "v": float(v.iloc[i]),
-            },
-        })
-    return out
+
+def _rows_from_df(df: pd.DataFrame, symbol: str, tf: str) -> List[Dict[str, Any]]:
+    """Normalize OHLCV DataFrame to rows expected by `_rows_to_frame`/pipeline."""
+    return _rows_from_frame(_frame_from_df(df, symbol, tf))
 
 
-async def _fetch_ohlcv_one_from_storage(exchange: str, symbol: str, tf: str, since_ms: Optional[int], limit: int) -> List[Dict[str, Any]]:
-    """Fetch OHLCV rows via storage reader if available; else from local files.
+def _rows_from_frame(frame: pd.DataFrame) -> List[Dict[str, Any]]:
+    """Storage-boundary conversion of a canonical frame into OHLCV row dicts."""
+    if frame.empty:
+        return []
+    ingest_ts = int(pd.Timestamp.now(tz="UTC").timestamp() * 1000)
+    sym = str(frame["symbol"].iloc[0])
+    tf = frame["tf"].iloc[0]
+    bars = frame[["o", "h", "l", "c", "v"]].astype(float).to_dict("records")
+    return [
+        {"symbol": sym, "exchange": "STORAGE", "ts_event": t, "ingest_ts": ingest_ts, "tf": tf, "ohlcv": b}
+        for t, b in zip(_epoch_ms(frame["ts_event"]).tolist(), bars)
+    ]
+
+
+def _read_ohlcv_frame(
+    exchange: str, symbol: str, tf: str, since_ms: Optional[int], limit: int, get_ohlcv: Optional[Callable[..., pd.DataFrame]] = None
+) -> pd.DataFrame:
+    """Load OHLCV as a canonical frame via storage reader if available; else from local files (blocking).
 
     Order:
-      1) storage.tsdb_reader.get_ohlcv (dynamic import)
+      1) storage.tsdb_reader.get_ohlcv (dynamic import, or the `get_ohlcv` passed in)
       2) data/ohlcv/<symbol>_<tf>.{csv,parquet}
     """
     # 1) storage reader
     try:
-        get_ohlcv = _load_storage_reader()
+        get_ohlcv = get_ohlcv or _load_storage_reader()
         if get_ohlcv is not None:
             df = get_ohlcv(symbol=symbol, tf=tf, since_ms=since_ms, limit=limit)  # type: ignore[misc]
             if isinstance(df, pd.DataFrame) and not df.empty:
-                return _rows_from_df(df, symbol, tf)
+                return _frame_from_df(df, symbol, tf)
     except Exception as e:
         log.info("storage reader failed or unavailable: %s", e)
 
@@ -236,17 +280,197 @@ async def _fetch_ohlcv_one_from_storage(exchange: str, symbol: str, tf: str, sin
                 if "ts_event" in df.columns:
                     ts_ms = df["ts_event"].astype("int64")
                 else:
-                    ts_ms = pd.to_datetime(df["timestamp"], utc=True).astype("int64") // 1_000_000
+                    ts_ms = pd.Series(_epoch_ms(pd.to_datetime(df["timestamp"], utc=True)), index=df.index)
                 df = df.loc[ts_ms >= int(since_ms)]
             # limit tail
             if limit and limit > 0:
                 df = df.tail(limit)
-            return _rows_from_df(df, symbol, tf)
+            return _frame_from_df(df, symbol, tf)
         except Exception as e:
             log.warning("Failed to load %s: %s", path, e)
 
     log.warning("No storage/file data found for %s %s; returning empty list.", symbol, tf)
-    return []
+    return pd.DataFrame(columns=_FRAME_COLS)
+
+
+async def _fetch_ohlcv_frame_from_storage(
+    exchange: str, symbol: str, tf: str, since_ms: Optional[int], limit: int, get_ohlcv: Optional[Callable[..., pd.DataFrame]] = None
+) -> pd.DataFrame:
+    """Fetch OHLCV as a canonical frame (see `_read_ohlcv_frame`)."""
+    return _read_ohlcv_frame(exchange, symbol, tf, since_ms, limit, get_ohlcv)
+
+
+async def _fetch_ohlcv_one_from_storage(exchange: str, symbol: str, tf: str, since_ms: Optional[int], limit: int) -> List[Dict[str, Any]]:
+    """Fetch OHLCV rows via storage reader if available; else from local files.
+
+    Row-shaped wrapper over `_fetch_ohlcv_frame_from_storage`.
+    """
+    return _rows_from_frame(await _fetch_ohlcv_frame_from_storage(exchange, symbol, tf, since_ms, limit))
+
+
+# =============================================================================
+# Universe mode (many symbols x timeframes in one process)
+# =============================================================================
+
+@dataclass
+class StageStats:
+    """Rows processed and busy seconds of one pipeline stage."""
+    rows: int = 0
+    seconds: float = 0.0
+
+    @property
+    def rows_per_s(self) -> float:
+        """Throughput over the stage's busy time."""
+        return self.rows / self.seconds if self.seconds > 0 else 0.0
+
+
+class _BatchWriter:
+    """Accumulates records and hands them to a storage writer in batches (off the event loop)."""
+
+    def __init__(self, fn: Optional[Callable[[List[Dict[str, Any]]], None]], batch_rows: int, stats: StageStats, name: str) -> None:
+        """Wrap writer `fn` (None → count only); flush every `batch_rows` records."""
+        self.fn = fn
+        self.batch_rows = max(1, batch_rows)
+        self.stats = stats
+        self.name = name
+        self.batches = 0
+        self.errors = 0
+        self._buf: List[Dict[str, Any]] = []
+        self._lock = asyncio.Lock()
+
+    async def add(self, records: List[Dict[str, Any]]) -> None:
+        """Queue records; write every full batch that is pending."""
+        self._buf.extend(records)
+        while len(self._buf) >= self.batch_rows:
+            batch, self._buf = self._buf[: self.batch_rows], self._buf[self.batch_rows:]
+            await self._write(batch)
+
+    async def flush(self) -> None:
+        """Write the remaining partial batch."""
+        batch, self._buf = self._buf, []
+        if batch:
+            await self._write(batch)
+
+    async def _write(self, batch: List[Dict[str, Any]]) -> None:
+        """Send one batch to the writer in a worker thread (writes are serialized)."""
+        async with self._lock:
+            t0 = time.perf_counter()
+            if callable(self.fn):
+                try:
+                    await asyncio.to_thread(self.fn, batch)
+                except Exception as e:
+                    self.errors += 1
+                    log.error("%s failed for %d rows: %s", self.name, len(batch), e)
+            self.batches += 1
+            self.stats.rows += len(batch)
+            self.stats.seconds += time.perf_counter() - t0
+
+
+def _universe_compute(frame: pd.DataFrame) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """Process-pool task: columnar pipeline for one (symbol, tf) frame.
+
+    Frames from `_read_ohlcv_frame` are already in time order; anything else is
+    sorted by (symbol, ts_event) here so rolling features never see reversed bars.
+    """
+    if not frame["ts_event"].is_monotonic_increasing:
+        frame = frame.sort_values(["symbol", "ts_event"], kind="mergesort").reset_index(drop=True)
+    feat, sig = pipeline_frames(frame)
+    return feat[["ts_event"] + _FEATURE_COLS], sig
+
+
+def read_universe(symbols: Optional[str] = None, symbols_file: Optional[str] = None) -> List[str]:
+    """Symbols from a comma list and/or a file (one per line or comma separated; `#` comments)."""
+    out: List[str] = []
+    if symbols:
+        out.extend(s.strip() for s in symbols.split(","))
+    if symbols_file:
+        with open(symbols_file, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.split("#", 1)[0]
+                out.extend(s.strip() for s in line.split(","))
+    return list(dict.fromkeys(s for s in out if s))
+
+
+async def run_universe(
+    symbols: List[str],
+    tfs: List[str],
+    *,
+    exchange: str = "binance",
+    since_ms: Optional[int] = None,
+    limit: int = 0,
+    concurrency: int = 8,
+    workers: Optional[int] = None,
+    batch_rows: int = 5000,
+) -> Dict[str, Any]:
+    """Run the local pipeline over every (symbol, tf) pair.
+
+    Fetches run in threads (at most `concurrency` jobs in flight), compute runs
+    in a process pool, and features/signals go through batched writers. The
+    storage reader/writers are resolved once and shared by all jobs.
+    Returns per-stage stats and totals.
+    """
+    get_ohlcv = _load_storage_reader()
+    insert_features, insert_signals = _load_storage_writer()
+    stats = {k: StageStats() for k in ("fetch", "compute", "records", "write_features", "write_signals")}
+    feat_w = _BatchWriter(insert_features, batch_rows, stats["write_features"], "insert_features")
+    sig_w = _BatchWriter(insert_signals, batch_rows, stats["write_signals"], "insert_signals")
+    sem = asyncio.Semaphore(max(1, concurrency))
+    loop = asyncio.get_running_loop()
+    failed: List[str] = []
+
+    async def job(pool: ProcessPoolExecutor, symbol: str, tf: str) -> None:
+        """Fetch → compute → write for one pair."""
+        async with sem:
+            try:
+                t0 = time.perf_counter()
+                frame = await asyncio.to_thread(_read_ohlcv_frame, exchange, symbol, tf, since_ms, limit, get_ohlcv)
+                stats["fetch"].rows += len(frame)
+                stats["fetch"].seconds += time.perf_counter() - t0
+                if frame.empty:
+                    return
+                t0 = time.perf_counter()
+                feat, sig = await loop.run_in_executor(pool, _universe_compute, frame)
+                stats["compute"].rows += len(frame)
+                stats["compute"].seconds += time.perf_counter() - t0
+                t0 = time.perf_counter()
+                sym = symbol.replace("/", "")
+                f_recs, s_recs = await asyncio.to_thread(
+                    lambda: (feature_records(feat, sym, tf), signal_records(sig, sym, tf))
+                )
+                stats["records"].rows += len(f_recs) + len(s_recs)
+                stats["records"].seconds += time.perf_counter() - t0
+            except Exception as e:
+                failed.append(f"{symbol}:{tf}")
+                log.error("universe job %s %s failed: %s", symbol, tf, e)
+                return
+        await feat_w.add(f_recs)
+        await sig_w.add(s_recs)
+
+    t_start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        await asyncio.gather(*(job(pool, s, tf) for s in symbols for tf in tfs))
+    await feat_w.flush()
+    await sig_w.flush()
+    wall = time.perf_counter() - t_start
+    return {
+        "pairs": len(symbols) * len(tfs),
+        "failed": failed,
+        "wall_s": wall,
+        "rows_per_s": stats["fetch"].rows / wall if wall > 0 else 0.0,
+        "stages": stats,
+        "batches": {"features": feat_w.batches, "signals": sig_w.batches},
+        "write_errors": feat_w.errors + sig_w.errors,
+    }
+
+
+def _log_universe_summary(res: Dict[str, Any]) -> None:
+    """Log the per-stage throughput table of a universe run."""
+    log.info("Universe complete — pairs=%d failed=%d wall=%.2fs overall=%.0f rows/s",
+             res["pairs"], len(res["failed"]), res["wall_s"], res["rows_per_s"])
+    for name, st in res["stages"].items():
+        log.info("  %-15s rows=%10d busy=%8.2fs  %12.0f rows/s", name, st.rows, st.seconds, st.rows_per_s)
+    log.info("  batches: features=%d signals=%d write_errors=%d",
+             res["batches"]["features"], res["batches"]["signals"], res["write_errors"])
 
 
 # =============================================================================
@@ -254,20 +478,36 @@ async def _fetch_ohlcv_one_from_storage(exchange: str, symbol: str, tf: str, sin
 # =============================================================================
 
 def main() -> None:
-    """Entry point for backtesting runner (batch mode only for now)."""
+    """Entry point for backtesting runner (single-pair batch or multi-pair universe mode)."""
     setup_logging()
 
     ap = argparse.ArgumentParser(prog="backtesting.runner", description="NEXUSA Backtesting Runner")
-    ap.add_argument("--mode", choices=["batch"], default="batch", help="Run mode")
+    ap.add_argument("--mode", choices=["batch", "universe"], default="batch", help="Run mode")
     ap.add_argument("--exchange", default="binance", help="Exchange name (for metadata)")
     ap.add_argument("--symbol", default="BTC/USDT", help="Trading symbol")
     ap.add_argument("--tf", default="1h", help="Timeframe")
-    ap.add_argument("--limit", type=int, default=200, help="Max rows to process")
+    ap.add_argument("--limit", type=int, default=200, help="Max rows to process (per pair in universe mode; 0 = all)")
+    ap.add_argument("--symbols", help="Universe: comma-separated symbols")
+    ap.add_argument("--symbols-file", help="Universe: file with one symbol per line (# comments)")
+    ap.add_argument("--tfs", help="Universe: comma-separated timeframes (default: --tf)")
+    ap.add_argument("--concurrency", type=int, default=8, help="Universe: max pairs in flight")
+    ap.add_argument("--workers", type=int, default=None, help="Universe: compute processes")
+    ap.add_argument("--batch-rows", type=int, default=5000, help="Universe: rows per storage write")
     args = ap.parse_args()
 
+    if args.mode == "universe":
+        symbols = read_universe(args.symbols, args.symbols_file) or [args.symbol]
+        tfs = [t.strip() for t in (args.tfs or args.tf).split(",") if t.strip()]
+        res = asyncio.run(run_universe(
+            symbols, tfs, exchange=args.exchange, limit=args.limit, concurrency=args.concurrency,
+            workers=args.workers, batch_rows=args.batch_rows,
+        ))
+        _log_universe_summary(res)
+        return
+
     if args.mode == "batch":
-        rows = asyncio.run(_fetch_ohlcv_one_from_storage(args.exchange, args.symbol, args.tf, None, args.limit))
-        feats, sigs = batch_pipeline_local(rows, args.symbol, args.tf)
+        frame = asyncio.run(_fetch_ohlcv_frame_from_storage(args.exchange, args.symbol, args.tf, None, args.limit))
+        feats, sigs = batch_pipeline_frame(frame, args.symbol, args.tf)
 
         insert_features, insert_signals = _load_storage_writer()
         if feats and callable(insert_features):
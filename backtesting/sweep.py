@@ -0,0 +1,548 @@
+"""
+backtesting/sweep.py
+
+Parallel parameter sweep + walk-forward optimizer.
+
+Evaluates a grid of candidate configurations — indicator params (the
+`FeatureSpec.params` of each feature) x score thresholds (as in
+`direction_from_score(threshold)`) x optional SL/TP policies — with
+`backtesting.vector_engine.run_backtest`, and streams one leaderboard row per
+(config, window, phase) to Parquet.
+
+How work is shared:
+- OHLCV arrays are prepared once and placed in `multiprocessing.shared_memory`;
+  workers attach to them instead of receiving pickled copies.
+- Each distinct indicator (name + params) is computed exactly once, keyed by
+  `hash_config({"indicator", "params", "data"})`, and saved as `.npy` in the
+  cache dir; workers memory-map it. Reusing `cache_dir` across runs on the same
+  data skips recomputation entirely.
+- Walk-forward windows slice the precomputed series, so indicators are never
+  recomputed per window (all bundled indicators are causal).
+
+CLI:
+    python -m backtesting.sweep --data data/ohlcv/BTCUSDT_1h.parquet --grid grid.json \\
+        --train 2000 --test 500 --out leaderboard.parquet --workers 4
+
+`grid.json`:
+    {"features": {"adx": {"period": [10, 14]}, "atr": {"period": [14]}, "vwap": {}},
+     "thresholds": [0.3, 0.35, 0.4],
+     "sltp": [[1.5, 2.0], [2.0, 3.0]]}
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import importlib
+import itertools
+import json
+import logging
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from multiprocessing import shared_memory
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from backtesting.config_hashing import hash_config
+from backtesting.metrics import summarize
+from backtesting.vector_engine import CostModel, EngineConfig, SLTPParams, run_backtest
+
+try:  # pragma: no cover
+    import pyarrow as pa  # type: ignore
+    import pyarrow.parquet as pq  # type: ignore
+except Exception:  # pragma: no cover
+    pa = None  # type: ignore
+    pq = None  # type: ignore
+
+log = logging.getLogger("backtesting.sweep")
+
+# indicator name → "module:function"; imported lazily inside workers
+INDICATORS: Dict[str, str] = {
+    "atr": "features.indicators.atr:compute_atr",
+    "adx": "features.indicators.adx:compute_adx",
+    "vwap": "features.indicators.vwap:compute_vwap",
+    "obv": "features.indicators.obv:compute_obv",
+    "ichimoku": "features.indicators.ichimoku:compute_ichimoku",
+    "stochastic_rsi": "features.indicators.stochastic_rsi:compute_stochrsi",
+}
+DEFAULT_SCORER = "signals.rule_engine:rule_score"
+
+_OHLCV = ("open", "high", "low", "close", "volume")
+_METRICS = ("sharpe", "sortino", "calmar", "max_dd", "hit_rate", "exp_rr", "cagr", "vol_annualized")
+
+
+# =============================================================================
+# Grid & windows
+# =============================================================================
+
+@dataclass
+class SweepSpace:
+    """Parameter grid: `{indicator: {param: [values]}}` x thresholds x SL/TP pairs."""
+    features: Mapping[str, Mapping[str, Sequence[Any]]]
+    thresholds: Sequence[float] = (0.35,)
+    sltp: Optional[Sequence[Tuple[float, float]]] = None  # (atr_multiple, rr_ratio); None → no SL/TP
+
+    def expand(self) -> List[Dict[str, Any]]:
+        """Return every candidate config as a plain dict (stable order)."""
+        per_feature: List[List[Dict[str, Any]]] = []
+        for name in sorted(self.features):
+            grid = self.features[name] or {}
+            keys = sorted(grid)
+            combos = itertools.product(*(list(grid[k]) for k in keys)) if keys else [()]
+            per_feature.append([{"name": name, "params": dict(zip(keys, vals))} for vals in combos])
+        sltps: List[Optional[Dict[str, float]]] = (
+            [None] if not self.sltp else [{"atr_multiple": float(a), "rr_ratio": float(r)} for a, r in self.sltp]
+        )
+        out = []
+        for feats in itertools.product(*per_feature):
+            for th in self.thresholds:
+                for s in sltps:
+                    out.append({"features": list(feats), "threshold": float(th), "sltp": s})
+        return out
+
+
+@dataclass(frozen=True)
+class Window:
+    """One walk-forward split as half-open bar ranges."""
+    index: int
+    train: Tuple[int, int]
+    test: Tuple[int, int]
+
+
+def walk_forward_windows(n: int, train: int, test: int, step: Optional[int] = None, anchored: bool = False) -> List[Window]:
+    """Return rolling (or anchored, i.e. expanding-train) train/test windows over `n` bars."""
+    if train <= 0 or test <= 0:
+        raise ValueError("train and test must be positive")
+    step = step or test
+    out: List[Window] = []
+    start = 0
+    while start + train + test <= n:
+        tr0 = 0 if anchored else start
+        out.append(Window(len(out), (tr0, start + train), (start + train, start + train + test)))
+        start += step
+    return out
+
+
+def config_id(cfg: Mapping[str, Any]) -> str:
+    """Short, stable id of a candidate config."""
+    return hash_config(dict(cfg)).short_id
+
+
+# =============================================================================
+# Shared memory & indicator cache
+# =============================================================================
+
+@dataclass(frozen=True)
+class _SharedArray:
+    """Picklable handle to an ndarray living in shared memory."""
+    name: str
+    shape: Tuple[int, ...]
+    dtype: str
+
+    @classmethod
+    def create(cls, arr: np.ndarray) -> Tuple["_SharedArray", shared_memory.SharedMemory]:
+        """Copy `arr` into a new shared block; the caller owns (and must unlink) the block."""
+        shm = shared_memory.SharedMemory(create=True, size=max(arr.nbytes, 1))
+        np.ndarray(arr.shape, dtype=arr.dtype, buffer=shm.buf)[...] = arr
+        return cls(shm.name, tuple(arr.shape), arr.dtype.str), shm
+
+    def attach(self) -> Tuple[np.ndarray, shared_memory.SharedMemory]:
+        """Map the block into this process (read-only view)."""
+        shm = shared_memory.SharedMemory(name=self.name)
+        a = np.ndarray(self.shape, dtype=np.dtype(self.dtype), buffer=shm.buf)
+        a.flags.writeable = False
+        return a, shm
+
+
+def _resolve(ref: Union[str, Callable[..., Any]]) -> Callable[..., Any]:
+    """Return the callable for a "module:function" reference (or the callable itself)."""
+    if callable(ref):
+        return ref
+    mod, _, fn = ref.partition(":")
+    return getattr(importlib.import_module(mod), fn)
+
+
+def _data_fingerprint(ohlcv: np.ndarray, ts: np.ndarray) -> str:
+    """Content hash of the price block, part of every indicator cache key."""
+    h = hashlib.blake2b(digest_size=16)
+    h.update(np.ascontiguousarray(ts).tobytes())
+    h.update(np.ascontiguousarray(ohlcv).tobytes())
+    return h.hexdigest()
+
+
+def indicator_key(name: str, params: Mapping[str, Any], data_id: str) -> str:
+    """Cache key of one indicator output: `hash_config` of name, params and data fingerprint."""
+    return hash_config({"indicator": name, "params": dict(params), "data": data_id}, namespace="indicator").short_id
+
+
+# per-process state set by `_init_worker`
+_W: Dict[str, Any] = {}
+
+
+def _init_worker(ohlcv: _SharedArray, ts: _SharedArray, cache_dir: str, scorer: Any) -> None:
+    """Pool initializer: attach shared arrays once per worker process."""
+    a, s1 = ohlcv.attach()
+    t, s2 = ts.attach()
+    _W.update(ohlcv=a, ts=t, shm=(s1, s2), cache_dir=cache_dir, scorer=_resolve(scorer), ind={}, frame=None)
+
+
+def _price_frame() -> pd.DataFrame:
+    """OHLCV DataFrame over the shared arrays with a UTC DatetimeIndex (built once per worker)."""
+    if _W.get("frame") is None:
+        a = _W["ohlcv"]
+        idx = pd.to_datetime(_W["ts"], unit="ms", utc=True)
+        _W["frame"] = pd.DataFrame({c: a[:, i] for i, c in enumerate(_OHLCV)}, index=idx)
+    return _W["frame"]
+
+
+def _compute_indicator(name: str, params: Dict[str, Any], key: str) -> List[str]:
+    """Worker task: compute one indicator over the full series and save it to the cache."""
+    path = os.path.join(_W["cache_dir"], f"{key}.npy")
+    meta_path = os.path.join(_W["cache_dir"], f"{key}.json")
+    if os.path.exists(path) and os.path.exists(meta_path):
+        with open(meta_path, "r", encoding="utf-8") as f:
+            return json.load(f)["columns"]
+    n = _W["ohlcv"].shape[0]
+    res = _resolve(INDICATORS[name])(_price_frame(), **params)
+    items = res.items() if isinstance(res, dict) else ((c, res[c].to_numpy()) for c in res.columns)
+    cols, arrs = [], []
+    for c, v in items:
+        if isinstance(v, np.ndarray) and v.ndim == 1 and len(v) == n:
+            cols.append(f"{name}_{c}" if not str(c).startswith(name) else str(c))
+            arrs.append(v.astype(float))
+    tmp = f"{path}.{os.getpid()}.tmp.npy"
+    np.save(tmp, np.column_stack(arrs) if arrs else np.empty((n, 0)))
+    os.replace(tmp, path)
+    with open(meta_path, "w", encoding="utf-8") as f:
+        json.dump({"indicator": name, "params": params, "columns": cols}, f)
+    return cols
+
+
+def _load_indicator(key: str) -> Tuple[np.ndarray, List[str]]:
+    """Memory-map a cached indicator (memoized per worker)."""
+    hit = _W["ind"].get(key)
+    if hit is None:
+        with open(os.path.join(_W["cache_dir"], f"{key}.json"), "r", encoding="utf-8") as f:
+            cols = json.load(f)["columns"]
+        hit = (np.load(os.path.join(_W["cache_dir"], f"{key}.npy"), mmap_mode="r"), cols)
+        _W["ind"][key] = hit
+    return hit
+
+
+# =============================================================================
+# Evaluation
+# =============================================================================
+
+def directions_from_scores(score: np.ndarray, threshold: float) -> np.ndarray:
+    """Vectorized `direction_from_score`: +1 long / -1 short / 0 neutral (NaN → neutral)."""
+    s = np.nan_to_num(np.asarray(score, dtype=float), nan=0.0)
+    return np.where(s >= threshold, 1, np.where(s <= -threshold, -1, 0)).astype(np.int8)
+
+
+def _feature_frame(keys: Sequence[Tuple[str, str]]) -> pd.DataFrame:
+    """Price frame plus the namespaced columns of the cached indicators `(name, key)`."""
+    base = _price_frame()
+    cols: Dict[str, Any] = {c: base[c].to_numpy() for c in _OHLCV}
+    for name, key in keys:
+        arr, names = _load_indicator(key)
+        for i, c in enumerate(names):
+            cols[c] = arr[:, i]
+        if name not in cols and names:  # rule_score reads e.g. "vwap" for "vwap_session"
+            cols[name] = arr[:, 0]
+    return pd.DataFrame(cols, index=base.index)
+
+
+def _evaluate(
+    cfg: Dict[str, Any],
+    keys: List[Tuple[str, str]],
+    windows: List[Tuple[int, str, int, int]],
+    costs: Dict[str, float],
+    periods_per_year: Optional[int],
+) -> List[Dict[str, Any]]:
+    """Worker task: score one config once, then backtest each `(window, phase, start, end)` slice."""
+    frame = _feature_frame(keys)
+    score = np.asarray(_W["scorer"](frame), dtype=float)
+    sig = directions_from_scores(score, cfg["threshold"])
+    a = _W["ohlcv"]
+    atr = frame["atr"].to_numpy() if "atr" in frame.columns else None
+    sltp = SLTPParams(**cfg["sltp"]) if cfg.get("sltp") else None
+    engine = EngineConfig(costs=CostModel(**costs), sltp=sltp)
+    cid = config_id(cfg)
+    rows = []
+    for w, phase, s, e in windows:
+        res = run_backtest(
+            a[s:e, 3], sig[s:e], high=a[s:e, 1], low=a[s:e, 2],
+            atr=None if atr is None else atr[s:e], index=frame.index[s:e], config=engine,
+        )
+        summ = summarize(equity=res.equity.iloc[:, 0], trade_pnls=res.trades["pnl"], periods_per_year=periods_per_year)
+        row = {"config_id": cid, "window": w, "phase": phase, "start": s, "end": e}
+        row.update({m: float(getattr(summ, m)) for m in _METRICS})
+        row.update(
+            trades=int(len(res.trades)),
+            total_return=float(res.equity.iloc[-1, 0] - 1.0),
+            threshold=float(cfg["threshold"]),
+            config=json.dumps(cfg, sort_keys=True),
+        )
+        rows.append(row)
+    return rows
+
+
+# =============================================================================
+# Leaderboard
+# =============================================================================
+
+class LeaderboardWriter:
+    """Append-only Parquet leaderboard; rows are buffered and flushed as row groups."""
+
+    def __init__(self, path: str, *, flush_rows: int = 1000) -> None:
+        """Open `path` for writing (requires pyarrow)."""
+        if pq is None:
+            raise RuntimeError("pyarrow is required for the Parquet leaderboard")
+        self.path = path
+        self.flush_rows = flush_rows
+        self._buf: List[Dict[str, Any]] = []
+        self._writer: Any = None
+        self.rows_written = 0
+        d = os.path.dirname(os.path.abspath(path))
+        os.makedirs(d, exist_ok=True)
+
+    def write(self, rows: Iterable[Dict[str, Any]]) -> None:
+        """Buffer rows; flush a row group once `flush_rows` are pending."""
+        self._buf.extend(rows)
+        if len(self._buf) >= self.flush_rows:
+            self.flush()
+
+    def flush(self) -> None:
+        """Write pending rows as one row group."""
+        if not self._buf:
+            return
+        table = pa.Table.from_pylist(self._buf)
+        if self._writer is None:
+            self._writer = pq.ParquetWriter(self.path, table.schema)
+        else:
+            table = table.cast(self._writer.schema)
+        self._writer.write_table(table)
+        self.rows_written += len(self._buf)
+        self._buf.clear()
+
+    def close(self) -> None:
+        """Flush and close the file."""
+        self.flush()
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+    def __enter__(self) -> "LeaderboardWriter":
+        """Context-manager entry."""
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        """Context-manager exit; closes the file."""
+        self.close()
+
+
+# =============================================================================
+# Driver
+# =============================================================================
+
+@dataclass
+class SweepResult:
+    """In-memory view of a finished sweep."""
+    leaderboard: pd.DataFrame
+    selections: pd.DataFrame  # best train config per window with its out-of-sample row
+    indicators_computed: int = 0
+    indicators_cached: int = 0
+    seconds: float = 0.0
+    stats: Dict[str, Any] = field(default_factory=dict)
+
+
+def ohlcv_arrays(df: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
+    """Return `(ohlcv float64 [T, 5], ts_ms int64 [T])` from a frame with o/h/l/c/v (or long names)."""
+    def col(*names: str) -> pd.Series:
+        for n in names:
+            if n in df.columns:
+                return df[n]
+        raise KeyError(f"Missing columns among {names!r}")
+
+    def epoch_ms(x: Any) -> pd.Series:
+        dt = pd.Series(pd.to_datetime(x, utc=True))
+        return (dt - pd.Timestamp(0, tz="UTC")) // pd.Timedelta(1, "ms")
+
+    if "ts_event" in df.columns:
+        ts = df["ts_event"]
+        ts = ts.astype("int64") if np.issubdtype(ts.dtype, np.number) else epoch_ms(ts)
+    elif "timestamp" in df.columns:
+        ts = epoch_ms(df["timestamp"])
+    else:
+        ts = epoch_ms(df.index)
+    order = np.argsort(ts.to_numpy(), kind="mergesort")
+    a = np.column_stack([
+        col("o", "open").to_numpy(dtype=float),
+        col("h", "high").to_numpy(dtype=float),
+        col("l", "low").to_numpy(dtype=float),
+        col("c", "close").to_numpy(dtype=float),
+        col("v", "volume").to_numpy(dtype=float),
+    ])[order]
+    return np.ascontiguousarray(a), ts.to_numpy(dtype=np.int64)[order]
+
+
+def run_sweep(
+    df: pd.DataFrame,
+    space: SweepSpace,
+    *,
+    out_path: Optional[str] = None,
+    train: Optional[int] = None,
+    test: Optional[int] = None,
+    step: Optional[int] = None,
+    anchored: bool = False,
+    objective: str = "sharpe",
+    costs: Optional[CostModel] = None,
+    scorer: Union[str, Callable[[pd.DataFrame], Any]] = DEFAULT_SCORER,
+    cache_dir: Optional[str] = None,
+    max_workers: Optional[int] = None,
+    periods_per_year: Optional[int] = None,
+) -> SweepResult:
+    """Run every config of `space` over `df` (one symbol/timeframe) in a process pool.
+
+    Without `train`/`test` each config is scored once over the full range
+    (phase "full"); with them, every walk-forward window yields a "train" and a
+    "test" row per config, and `selections` holds the best train config per
+    window (by `objective`, higher is better; `max_dd` is minimized) together
+    with its out-of-sample metrics. `scorer` maps the feature frame to a score
+    in [-1, 1] and must be picklable (a "module:function" string is simplest).
+    """
+    t0 = time.perf_counter()
+    ohlcv, ts = ohlcv_arrays(df)
+    n = len(ts)
+    configs = space.expand()
+    if train and test:
+        wins = walk_forward_windows(n, train, test, step, anchored)
+        if not wins:
+            raise ValueError(f"not enough bars ({n}) for train={train} test={test}")
+        slices = [t for w in wins for t in ((w.index, "train", *w.train), (w.index, "test", *w.test))]
+    else:
+        slices = [(0, "full", 0, n)]
+    cost_kw = {"fee_bps": (costs or CostModel()).fee_bps, "slippage_bps": (costs or CostModel()).slippage_bps}
+
+    own_cache = cache_dir is None
+    cache_dir = cache_dir or tempfile.mkdtemp(prefix="nexusa-sweep-")
+    os.makedirs(cache_dir, exist_ok=True)
+    data_id = _data_fingerprint(ohlcv, ts)
+
+    unique: Dict[str, Tuple[str, Dict[str, Any]]] = {}
+    cfg_keys: List[List[Tuple[str, str]]] = []
+    for cfg in configs:
+        ks = []
+        for spec in cfg["features"]:
+            k = indicator_key(spec["name"], spec["params"], data_id)
+            unique.setdefault(k, (spec["name"], spec["params"]))
+            ks.append((spec["name"], k))
+        cfg_keys.append(ks)
+    cached = sum(os.path.exists(os.path.join(cache_dir, f"{k}.npy")) for k in unique)
+    log.info("sweep: %d configs x %d slices, %d indicators (%d cached)", len(configs), len(slices), len(unique), cached)
+
+    h_ohlcv, shm_ohlcv = _SharedArray.create(ohlcv)
+    h_ts, shm_ts = _SharedArray.create(ts)
+    writer = LeaderboardWriter(out_path) if out_path else None
+    rows: List[Dict[str, Any]] = []
+    try:
+        with ProcessPoolExecutor(
+            max_workers=max_workers, initializer=_init_worker, initargs=(h_ohlcv, h_ts, cache_dir, scorer)
+        ) as pool:
+            for fut in as_completed([pool.submit(_compute_indicator, nm, p, k) for k, (nm, p) in unique.items()]):
+                fut.result()
+            futs = [
+                pool.submit(_evaluate, cfg, ks, slices, cost_kw, periods_per_year)
+                for cfg, ks in zip(configs, cfg_keys)
+            ]
+            for fut in as_completed(futs):
+                part = fut.result()
+                rows.extend(part)
+                if writer is not None:
+                    writer.write(part)
+    finally:
+        if writer is not None:
+            writer.close()
+        for shm in (shm_ohlcv, shm_ts):
+            shm.close()
+            shm.unlink()
+        if own_cache:
+            shutil.rmtree(cache_dir, ignore_errors=True)
+
+    board = pd.DataFrame(rows)
+    selections = _select(board, objective) if train and test else pd.DataFrame()
+    elapsed = time.perf_counter() - t0
+    return SweepResult(
+        leaderboard=board,
+        selections=selections,
+        indicators_computed=len(unique) - cached,
+        indicators_cached=cached,
+        seconds=elapsed,
+        stats={"configs": len(configs), "rows": len(board), "configs_per_s": len(configs) / elapsed if elapsed else 0.0},
+    )
+
+
+def _select(board: pd.DataFrame, objective: str) -> pd.DataFrame:
+    """Pick the best train config per window and attach its test-phase metrics."""
+    if board.empty:
+        return board
+    tr = board[board["phase"] == "train"].copy()
+    asc = objective == "max_dd"
+    tr["_obj"] = tr[objective].replace([np.inf, -np.inf], np.nan)
+    best = tr.sort_values(["window", "_obj", "config_id"], ascending=[True, asc, True], na_position="last")
+    best = best.groupby("window", as_index=False).head(1)[["window", "config_id", objective]]
+    best = best.rename(columns={objective: f"train_{objective}"})
+    te = board[board["phase"] == "test"]
+    return best.merge(te, on=["window", "config_id"], how="left").sort_values("window").reset_index(drop=True)
+
+
+# =============================================================================
+# CLI
+# =============================================================================
+
+def _cli(argv: Optional[List[str]] = None) -> None:
+    """Command-line entry point."""
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    ap = argparse.ArgumentParser(prog="backtesting.sweep", description="NEXUSA parameter sweep / walk-forward optimizer")
+    ap.add_argument("--data", required=True, help="OHLCV csv/parquet (one symbol & timeframe)")
+    ap.add_argument("--grid", required=True, help="JSON grid: features / thresholds / sltp")
+    ap.add_argument("--out", required=True, help="Parquet leaderboard path")
+    ap.add_argument("--train", type=int, help="Walk-forward train bars")
+    ap.add_argument("--test", type=int, help="Walk-forward test bars")
+    ap.add_argument("--step", type=int, help="Window step (default: --test)")
+    ap.add_argument("--anchored", action="store_true", help="Expanding train window")
+    ap.add_argument("--objective", default="sharpe", choices=list(_METRICS) + ["total_return"])
+    ap.add_argument("--fee-bps", type=float, default=0.0)
+    ap.add_argument("--slippage-bps", type=float, default=0.0)
+    ap.add_argument("--scorer", default=DEFAULT_SCORER, help="module:function mapping features → score")
+    ap.add_argument("--cache-dir", help="Persistent indicator cache (default: temporary)")
+    ap.add_argument("--workers", type=int, default=None)
+    ap.add_argument("--periods-per-year", type=int, default=None)
+    a = ap.parse_args(argv)
+
+    df = pd.read_parquet(a.data) if a.data.endswith(".parquet") else pd.read_csv(a.data)
+    with open(a.grid, "r", encoding="utf-8") as f:
+        g = json.load(f)
+    space = SweepSpace(
+        features=g.get("features", {}),
+        thresholds=g.get("thresholds", [0.35]),
+        sltp=[tuple(x) for x in g["sltp"]] if g.get("sltp") else None,
+    )
+    res = run_sweep(
+        df, space, out_path=a.out, train=a.train, test=a.test, step=a.step, anchored=a.anchored,
+        objective=a.objective, costs=CostModel(a.fee_bps, a.slippage_bps), scorer=a.scorer,
+        cache_dir=a.cache_dir, max_workers=a.workers, periods_per_year=a.periods_per_year,
+    )
+    log.info("sweep done in %.1fs: %s (indicators computed=%d cached=%d)",
+             res.seconds, res.stats, res.indicators_computed, res.indicators_cached)
+    if not res.selections.empty:
+        log.info("walk-forward selections:\n%s", res.selections[["window", "config_id", f"train_{a.objective}", a.objective]].to_string(index=False))
+
+
+if __name__ == "__main__":  # pragma: no cover
+    _cli()
@@ -0,0 +1,324 @@
+"""Array-based, fee- and slippage-aware backtest engine for NEXUSA.
+
+Evaluates aligned ``[T, K]`` signal/price matrices (T bars, K symbols) at once:
+
+- entries, exits and per-bar positions are derived with NumPy (``searchsorted``
+  over signal bars, chunked first-hit scans for SL/TP, ``cumsum`` of position
+  deltas) instead of a per-row Python loop;
+- SL/TP levels follow ``SignalEmitter._calc_sltp`` (risk = ATR, or 1% of close
+  when ATR is missing, times ``atr_multiple``; TP at ``rr_ratio`` x risk);
+- fills pay ``slippage_bps`` adversely and ``fee_bps`` per side.
+
+The result holds per-symbol equity curves and a trade ledger that plug straight
+into ``backtesting.metrics.summarize``::
+
+    res = run_backtest(close, signals, high=high, low=low, atr=atr, symbols=syms)
+    summaries = res.summaries(periods_per_year=365 * 24)
+
+Signal convention: ``+1`` long, ``-1`` short, ``0`` no signal, read at bar close.
+Entries fill at that bar's close; an opposite signal closes (and, with
+``allow_short``, reverses) the position at its bar's close; SL/TP are checked
+against the high/low of every later bar (stop first when both are touched).
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+_DIRECTION_CODES = {"LONG": 1, "BUY": 1, "SHORT": -1, "SELL": -1}
+
+
+@dataclass(frozen=True)
+class CostModel:
+    """Per-side trading costs in basis points of notional."""
+    fee_bps: float = 0.0
+    slippage_bps: float = 0.0
+
+
+@dataclass(frozen=True)
+class SLTPParams:
+    """SL/TP sizing; same fields and defaults as ``signals.signal_emitter.SLTPPolicy``."""
+    atr_multiple: float = 1.5
+    rr_ratio: float = 2.0
+
+
+@dataclass(frozen=True)
+class EngineConfig:
+    """Backtest behavior: costs, optional SL/TP policy and position rules."""
+    costs: CostModel = field(default_factory=CostModel)
+    sltp: Optional[Any] = field(default_factory=SLTPParams)  # any object with atr_multiple / rr_ratio
+    allow_short: bool = True
+    initial_equity: float = 1.0
+
+
+@dataclass
+class BacktestResult:
+    """Per-symbol equity/returns/positions (DataFrames, columns = symbols) plus the trade ledger."""
+    equity: pd.DataFrame
+    returns: pd.DataFrame
+    positions: pd.DataFrame
+    trades: pd.DataFrame
+
+    def trade_pnls(self, symbol: str) -> pd.Series:
+        """Return net per-trade returns of `symbol` (ledger order)."""
+        t = self.trades
+        return t.loc[t["symbol"] == symbol, "pnl"].reset_index(drop=True)
+
+    def summaries(self, **kwargs: Any) -> Dict[str, Any]:
+        """Return ``{symbol: metrics.Summary}``; kwargs are forwarded to ``metrics.summarize``."""
+        from backtesting.metrics import summarize
+
+        return {
+            sym: summarize(equity=self.equity[sym], trade_pnls=self.trade_pnls(sym), **kwargs)
+            for sym in self.equity.columns
+        }
+
+
+def direction_codes(values: Any) -> np.ndarray:
+    """Map LONG/SHORT-style labels (any case) or numbers to int8 codes +1/-1/0."""
+    arr = np.asarray(values)
+    if arr.dtype.kind in "iufb":
+        return np.sign(np.nan_to_num(arr.astype(float))).astype(np.int8)
+    flat = [_DIRECTION_CODES.get(str(v).upper(), 0) for v in arr.ravel()]
+    return np.asarray(flat, dtype=np.int8).reshape(arr.shape)
+
+
+def sltp_levels(
+    side: np.ndarray, close: np.ndarray, atr: Optional[np.ndarray], policy: Any
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Vectorized ``SignalEmitter._calc_sltp``: SL/TP arrays for `side` (+1/-1/0) at `close`.
+
+    Neutral bars get ``sl == tp == close`` like the emitter.
+    """
+    close = np.asarray(close, dtype=float)
+    side = np.asarray(side)
+    if atr is None:
+        base = 0.01 * close
+    else:
+        atr = np.asarray(atr, dtype=float)
+        base = np.where(np.isfinite(atr), atr, 0.01 * close)
+    risk = base * float(policy.atr_multiple)
+    sl = close - side * risk
+    tp = close + side * float(policy.rr_ratio) * risk
+    return sl, tp
+
+
+def _first_exit(
+    i: int,
+    s: int,
+    sl: float,
+    tp: float,
+    high: np.ndarray,
+    low: np.ndarray,
+    sig: np.ndarray,
+) -> Tuple[int, str]:
+    """Return ``(bar, reason)`` of the first exit after entry bar `i` for side `s`.
+
+    Scans forward in doubling chunks so short trades touch few bars and long
+    ones need O(log n) NumPy calls. Reason is ``sl``, ``tp``, ``signal`` or ``end``.
+    """
+    n = len(sig)
+    start, width = i + 1, 64
+    while start < n:
+        stop = min(n, start + width)
+        if s > 0:
+            hit_sl = low[start:stop] <= sl
+            hit_tp = high[start:stop] >= tp
+        else:
+            hit_sl = high[start:stop] >= sl
+            hit_tp = low[start:stop] <= tp
+        opp = sig[start:stop] == -s
+        hit = hit_sl | hit_tp | opp
+        if hit.any():
+            j = int(np.argmax(hit))
+            reason = "sl" if hit_sl[j] else ("tp" if hit_tp[j] else "signal")
+            return start + j, reason
+        start, width = stop, width * 2
+    return n - 1, "end"
+
+
+def _simulate_symbol(
+    close: np.ndarray,
+    high: np.ndarray,
+    low: np.ndarray,
+    sig: np.ndarray,
+    sl: np.ndarray,
+    tp: np.ndarray,
+    allow_short: bool,
+) -> List[Tuple[int, int, int, str]]:
+    """Return ``(entry_bar, exit_bar, side, reason)`` for every trade of one symbol."""
+    entries = np.flatnonzero(sig != 0) if allow_short else np.flatnonzero(sig > 0)
+    out: List[Tuple[int, int, int, str]] = []
+    t = 0
+    while True:
+        j = int(np.searchsorted(entries, t))
+        if j >= len(entries):
+            break
+        i = int(entries[j])
+        s = int(sig[i])
+        e, reason = _first_exit(i, s, sl[i], tp[i], high, low, sig)
+        out.append((i, e, s, reason))
+        if reason == "end":
+            break
+        t = e  # a reversal / fresh signal on the exit bar enters at its close
+    return out
+
+
+def _as_matrix(x: Any, name: str, shape: Optional[Tuple[int, int]] = None) -> np.ndarray:
+    """Return `x` as a 2-D float array (1-D input becomes one column)."""
+    a = np.asarray(x, dtype=float)
+    if a.ndim == 1:
+        a = a[:, None]
+    if a.ndim != 2:
+        raise ValueError(f"{name} must be 1-D or 2-D, got shape {a.shape}")
+    if shape is not None and a.shape != shape:
+        raise ValueError(f"{name} shape {a.shape} does not match close {shape}")
+    return a
+
+
+def run_backtest(
+    close: Any,
+    signals: Any,
+    *,
+    high: Any = None,
+    low: Any = None,
+    atr: Any = None,
+    symbols: Optional[Sequence[str]] = None,
+    index: Optional[Sequence[Any]] = None,
+    config: Optional[EngineConfig] = None,
+) -> BacktestResult:
+    """Backtest aligned ``[T, K]`` arrays (1-D is treated as a single symbol).
+
+    Args:
+        close: Close prices. DataFrames supply default `symbols`/`index`.
+        signals: +1/-1/0 codes or LONG/SHORT labels per bar (see ``direction_codes``).
+        high, low: Bar extremes for SL/TP checks (default: close).
+        atr: ATR per bar for SL/TP sizing (missing values fall back to 1% of close).
+        symbols: Column labels (default ``sym0..``).
+        index: Row labels, e.g. timestamps (default ``0..T-1``).
+        config: ``EngineConfig``; ``sltp=None`` disables stops/targets.
+
+    Returns:
+        BacktestResult with equity starting at ``config.initial_equity`` and a
+        ledger of ``symbol, side, entry_idx, exit_idx, entry_time, exit_time,
+        entry_price, exit_price, sl, tp, reason, bars, pnl``. ``pnl`` is the net
+        trade return after fees and slippage; trades still open on the last bar
+        are marked to its close without exit costs (``reason == "end"``).
+    """
+    cfg = config or EngineConfig()
+    if isinstance(close, pd.DataFrame):
+        symbols = list(close.columns) if symbols is None else symbols
+        index = close.index if index is None else index
+    px = _as_matrix(close, "close")
+    T, K = px.shape
+    hi = px if high is None else _as_matrix(high, "high", (T, K))
+    lo = px if low is None else _as_matrix(low, "low", (T, K))
+    sig = direction_codes(signals)
+    if sig.ndim == 1:
+        sig = sig[:, None]
+    if sig.shape != (T, K):
+        raise ValueError(f"signals shape {sig.shape} does not match close {(T, K)}")
+    sig = np.where(np.isfinite(px), sig, 0).astype(np.int8)
+    atr_m = None if atr is None else _as_matrix(atr, "atr", (T, K))
+    symbols = [f"sym{k}" for k in range(K)] if symbols is None else list(symbols)
+    index = pd.RangeIndex(T) if index is None else pd.Index(index)
+
+    if cfg.sltp is not None:
+        sl, tp = sltp_levels(sig, px, atr_m, cfg.sltp)
+        sl = np.where(sig != 0, sl, np.nan)
+        tp = np.where(sig != 0, tp, np.nan)
+    else:
+        sl = tp = np.full((T, K), np.nan)
+
+    slip = cfg.costs.slippage_bps / 1e4
+    fee = cfg.costs.fee_bps / 1e4
+
+    held_delta = np.zeros((T + 1, K))  # position held over (t-1, t]
+    start_px = np.vstack([np.full((1, K), np.nan), px[:-1]])
+    end_px = px.copy()
+    fills = np.zeros((T, K))
+    ledger: List[Dict[str, Any]] = []
+
+    for k in range(K):
+        trades = _simulate_symbol(px[:, k], hi[:, k], lo[:, k], sig[:, k], sl[:, k], tp[:, k], cfg.allow_short)
+        if not trades:
+            continue
+        arr = np.asarray([(i, e, s) for i, e, s, _ in trades], dtype=np.int64)
+        ent, ext, side = arr[:, 0], arr[:, 1], arr[:, 2]
+        reasons = np.asarray([r for *_, r in trades])
+        closed = reasons != "end"
+
+        raw_exit = px[ext, k].copy()
+        raw_exit = np.where(reasons == "sl", sl[ent, k], raw_exit)
+        raw_exit = np.where(reasons == "tp", tp[ent, k], raw_exit)
+        entry_fill = px[ent, k] * (1.0 + side * slip)
+        exit_fill = np.where(closed, raw_exit * (1.0 - side * slip), raw_exit)
+
+        np.add.at(held_delta[:, k], ent + 1, side)
+        np.add.at(held_delta[:, k], ext + 1, -side)
+        nxt = ent + 1 < T
+        start_px[ent[nxt] + 1, k] = entry_fill[nxt]
+        end_px[ext, k] = exit_fill
+        np.add.at(fills[:, k], ent, 1.0)
+        np.add.at(fills[:, k], ext[closed], 1.0)
+
+        pnl = side * (exit_fill / entry_fill - 1.0) - fee * (1.0 + closed)
+        for n in range(len(trades)):
+            ledger.append(
+                {
+                    "symbol": symbols[k],
+                    "side": int(side[n]),
+                    "entry_idx": int(ent[n]),
+                    "exit_idx": int(ext[n]),
+                    "entry_time": index[ent[n]],
+                    "exit_time": index[ext[n]],
+                    "entry_price": float(entry_fill[n]),
+                    "exit_price": float(exit_fill[n]),
+                    "sl": float(sl[ent[n], k]),
+                    "tp": float(tp[ent[n], k]),
+                    "reason": str(reasons[n]),
+                    "bars": int(ext[n] - ent[n]),
+                    "pnl": float(pnl[n]),
+                }
+            )
+
+    held_full = np.cumsum(held_delta, axis=0)
+    held = held_full[:T]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ret = np.where(held != 0, held * (end_px / start_px - 1.0), 0.0)
+    ret = np.nan_to_num(ret, nan=0.0, posinf=0.0, neginf=0.0)
+    growth = (1.0 + ret) * (1.0 - fee) ** fills
+    equity = cfg.initial_equity * np.cumprod(growth, axis=0)
+    net_ret = growth - 1.0
+
+    pos_after = held_full[1:]  # position carried out of each bar's close
+
+    cols = pd.Index(symbols)
+    trades_df = pd.DataFrame(
+        ledger,
+        columns=[
+            "symbol", "side", "entry_idx", "exit_idx", "entry_time", "exit_time",
+            "entry_price", "exit_price", "sl", "tp", "reason", "bars", "pnl",
+        ],
+    )
+    return BacktestResult(
+        equity=pd.DataFrame(equity, index=index, columns=cols),
+        returns=pd.DataFrame(net_ret, index=index, columns=cols),
+        positions=pd.DataFrame(pos_after.astype(np.int8), index=index, columns=cols),
+        trades=trades_df,
+    )
+
+
+def max_drawdown_array(series: np.ndarray) -> float:
+    """Maximum drawdown ratio of a price/equity array via a running max."""
+    x = np.asarray(series, dtype=float)
+    if x.size == 0:
+        return 0.0
+    peak = np.fmax.accumulate(x)  # NaNs neither raise the peak nor count as drawdown
+    dd = (peak - x) / (peak + 1e-9)
+    return float(max(0.0, np.nanmax(dd))) if np.isfinite(dd).any() else 0.0
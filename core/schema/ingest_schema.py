@@ -57,7 +57,7 @@ class IngestPayload(BaseModel):
             raise ValueError(f"Invalid timeframe: '{v}'. Allowed values are: {sorted(ALLOWED_TF)}")
         return v
 
-    @root_validator
+    @root_validator(skip_on_failure=True)
     def check_price_consistency(cls, values: Dict[str, Any]) -> Dict[str, Any]:
         """بررسی سازگاری قیمت‌ها: مقدار low نباید از high بزرگ‌تر باشد."""
         o = values.get("ohlcv")
@@ -0,0 +1,230 @@
+"""
+Compiled JSON Schema validators with an in-memory cache.
+
+Building a `jsonschema` validator re-checks the schema against its metaschema
+and resolves its keywords; doing that per payload dominates validation cost on
+hot paths (ingest, feature rows, signals). This module compiles each schema once
+per `(name, version)` and reuses it.
+
+- `CompiledValidator`: a `Draft7Validator` (or the schema's own `$schema`
+  draft, as `jsonschema.validate` picks it) built once, plus an optional
+  `fastjsonschema` code-generated fast path used only to accept valid payloads
+  quickly; any rejection is re-run through the jsonschema validator so error
+  messages and paths are unchanged.
+- `ValidatorCache`: thread-safe `(name, version) -> CompiledValidator` map,
+  optionally LRU-bounded, with an optional freshness token per entry (e.g. the
+  schema file's mtime) that forces a recompile when it changes.
+
+Both `jsonschema` and `fastjsonschema` are optional; without `jsonschema` the
+cache returns None and callers keep their best-effort behavior.
+
+Benchmark:
+    python -m core.schema.validator_cache --n 20000
+"""
+
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional, Tuple
+
+try:  # pragma: no cover
+    from jsonschema import Draft7Validator, ValidationError  # type: ignore
+    from jsonschema.exceptions import best_match  # type: ignore
+    from jsonschema.validators import validator_for  # type: ignore
+except Exception:  # pragma: no cover
+    Draft7Validator = None  # type: ignore
+    ValidationError = Exception  # type: ignore
+    best_match = None  # type: ignore
+    validator_for = None  # type: ignore
+
+try:  # pragma: no cover
+    import fastjsonschema  # type: ignore
+except Exception:  # pragma: no cover
+    fastjsonschema = None  # type: ignore
+
+
+class CompiledValidator:
+    """A schema compiled once: Draft7 validator plus an optional generated fast path."""
+
+    def __init__(
+        self, schema: Dict[str, Any], *, fast: bool = False, check_schema: bool = False, auto_draft: bool = False
+    ) -> None:
+        """Build validators for `schema` once.
+
+        `auto_draft=True` picks the validator class from `$schema` and
+        `check_schema=True` checks the schema against its metaschema up front —
+        together they match `jsonschema.validate`, minus the per-call cost.
+        `fast` enables the fastjsonschema path if installed.
+        """
+        if Draft7Validator is None:
+            raise RuntimeError("jsonschema is not installed")
+        cls = validator_for(schema) if auto_draft else Draft7Validator
+        if check_schema:
+            cls.check_schema(schema)
+        self.schema = schema
+        self._jsv = cls(schema)
+        self._fast: Optional[Callable[[Any], Any]] = None
+        if fast and fastjsonschema is not None:
+            try:
+                self._fast = fastjsonschema.compile(schema)
+            except Exception:
+                self._fast = None  # unsupported draft/keyword → Draft7 only
+
+    def _fast_ok(self, instance: Any) -> bool:
+        """Return True if the generated validator accepts `instance`."""
+        if self._fast is None:
+            return False
+        try:
+            self._fast(instance)
+            return True
+        except Exception:
+            return False
+
+    def is_valid(self, instance: Any) -> bool:
+        """Return True if `instance` conforms to the schema."""
+        return self._fast_ok(instance) or self._jsv.is_valid(instance)
+
+    def first_error(self, instance: Any) -> Optional["ValidationError"]:
+        """Return the error with the smallest path (None if valid), as `iter_errors` sorted by path."""
+        if self._fast_ok(instance):
+            return None
+        errs = sorted(self._jsv.iter_errors(instance), key=lambda e: e.path)
+        return errs[0] if errs else None
+
+    def validate(self, instance: Any) -> None:
+        """Raise the `best_match` ValidationError like `jsonschema.validate` (without re-checking the schema)."""
+        if self._fast_ok(instance):
+            return
+        err = best_match(self._jsv.iter_errors(instance))
+        if err is not None:
+            raise err
+
+    def validate_many(self, instances: Iterable[Any]) -> List[Optional["ValidationError"]]:
+        """Return the `first_error` (or None) for each instance, in order."""
+        return [self.first_error(x) for x in instances]
+
+
+class ValidatorCache:
+    """Thread-safe cache of `CompiledValidator` objects keyed by `(name, version)`."""
+
+    def __init__(
+        self,
+        *,
+        fast: bool = False,
+        check_schema: bool = False,
+        auto_draft: bool = False,
+        max_items: Optional[int] = None,
+    ) -> None:
+        """Create an empty cache; the flags are passed to every `CompiledValidator`.
+
+        `max_items` bounds the cache (least recently used entries are dropped);
+        None keeps every entry.
+        """
+        self.fast = fast
+        self.check_schema = check_schema
+        self.auto_draft = auto_draft
+        self.max_items = None if max_items is None else max(1, int(max_items))
+        self._lock = threading.Lock()
+        self._items: "OrderedDict[Hashable, Tuple[Any, CompiledValidator]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(
+        self, key: Hashable, schema_loader: Callable[[], Dict[str, Any]], *, token: Any = None
+    ) -> Optional[CompiledValidator]:
+        """Return the validator for `key`, compiling `schema_loader()` on first use (None without jsonschema).
+
+        An entry cached under a different `token` (e.g. an older schema file mtime)
+        is recompiled.
+        """
+        if Draft7Validator is None:
+            return None
+        with self._lock:
+            hit = self._items.get(key)
+            if hit is not None and hit[0] == token:
+                self.hits += 1
+                if self.max_items is not None:
+                    self._items.move_to_end(key)
+                return hit[1]
+        compiled = CompiledValidator(
+            schema_loader(), fast=self.fast, check_schema=self.check_schema, auto_draft=self.auto_draft
+        )
+        with self._lock:
+            self.misses += 1
+            self._items[key] = (token, compiled)
+            if self.max_items is not None:
+                self._items.move_to_end(key)
+                while len(self._items) > self.max_items:
+                    self._items.popitem(last=False)
+        return compiled
+
+    def __len__(self) -> int:
+        """Number of cached validators."""
+        return len(self._items)
+
+    def invalidate(self, predicate: Optional[Callable[[Hashable], bool]] = None) -> None:
+        """Drop every entry (or only those whose key matches `predicate`)."""
+        with self._lock:
+            if predicate is None:
+                self._items.clear()
+            else:
+                for k in [k for k in self._items if predicate(k)]:
+                    del self._items[k]
+
+
+# ---------------------------------------------------------------------------
+# Benchmark
+# ---------------------------------------------------------------------------
+
+def _ingest_schema_and_payload() -> tuple[Dict[str, Any], Dict[str, Any]]:
+    """Return the ingest message JSON schema and its documented example payload."""
+    from core.schema.ingest_schema import IngestMessage  # local: pydantic models are heavy
+
+    cfg = getattr(IngestMessage, "Config", None)
+    example = cfg.schema_extra["example"] if cfg is not None else {}
+    to_schema = getattr(IngestMessage, "model_json_schema", None) or IngestMessage.schema
+    return to_schema(), example
+
+
+def _bench(schema: Dict[str, Any], payload: Dict[str, Any], n: int) -> Dict[str, float]:
+    """Time per-call `jsonschema.validate` vs cached validator vs cached fast path (µs/payload)."""
+    import time
+
+    import jsonschema  # type: ignore
+
+    out: Dict[str, float] = {}
+    t0 = time.perf_counter()
+    for _ in range(n):
+        jsonschema.validate(instance=payload, schema=schema)
+    out["jsonschema.validate"] = (time.perf_counter() - t0) / n * 1e6
+    for label, fast in (("cached", False), ("cached_fast", True)):
+        cache = ValidatorCache(fast=fast, check_schema=True, auto_draft=True)
+        t0 = time.perf_counter()
+        for _ in range(n):
+            cache.get("bench", lambda: schema).validate(payload)
+        out[label] = (time.perf_counter() - t0) / n * 1e6
+    return out
+
+
+if __name__ == "__main__":  # pragma: no cover
+    import argparse
+    import json
+    import logging
+
+    logging.basicConfig(level=logging.INFO)
+    ap = argparse.ArgumentParser(description="Benchmark cached JSON Schema validation")
+    ap.add_argument("--n", type=int, default=20000)
+    ap.add_argument("--schema", help="JSON schema file (default: ingest message schema)")
+    ap.add_argument("--payload", help="JSON payload file (default: ingest message example)")
+    ns = ap.parse_args()
+    if ns.schema and ns.payload:
+        with open(ns.schema, "r", encoding="utf-8") as f:
+            sch = json.load(f)
+        with open(ns.payload, "r", encoding="utf-8") as f:
+            pl = json.load(f)
+    else:
+        sch, pl = _ingest_schema_and_payload()
+    res = _bench(sch, pl, ns.n)
+    base = res["jsonschema.validate"]
+    logging.info(json.dumps({k: {"us_per_payload": round(v, 2), "speedup": round(base / v, 1)} for k, v in res.items()}, indent=2))
@@ -27,6 +27,7 @@ from features.quality_control import clean_and_score
 # ⛔️ حذف وابستگی به storage.schema_registry برای رفع LAYER_VIOLATION
 from core.schema.feature_schema import FEATURE_SCHEMA, FEATURE_SCHEMA_NAME, FEATURE_SCHEMA_V
 from core.observability import Timer, observe_feature_latency
+from core.schema.validator_cache import ValidatorCache
 
 # --- local schema validator (بدون تکیه بر reports/* یا storage/*) ---
 try:
@@ -38,6 +39,8 @@ except Exception:  # pragma: no cover
 _SCHEMAS: Dict[tuple[str, str], Dict[str, Any]] = {
     (FEATURE_SCHEMA_NAME, FEATURE_SCHEMA_V): FEATURE_SCHEMA
 }
+# validatorهای کامپایل‌شده به ازای (name, version) — یک بار ساخته و بازاستفاده می‌شوند
+_VALIDATORS = ValidatorCache()
 
 
 def _ensure_schema(name: str, version: str, payload: Dict[str, Any]) -> None:
@@ -58,10 +61,8 @@ def _ensure_schema(name: str, version: str, payload: Dict[str, Any]) -> None:
     schema = _SCHEMAS.get((name, version))
     if schema is None or Draft7Validator is None:
         return
-    validator = Draft7Validator(schema)
-    errs = sorted(validator.iter_errors(payload), key=lambda e: e.path)
-    if errs:
-        e = errs[0]
+    e = _VALIDATORS.get((name, version), lambda: schema).first_error(payload)
+    if e is not None:
         path = ".".join(str(p) for p in e.path)
         raise ValueError(f"[{name} v{version}] schema failed at {path}: {e.message}")
 
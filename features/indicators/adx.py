@@ -219,8 +219,12 @@ def compute_adx(
 
     # DX
     dx = 100.0 * np.abs(pdi - mdi) / (pdi + mdi)
-    # ADX (smoothed DX)
-    adx = _smooth(dx, period, method)
+    # ADX (smoothed DX); DX is NaN during the DI warm-up, so seed from its first finite value
+    adx = np.full(dx.shape[0], np.nan, dtype=float)
+    finite = np.isfinite(dx)
+    if finite.any():
+        first = int(np.argmax(finite))
+        adx[first:] = _smooth(dx[first:], period, method)
 
     # ADXR
     result: Dict[str, Union[np.ndarray, Dict[str, Any]]] = {
@@ -1,32 +1,500 @@
 # orchestration/ws_hub.py
+"""In-process broadcast hub for WebSocket fan-out.
+
+`publish()` never awaits a client: each message is serialized once (a shared
+`Message` caching its bytes/text) and offered to every client's bounded mailbox
+synchronously; a per-client writer task drains that mailbox into the socket.
+
+- Topic coalescing: messages with a topic (by default market snapshots such as
+  klines/book tickers, see `market_topic`) replace any still-pending message
+  of the same topic (for klines: the same bar) for that client, so a lagging
+  client gets the latest snapshot instead of a backlog.
+- Messages without a topic are queued in order; a client whose mailbox holds
+  `max_pending` of them is dropped, as before.
+- `register()`/`unregister()` keep the original queue-based API for in-process
+  consumers; `attach_websocket()` serves a Starlette/FastAPI WebSocket.
+
+Benchmark (local loopback TCP clients):
+    python -m orchestration.ws_hub --clients 10000 --messages 50
+"""
 from __future__ import annotations
 import asyncio
-from typing import Any, Set
+import json
+import logging
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional
+
+try:
+    from prometheus_client import Counter, Histogram  # type: ignore
+except Exception:  # pragma: no cover
+    Counter = None  # type: ignore
+    Histogram = None  # type: ignore
+
+log = logging.getLogger("orchestration.ws_hub")
+
+_FANOUT_SECONDS = (
+    Histogram("ws_hub_fanout_seconds",
+              "Time to offer one message to every client mailbox.",
+              buckets=(0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1))
+    if Histogram else None
+)
+_MAILBOX_EVENTS = (
+    Counter("ws_hub_mailbox_events_total",
+            "Per-client mailbox outcomes (queued, coalesced, dropped client).", ["outcome"])
+    if Counter else None
+)
+
+# Streams whose events are full snapshots: only the latest one matters to a client.
+SNAPSHOT_STREAMS = frozenset({"kline", "book_ticker", "ticker", "orderbook", "signal_snapshot"})
+
+
+def market_topic(item: Any) -> Optional[str]:
+    """Default topic function: explicit `topic` key, else exchange/stream/symbol/tf for snapshot streams.
+
+    Kline topics also carry the bar's open time (`ts_event`), so only updates of
+    the same bar coalesce; a closed bar is never replaced by the next bar's update.
+    """
+    if not isinstance(item, dict):
+        return None
+    if item.get("topic"):
+        return str(item["topic"])
+    stream = item.get("stream")
+    if stream in SNAPSHOT_STREAMS:
+        topic = f"{item.get('exchange', '')}:{stream}:{item.get('symbol', '')}:{item.get('tf') or ''}"
+        if stream == "kline":
+            topic += f":{item.get('ts_event', '')}"
+        return topic
+    return None
+
+
+def _count(outcome: str, n: int = 1) -> None:
+    """Best-effort mailbox counter."""
+    if _MAILBOX_EVENTS and n:
+        try:
+            _MAILBOX_EVENTS.labels(outcome=outcome).inc(n)
+        except Exception:
+            pass
+
+
+class Message:
+    """A published item with its wire encodings computed at most once for all recipients."""
+
+    __slots__ = ("item", "topic", "ts", "_data", "_text")
+
+    def __init__(self, item: Any, topic: Optional[str]) -> None:
+        """Wrap `item` (anything JSON-serializable, or already `bytes`/`str`)."""
+        self.item = item
+        self.topic = topic
+        self.ts = time.perf_counter()
+        self._data: Optional[bytes] = item if isinstance(item, bytes) else None
+        self._text: Optional[str] = item if isinstance(item, str) else None
+
+    @property
+    def text(self) -> str:
+        """Compact JSON text (serialized on first use)."""
+        if self._text is None:
+            self._text = (self._data.decode("utf-8") if self._data is not None
+                          else json.dumps(self.item, ensure_ascii=False, separators=(",", ":"), default=str))
+        return self._text
+
+    @property
+    def data(self) -> bytes:
+        """UTF-8 JSON bytes (encoded on first use)."""
+        if self._data is None:
+            self._data = self.text.encode("utf-8")
+        return self._data
+
+
+Sender = Callable[[Message], Awaitable[Any]]
+
+
+@dataclass
+class HubStats:
+    """In-process counters mirroring the Prometheus metrics."""
+    published: int = 0
+    delivered: int = 0
+    coalesced: int = 0
+    dropped_clients: int = 0
+    send_errors: int = 0
+
+
+class _Client:
+    """One subscriber: a bounded mailbox plus the writer task that drains it."""
+
+    def __init__(self, hub: "BroadcastHub", send: Sender, max_pending: int) -> None:
+        """Create the mailbox and start the writer task."""
+        self.hub = hub
+        self.send = send
+        self.max_pending = max_pending
+        self.ordered: Deque[Message] = deque()
+        self.latest: "OrderedDict[str, Message]" = OrderedDict()
+        self.wakeup = asyncio.Event()
+        self.closed = False
+        self.queue: Optional[asyncio.Queue] = None  # set for `register()` consumers
+        self.task = asyncio.get_running_loop().create_task(self._writer())
+
+    def offer(self, msg: Message) -> str:
+        """Put `msg` into the mailbox without blocking; return "queued", "coalesced" or "overflow"."""
+        if msg.topic is not None:
+            outcome = "coalesced" if msg.topic in self.latest else "queued"
+            self.latest[msg.topic] = msg
+            self.latest.move_to_end(msg.topic)
+        elif len(self.ordered) >= self.max_pending:
+            return "overflow"
+        else:
+            self.ordered.append(msg)
+            outcome = "queued"
+        self.wakeup.set()
+        return outcome
+
+    def _next(self) -> Optional[Message]:
+        """Pop the oldest pending message (ordered queue and topic slots merged by publish time)."""
+        if self.latest:
+            topic, snap = next(iter(self.latest.items()))
+            if not self.ordered or snap.ts <= self.ordered[0].ts:
+                del self.latest[topic]
+                return snap
+        return self.ordered.popleft() if self.ordered else None
+
+    async def _writer(self) -> None:
+        """Drain the mailbox into `send` until closed; a failing send drops the client."""
+        try:
+            while not self.closed:
+                msg = self._next()
+                if msg is None:
+                    self.wakeup.clear()
+                    await self.wakeup.wait()
+                    continue
+                await self.send(msg)
+                self.hub.stats.delivered += 1
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            self.hub.stats.send_errors += 1
+            log.debug("ws client send failed, dropping: %s", e)
+        finally:
+            self.hub._discard(self)
+
+    def close(self) -> None:
+        """Stop the writer task."""
+        self.closed = True
+        if not self.task.done():
+            self.task.cancel()
+
 
 class BroadcastHub:
-    def __init__(self) -> None:
-        self._clients: Set[asyncio.Queue] = set()
+    """Fan-out hub: one serialization per message, non-blocking publish, per-client coalescing."""
+
+    def __init__(
+        self,
+        *,
+        max_pending: int = 1000,
+        topic_fn: Optional[Callable[[Any], Optional[str]]] = market_topic,
+    ) -> None:
+        """Create an empty hub.
+
+        Args:
+            max_pending: Per-client cap of queued messages without a topic.
+            topic_fn: Maps an item to its coalescing topic (None = never coalesce).
+        """
+        self.max_pending = max(1, int(max_pending))
+        self.topic_fn = topic_fn
+        self.stats = HubStats()
+        self._clients: Dict[_Client, None] = {}
+        self._queues: Dict[asyncio.Queue, _Client] = {}
         self._lock = asyncio.Lock()
 
+    # ---------- subscriptions ----------
+    def add_client(self, send: Sender, *, max_pending: Optional[int] = None) -> _Client:
+        """Subscribe a sender coroutine (called with each `Message`); must run inside the event loop."""
+        client = _Client(self, send, max_pending or self.max_pending)
+        self._clients[client] = None
+        return client
+
+    def remove_client(self, client: _Client) -> None:
+        """Unsubscribe `client` and stop its writer."""
+        client.close()
+        self._discard(client)
+
+    def _discard(self, client: _Client) -> None:
+        """Forget `client` and its `register()` queue, if any (idempotent)."""
+        self._clients.pop(client, None)
+        if client.queue is not None and self._queues.get(client.queue) is client:
+            del self._queues[client.queue]
+
     async def register(self) -> asyncio.Queue:
-        q: asyncio.Queue = asyncio.Queue(maxsize=1000)
+        """Subscribe an in-process consumer; published items arrive on the returned queue."""
+        q: asyncio.Queue = asyncio.Queue(maxsize=self.max_pending)
+
+        async def put(msg: Message) -> None:
+            """Hand the original item to the consumer queue."""
+            await q.put(msg.item)
+
         async with self._lock:
-            self._clients.add(q)
+            client = self.add_client(put)
+            client.queue = q
+            self._queues[q] = client
         return q
 
     async def unregister(self, q: asyncio.Queue) -> None:
+        """Unsubscribe a queue returned by `register()`."""
         async with self._lock:
-            self._clients.discard(q)
+            client = self._queues.pop(q, None)
+        if client is not None:
+            self.remove_client(client)
 
-    async def publish(self, item: Any) -> None:
-        async with self._lock:
-            dead = []
-            for q in self._clients:
-                try:
-                    q.put_nowait(item)
-                except asyncio.QueueFull:
-                    dead.append(q)  # کلاینتی که عقب افتاده حذف می‌شود
-            for q in dead:
-                self._clients.discard(q)
+    async def attach_websocket(self, ws: Any, *, binary: bool = False) -> None:
+        """Stream hub messages to an accepted Starlette/FastAPI WebSocket until it disconnects.
+
+        Incoming frames are read and ignored so disconnects are noticed promptly.
+        """
+        if binary:
+            async def send(msg: Message) -> None:
+                """Send the shared bytes."""
+                await ws.send_bytes(msg.data)
+        else:
+            async def send(msg: Message) -> None:
+                """Send the shared text."""
+                await ws.send_text(msg.text)
+
+        client = self.add_client(send)
+        try:
+            while not client.task.done():
+                await ws.receive()
+        except Exception:
+            pass
+        finally:
+            self.remove_client(client)
+
+    # ---------- publishing ----------
+    async def publish(self, item: Any, *, topic: Optional[str] = None) -> None:
+        """Offer `item` to every client; never waits on a client's socket."""
+        self.publish_nowait(item, topic=topic)
+
+    def publish_nowait(self, item: Any, *, topic: Optional[str] = None) -> Message:
+        """Synchronous `publish` for callers already on the event loop thread.
+
+        Args:
+            item: Payload (JSON-serializable, or pre-encoded `bytes`/`str`).
+            topic: Coalescing topic; defaults to `topic_fn(item)`.
+
+        Returns:
+            The shared `Message`.
+        """
+        t0 = time.perf_counter()
+        if topic is None and self.topic_fn is not None:
+            topic = self.topic_fn(item)
+        msg = Message(item, topic)
+        overflow: List[_Client] = []
+        coalesced = 0
+        for client in list(self._clients):
+            outcome = client.offer(msg)
+            if outcome == "coalesced":
+                coalesced += 1
+            elif outcome == "overflow":
+                overflow.append(client)
+        for client in overflow:  # lagging client without coalescible backlog is dropped
+            self.remove_client(client)
+        self.stats.published += 1
+        self.stats.coalesced += coalesced
+        self.stats.dropped_clients += len(overflow)
+        _count("coalesced", coalesced)
+        _count("dropped_client", len(overflow))
+        if _FANOUT_SECONDS:
+            try:
+                _FANOUT_SECONDS.observe(time.perf_counter() - t0)
+            except Exception:
+                pass
+        return msg
+
+    def __len__(self) -> int:
+        """Number of connected clients."""
+        return len(self._clients)
 
 hub = BroadcastHub()
+
+
+async def _bench_async(
+    n_clients: int, n_messages: int, interval_ms: float, stalled: int, pad_bytes: int, stall_timeout_s: float
+) -> Dict[str, Any]:
+    """Publish-to-receive latency over loopback TCP for the hub vs sequential per-client sends.
+
+    The first `stalled` clients stop reading (with small socket buffers), mimicking slow
+    WebSockets; the sequential baseline gives up on a blocked send after `stall_timeout_s`.
+    In the hub run they are stand-in clients whose send never completes.
+    """
+    import socket
+    import statistics
+
+    received: List[float] = []
+    sent_at: Dict[int, float] = {}
+    done = asyncio.Event()
+    expected = (n_clients - stalled) * n_messages
+
+    async def reader(r: asyncio.StreamReader) -> None:
+        """Loopback client: record latency for every newline-framed message."""
+        while True:
+            line = await r.readline()
+            if not line:
+                return
+            seq = int(line[7:line.index(b",")])  # b'{"seq":N,...'
+            received.append(time.perf_counter() - sent_at[seq])
+            if len(received) >= expected:
+                done.set()
+
+    def shrink(w: asyncio.StreamWriter) -> None:
+        """Use small kernel buffers so a client that stops reading blocks its sender quickly."""
+        sock = w.get_extra_info("socket")
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, 16384)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 16384)
+
+    writers: List[asyncio.StreamWriter] = []
+    stop = asyncio.Event()
+
+    async def on_conn(r: asyncio.StreamReader, w: asyncio.StreamWriter) -> None:
+        """Server side of one connection (kept open until the benchmark ends)."""
+        if stalled:
+            shrink(w)
+        writers.append(w)
+        await stop.wait()
+
+    server = await asyncio.start_server(on_conn, "127.0.0.1", 0, backlog=4096)
+    port = server.sockets[0].getsockname()[1]
+    readers = []
+    conns: List[Any] = []  # client writers must stay referenced or their sockets close
+    for i in range(0, n_clients, 500):
+        batch = await asyncio.gather(*(asyncio.open_connection("127.0.0.1", port) for _ in range(min(500, n_clients - i))))
+        conns.extend(batch)
+    deadline = time.perf_counter() + 30
+    while len(writers) < n_clients:
+        if time.perf_counter() > deadline:
+            raise RuntimeError(f"only {len(writers)}/{n_clients} connections accepted (file descriptor limit?)")
+        await asyncio.sleep(0.01)
+    for i, (r, w) in enumerate(conns):
+        if i < stalled:
+            shrink(w)
+            w.transport.pause_reading()
+        else:
+            readers.append(asyncio.create_task(reader(r)))
+    # server-side writers arrive in accept order; map them back to the client order by port
+    by_port = {w.get_extra_info("peername")[1]: w for w in writers}
+    writers = [by_port[w.get_extra_info("sockname")[1]] for _, w in conns]
+
+    def summary(lat: List[float], wall: float, publish: List[float]) -> Dict[str, float]:
+        """p50/p99/max delivery latency (ms), mean time the publisher is blocked per message (ms), wall time."""
+        lat = sorted(lat) or [float("nan")]
+        return {
+            "publish_ms": statistics.mean(publish) * 1000,
+            "p50_ms": statistics.median(lat) * 1000,
+            "p99_ms": lat[max(0, int(len(lat) * 0.99) - 1)] * 1000,
+            "max_ms": lat[-1] * 1000,
+            "delivered": len(received),
+            "wall_s": wall,
+        }
+
+    out: Dict[str, Any] = {"clients": n_clients, "messages": n_messages, "stalled": stalled}
+    payload = {"stream": "trade", "symbol": "BTCUSDT", "price": 1.0, "qty": 2.0, "pad": "x" * pad_bytes}
+
+    # baseline: serialize per client and await each send in turn
+    publish: List[float] = []
+    blocked = set()
+    t_start = time.perf_counter()
+    for seq in range(n_messages):
+        sent_at[seq] = time.perf_counter()
+        for w in writers:
+            if w in blocked:
+                continue
+            w.write((json.dumps({"seq": seq, **payload}) + "\n").encode())
+            try:
+                await asyncio.wait_for(w.drain(), timeout=stall_timeout_s)
+            except asyncio.TimeoutError:
+                blocked.add(w)  # old behavior would wait forever; stop sending to it instead
+        publish.append(time.perf_counter() - sent_at[seq])
+        await asyncio.sleep(interval_ms / 1000)
+    try:
+        await asyncio.wait_for(done.wait(), timeout=60)
+    except asyncio.TimeoutError:
+        pass
+    out["sequential"] = summary(received, time.perf_counter() - t_start, publish)
+
+    # drain what the stalled clients still had buffered, so both runs start clean
+    for i, (r, w) in enumerate(conns[:stalled]):
+        w.transport.resume_reading()
+        readers.append(asyncio.create_task(r.read()))
+    received.clear()
+    done.clear()
+    h = BroadcastHub(max_pending=max(1, n_messages // 2))
+
+    for w in writers[stalled:]:
+        async def send(msg: Message, w: asyncio.StreamWriter = w) -> None:
+            """Write the shared frame; await only this client's buffer."""
+            w.write(msg.data + b"\n")
+            await w.drain()
+        h.add_client(send)
+
+    async def stuck(msg: Message) -> None:
+        """A client whose socket never drains."""
+        await asyncio.Event().wait()
+
+    for _ in range(stalled):
+        h.add_client(stuck)
+    publish.clear()
+    t_start = time.perf_counter()
+    for seq in range(n_messages):
+        sent_at[seq] = time.perf_counter()
+        await h.publish({"seq": seq, **payload})
+        publish.append(time.perf_counter() - sent_at[seq])
+        await asyncio.sleep(interval_ms / 1000)
+    await asyncio.wait_for(done.wait(), timeout=300)
+    out["hub"] = summary(received, time.perf_counter() - t_start, publish)
+    out["hub"]["dropped_clients"] = h.stats.dropped_clients
+
+    stop.set()
+    for c in list(h._clients):
+        h.remove_client(c)
+    for w in writers:
+        w.close()
+    for t in readers:
+        t.cancel()
+    for _, w in conns:
+        w.close()
+    server.close()
+    return out
+
+
+def _bench(
+    n_clients: int = 10000,
+    n_messages: int = 50,
+    interval_ms: float = 5.0,
+    stalled: int = 0,
+    pad_bytes: int = 0,
+    stall_timeout_s: float = 1.0,
+) -> Dict[str, Any]:
+    """Run `_bench_async` in a fresh event loop (needs ~2 file descriptors per client)."""
+    try:
+        import resource
+
+        soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+        want = 2 * n_clients + 256
+        if soft != resource.RLIM_INFINITY and soft < want:
+            resource.setrlimit(resource.RLIMIT_NOFILE, (want if hard == resource.RLIM_INFINITY else min(want, hard), hard))
+    except Exception:  # pragma: no cover - non-POSIX
+        pass
+    return asyncio.run(_bench_async(n_clients, n_messages, interval_ms, stalled, pad_bytes, stall_timeout_s))
+
+
+if __name__ == "__main__":  # pragma: no cover
+    import argparse
+
+    logging.basicConfig(level=logging.INFO)
+    ap = argparse.ArgumentParser(description="Benchmark WebSocket hub fan-out over loopback")
+    ap.add_argument("--clients", type=int, default=10000)
+    ap.add_argument("--messages", type=int, default=50)
+    ap.add_argument("--interval-ms", type=float, default=5.0)
+    ap.add_argument("--stalled", type=int, default=0, help="clients that stop reading")
+    ap.add_argument("--pad-bytes", type=int, default=0, help="extra payload size per message")
+    ap.add_argument("--stall-timeout", type=float, default=1.0)
+    ns = ap.parse_args()
+    log.info(json.dumps(_bench(ns.clients, ns.messages, ns.interval_ms, ns.stalled, ns.pad_bytes, ns.stall_timeout), indent=2))
@@ -2,9 +2,27 @@
 
 If `sentence_transformers` is available, uses the "all-MiniLM-L6-v2" model.
 Otherwise falls back to a simple hash-seeded NumPy vector to keep code runnable.
+
+Embeddings are cached by content hash (model name + text):
+- an in-memory LRU tier (`EMBED_CACHE_SIZE` entries);
+- an optional SQLite tier (`EMBED_CACHE_PATH`) shared across processes.
+
+Cache misses from concurrent `embed_texts` calls are coalesced by a background
+batcher into one `encode` call (`EMBED_BATCH_SIZE`, `EMBED_MAX_WAIT_MS`).
+The hash fallback is computed exactly as before; its vectors depend on the
+process's `hash()` seed, so they only reach the disk tier when
+`PYTHONHASHSEED` is fixed.
 """  # :contentReference[oaicite:0]{index=0}
 
-from typing import List
+import hashlib
+import os
+import queue
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Dict, List, Optional, Tuple
 
 try:
     # Optional: if installed
@@ -14,12 +32,337 @@ except Exception:
     _model = None
 import numpy as np
 
+try:
+    from prometheus_client import Counter, Histogram  # type: ignore
+except Exception:  # pragma: no cover
+    Counter = None  # type: ignore
+    Histogram = None  # type: ignore
+
+_CACHE_LOOKUPS = (
+    Counter("embeddings_cache_lookups_total", "Embedding cache lookups by tier and result.", ["tier", "result"])
+    if Counter else None
+)
+_BATCH_TEXTS = (
+    Histogram("embeddings_batch_texts", "Texts per model encode call.",
+              buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256, 512))
+    if Histogram else None
+)
+
+_MODEL_NAME = "all-MiniLM-L6-v2"
+
+
+def model_name() -> str:
+    """Identify the active embedder; cache keys (here and in callers) include it.
+
+    Returns:
+        The model name, or "hash-fallback" plus the hash seed when it is fixed.
+    """
+    if _model:
+        return _MODEL_NAME
+    seed = os.getenv("PYTHONHASHSEED", "random")
+    return "hash-fallback" if seed == "random" else f"hash-fallback:seed={seed}"
+
+
+def disk_cacheable() -> bool:
+    """Whether vectors from the active embedder are reproducible across processes."""
+    return bool(_model) or os.getenv("PYTHONHASHSEED", "random") != "random"
+
+
+def _hash_embed(t: str) -> List[float]:
+    """Hash-based fallback embedding for a single text string.
+
+    Args:
+        t: Input text.
+
+    Returns:
+        A 384-dimensional list of floats representing the pseudo-embedding.
+    """  # :contentReference[oaicite:2]{index=2}
+    np.random.seed(abs(hash(t)) % (2**32))
+    return np.random.normal(size=(384,)).tolist()
+
+
+class _DiskCache:
+    """SQLite key -> vector store (float32/float64 blobs), safe for concurrent processes."""
+
+    def __init__(self, path: str) -> None:
+        """Open (creating if needed) the cache database at `path`.
+
+        Args:
+            path: SQLite file path.
+        """
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=5.0)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS emb (k TEXT PRIMARY KEY, dtype TEXT NOT NULL, v BLOB NOT NULL)"
+            )
+            self._conn.commit()
+
+    def get_many(self, keys: List[str]) -> Dict[str, np.ndarray]:
+        """Return the stored vectors for whichever `keys` exist.
+
+        Args:
+            keys: Content-hash keys.
+
+        Returns:
+            Mapping of found key to vector.
+        """
+        out: Dict[str, np.ndarray] = {}
+        with self._lock:
+            for i in range(0, len(keys), 500):
+                chunk = keys[i:i + 500]
+                rows = self._conn.execute(
+                    f"SELECT k, dtype, v FROM emb WHERE k IN ({','.join('?' * len(chunk))})", chunk
+                ).fetchall()
+                for k, dt, v in rows:
+                    out[k] = np.frombuffer(v, dtype=dt)
+        return out
+
+    def put_many(self, items: Dict[str, np.ndarray]) -> None:
+        """Insert or replace vectors.
+
+        Args:
+            items: Mapping of key to vector.
+        """
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO emb (k, dtype, v) VALUES (?, ?, ?)",
+                [(k, v.dtype.str, v.tobytes()) for k, v in items.items()],
+            )
+            self._conn.commit()
+
+
+class _Batcher:
+    """Background thread that coalesces concurrent cache misses into one `encode` call."""
+
+    def __init__(self, batch_size: int, max_wait_ms: float) -> None:
+        """Start the batching thread.
+
+        Args:
+            batch_size: Model batch size and the cap on texts per coalesced call.
+            max_wait_ms: How long the first request waits for others to join.
+        """
+        self.batch_size = max(1, int(batch_size))
+        self.max_wait_s = max(0.0, float(max_wait_ms)) / 1000.0
+        self._q: "queue.Queue[Tuple[List[str], Future, float]]" = queue.Queue()
+        threading.Thread(target=self._loop, name="embed-batcher", daemon=True).start()
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        """Encode `texts` as part of whatever batch is being collected.
+
+        Args:
+            texts: Texts to encode.
+
+        Returns:
+            A (len(texts), dim) array from the model.
+        """
+        fut: Future = Future()
+        self._q.put((texts, fut, time.perf_counter()))
+        return fut.result()
+
+    def _loop(self) -> None:
+        """Collect requests until `batch_size` texts or the first request's deadline, then encode once."""
+        while True:
+            first = self._q.get()
+            batch = [first]
+            n = len(first[0])
+            deadline = first[2] + self.max_wait_s
+            while n < self.batch_size:
+                remaining = deadline - time.perf_counter()
+                try:
+                    item = self._q.get(timeout=remaining) if remaining > 0 else self._q.get_nowait()
+                except queue.Empty:
+                    break
+                batch.append(item)
+                n += len(item[0])
+            # callers missing the same text share one encoding
+            pos: Dict[str, int] = {}
+            for texts, _, _ in batch:
+                for t in texts:
+                    pos.setdefault(t, len(pos))
+            if _BATCH_TEXTS:
+                try:
+                    _BATCH_TEXTS.observe(len(pos))
+                except Exception:
+                    pass
+            try:
+                vecs = np.asarray(_model.encode(list(pos), batch_size=self.batch_size, convert_to_numpy=True))
+            except Exception as e:
+                for _, fut, _ in batch:
+                    fut.set_exception(e)
+                continue
+            for texts, fut, _ in batch:
+                fut.set_result(vecs[[pos[t] for t in texts]])
+
+
+class EmbeddingCache:
+    """Two-tier (memory LRU + optional SQLite) content-hash keyed embedding cache with hit counters."""
+
+    def __init__(self, lru_size: int = 10_000, path: Optional[str] = None) -> None:
+        """Create the cache.
+
+        Args:
+            lru_size: Maximum in-memory entries (0 disables the memory tier).
+            path: SQLite file for the disk tier (None disables it).
+        """
+        self.lru_size = max(0, int(lru_size))
+        self._mem: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.path = path
+        self._disk = _DiskCache(path) if path else None
+        self.stats: Dict[str, int] = {"memory_hit": 0, "disk_hit": 0, "miss": 0}
+
+    @staticmethod
+    def key(text: str, model: str) -> str:
+        """Content-hash key for `text` under `model`.
+
+        Args:
+            text: Input text.
+            model: Embedder identifier.
+
+        Returns:
+            Hex digest.
+        """
+        return hashlib.sha256(f"{model}\x00{text}".encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def _count(tier: str, result: str, n: int) -> None:
+        """Best-effort Prometheus lookup counter."""
+        if not n:
+            return
+        if _CACHE_LOOKUPS:
+            try:
+                _CACHE_LOOKUPS.labels(tier=tier, result=result).inc(n)
+            except Exception:
+                pass
+
+    def get_many(self, keys: List[str], use_disk: bool) -> Dict[str, np.ndarray]:
+        """Look `keys` up in memory, then on disk (promoting disk hits to memory).
+
+        Args:
+            keys: Distinct content-hash keys.
+            use_disk: Whether the disk tier may be consulted.
+
+        Returns:
+            Mapping of found key to vector.
+        """
+        found: Dict[str, np.ndarray] = {}
+        with self._lock:
+            for k in keys:
+                v = self._mem.get(k)
+                if v is not None:
+                    self._mem.move_to_end(k)
+                    found[k] = v
+        self.stats["memory_hit"] += len(found)
+        self._count("memory", "hit", len(found))
+        self._count("memory", "miss", len(keys) - len(found))
+        rest = [k for k in keys if k not in found]
+        if rest and use_disk and self._disk is not None:
+            got = self._disk.get_many(rest)
+            self.stats["disk_hit"] += len(got)
+            self._count("disk", "hit", len(got))
+            self._count("disk", "miss", len(rest) - len(got))
+            self._put_mem(got)
+            found.update(got)
+        self.stats["miss"] += len(keys) - len(found)
+        return found
+
+    def put_many(self, items: Dict[str, np.ndarray], use_disk: bool) -> None:
+        """Store freshly computed vectors in memory (and on disk if allowed).
+
+        Args:
+            items: Mapping of key to vector.
+            use_disk: Whether to write through to the disk tier.
+        """
+        self._put_mem(items)
+        if use_disk and self._disk is not None and items:
+            self._disk.put_many(items)
+
+    def _put_mem(self, items: Dict[str, np.ndarray]) -> None:
+        """Insert into the LRU, evicting the least recently used entries."""
+        if not self.lru_size:
+            return
+        with self._lock:
+            for k, v in items.items():
+                v.setflags(write=False)
+                self._mem[k] = v
+                self._mem.move_to_end(k)
+            while len(self._mem) > self.lru_size:
+                self._mem.popitem(last=False)
+
+    def hit_rate(self) -> float:
+        """Fraction of looked-up texts served from either tier.
+
+        Returns:
+            Hit rate in [0, 1] (0 before any lookup).
+        """
+        hits = self.stats["memory_hit"] + self.stats["disk_hit"]
+        total = hits + self.stats["miss"]
+        return hits / total if total else 0.0
+
+
+_cache = EmbeddingCache(int(os.getenv("EMBED_CACHE_SIZE", "10000")), os.getenv("EMBED_CACHE_PATH") or None)
+_batch_size = int(os.getenv("EMBED_BATCH_SIZE", "64"))
+_max_wait_ms = float(os.getenv("EMBED_MAX_WAIT_MS", "2"))
+_batcher: Optional[_Batcher] = None
+_batcher_lock = threading.Lock()
+
+
+def configure(
+    lru_size: Optional[int] = None,
+    cache_path: Optional[str] = None,
+    batch_size: Optional[int] = None,
+    max_wait_ms: Optional[float] = None,
+) -> None:
+    """Override the env-derived cache/batching settings (replaces the cache when its settings change).
+
+    Args:
+        lru_size: In-memory cache entries.
+        cache_path: SQLite file for the disk tier ("" disables it).
+        batch_size: Model batch size / coalescing cap.
+        max_wait_ms: Coalescing window for concurrent calls.
+    """
+    global _cache, _batch_size, _max_wait_ms, _batcher
+    if lru_size is not None or cache_path is not None:
+        path = cache_path if cache_path is not None else _cache.path
+        _cache = EmbeddingCache(_cache.lru_size if lru_size is None else lru_size, path or None)
+    with _batcher_lock:
+        if batch_size is not None:
+            _batch_size = int(batch_size)
+            _batcher = None
+        if max_wait_ms is not None:
+            _max_wait_ms = float(max_wait_ms)
+            _batcher = None
+
+
+def cache_stats() -> Dict[str, float]:
+    """Return cache counters and the overall hit rate.
+
+    Returns:
+        Dict with memory_hit, disk_hit, miss and hit_rate.
+    """
+    return {**_cache.stats, "hit_rate": _cache.hit_rate()}
+
+
+def _encode_model(texts: List[str]) -> np.ndarray:
+    """Encode with the SentenceTransformer model via the shared batcher."""
+    global _batcher
+    if _batcher is None:
+        with _batcher_lock:
+            if _batcher is None:
+                _batcher = _Batcher(_batch_size, _max_wait_ms)
+    return _batcher.encode(texts)
+
 
 def embed_texts(texts: List[str]) -> List[List[float]]:
     """Embed a list of texts into dense vectors.
 
     Uses a SentenceTransformer model when available; otherwise, generates
-    a fixed-size numeric vector per text via a hash-based fallback.
+    a fixed-size numeric vector per text via a hash-based fallback. Cached
+    vectors are returned without re-encoding; misses from concurrent callers
+    are encoded together.
 
     Args:
         texts: List of input strings.
@@ -27,18 +370,24 @@ def embed_texts(texts: List[str]) -> List[List[float]]:
     Returns:
         List of embedding vectors (each a list of floats).
     """  # :contentReference[oaicite:1]{index=1}
-    if _model:
-        return _model.encode(texts, convert_to_numpy=True).tolist()
-    # Fallback deterministic hash embedding (not good, but keeps code runnable)
-    def h(t: str) -> List[float]:
-        """Hash-based fallback embedding for a single text string.
-
-        Args:
-            t: Input text.
-
-        Returns:
-            A 384-dimensional list of floats representing the pseudo-embedding.
-        """  # :contentReference[oaicite:2]{index=2}
-        np.random.seed(abs(hash(t)) % (2**32))
-        return np.random.normal(size=(384,)).tolist()
-    return [h(t) for t in texts]
+    if not texts:
+        return []
+    name = model_name()
+    use_disk = disk_cacheable()
+    cache = _cache
+    keys = [EmbeddingCache.key(t, name) for t in texts]
+    uniq = list(dict.fromkeys(keys))
+    found = cache.get_many(uniq, use_disk)
+    missing = [k for k in uniq if k not in found]
+    if missing:
+        by_key = dict(zip(keys, texts))
+        miss_texts = [by_key[k] for k in missing]
+        if _model:
+            vecs = list(_encode_model(miss_texts))
+        else:
+            # Fallback deterministic hash embedding (not good, but keeps code runnable)
+            vecs = [np.asarray(_hash_embed(t)) for t in miss_texts]
+        new = dict(zip(missing, vecs))
+        cache.put_many(new, use_disk)
+        found.update(new)
+    return [found[k].tolist() for k in keys]
@@ -2,28 +2,219 @@
 
 Uses `confluent_kafka.Producer` when available; otherwise logs events so that
 code paths remain runnable in dev/test without a Kafka broker.
+
+`EventBus.publish` is synchronous (produce + flush per event). Request paths
+should prefer `publish_async`/`apublish`: events are queued, a background
+thread sends them in batches (`batch_size` events or `linger_ms` after the
+first one, whichever comes first) with one flush per batch, and each caller
+gets a delivery future. `close()` (also run at interpreter exit) flushes what
+is still queued.
+
+Transports: `KafkaTransport`, `LoggingTransport` (no producer) and
+`InMemoryTransport` for tests.
 """  # :contentReference[oaicite:0]{index=0}
 
 from .config import get_settings
-from typing import Any
+from typing import Any, Dict, List, Optional, Tuple, Union
 import json, logging
+import asyncio
+import atexit
+import queue
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from dataclasses import dataclass
+
+try:
+    from prometheus_client import Counter, Gauge, Histogram  # type: ignore
+except Exception:  # pragma: no cover
+    Counter = None  # type: ignore
+    Gauge = None  # type: ignore
+    Histogram = None  # type: ignore
 
 log = logging.getLogger(__name__)
 
+_QUEUE_DEPTH = (
+    Gauge("events_queue_depth", "Events waiting for the async publisher.")
+    if Gauge else None
+)
+_PUBLISH_SECONDS = (
+    Histogram("events_publish_latency_seconds",
+              "Enqueue-to-delivery latency of async publishes.",
+              buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5))
+    if Histogram else None
+)
+_PUBLISHED = (
+    Counter("events_published_total", "Async publishes by outcome.", ["outcome"])
+    if Counter else None
+)
+
+Record = Tuple[str, str, bytes]  # (topic, key, value)
+SendResult = Union[Tuple[int, int], Exception]  # (partition, offset) or the delivery error
+
+
+@dataclass
+class DeliveryReport:
+    """Outcome of a delivered event."""
+    topic: str
+    key: str
+    partition: int
+    offset: int
+    latency_s: float
+
+
+@dataclass
+class BusStats:
+    """In-process counters mirroring the Prometheus metrics."""
+    enqueued: int = 0
+    delivered: int = 0
+    failed: int = 0
+    batches: int = 0
+    max_batch: int = 0
+
+
+class KafkaTransport:
+    """Sends batches through a `confluent_kafka.Producer` with one flush per batch."""
+
+    def __init__(self, producer: Any, flush_timeout_s: float = 10.0) -> None:
+        """Wrap an existing producer."""
+        self.producer = producer
+        self.flush_timeout_s = flush_timeout_s
+
+    def send_batch(self, records: List[Record]) -> List[SendResult]:
+        """Produce every record, flush once, and return one result per record."""
+        results: List[Optional[SendResult]] = [None] * len(records)
+
+        def on_delivery(i: int) -> Any:
+            """Delivery callback storing the outcome of record `i`."""
+            def cb(err: Any, msg: Any) -> None:
+                """Record the broker's answer."""
+                results[i] = RuntimeError(str(err)) if err is not None else (msg.partition(), msg.offset())
+            return cb
+
+        for i, (topic, key, value) in enumerate(records):
+            while True:
+                try:
+                    self.producer.produce(topic, key=key, value=value, on_delivery=on_delivery(i))
+                    break
+                except BufferError:
+                    self.producer.poll(0.05)  # local queue full: serve callbacks, retry
+                except Exception as e:
+                    results[i] = e
+                    break
+        self.producer.flush(self.flush_timeout_s)
+        return [r if r is not None else TimeoutError("delivery not confirmed before flush timeout") for r in results]
 
-class EventBus:
-    """Thin Kafka publisher with safe no-op fallback."""
+
+class LoggingTransport:
+    """Fallback without a producer: logs each event (debug) and reports it delivered."""
 
     def __init__(self) -> None:
-        """Initialize producer from settings; fall back to logging if unavailable."""
-        s = get_settings()
-        self.kafka_bootstrap = s.KAFKA_BOOTSTRAP
-        # Lazy import to avoid hard dependency if not used
-        try:
-            from confluent_kafka import Producer  # type: ignore
-            self._producer = Producer({'bootstrap.servers': self.kafka_bootstrap})
-        except Exception:
-            self._producer = None
+        """Start offsets at zero."""
+        self._offset = 0
+
+    def send_batch(self, records: List[Record]) -> List[SendResult]:
+        """Log the records."""
+        out: List[SendResult] = []
+        for topic, key, value in records:
+            log.debug("PUBLISH topic=%s key=%s value=%s", topic, key, value.decode("utf-8", "replace"))
+            out.append((0, self._offset))
+            self._offset += 1
+        return out
+
+
+class InMemoryTransport:
+    """Test transport keeping every delivered event in memory.
+
+    Attributes:
+        messages: Delivered (topic, key, decoded value) tuples in send order.
+        batch_sizes: Size of every batch sent.
+        latency_s: Simulated broker round-trip per batch.
+        fail: If set, every record of the next batches fails with this exception.
+    """
+
+    def __init__(self, latency_s: float = 0.0) -> None:
+        """Create an empty transport."""
+        self.messages: List[Tuple[str, str, Any]] = []
+        self.batch_sizes: List[int] = []
+        self.latency_s = latency_s
+        self.fail: Optional[Exception] = None
+        self._offsets: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def send_batch(self, records: List[Record]) -> List[SendResult]:
+        """Store the records (or fail them all if `fail` is set)."""
+        if self.latency_s:
+            time.sleep(self.latency_s)
+        with self._lock:
+            self.batch_sizes.append(len(records))
+            if self.fail is not None:
+                return [self.fail for _ in records]
+            out: List[SendResult] = []
+            for topic, key, value in records:
+                off = self._offsets.get(topic, 0)
+                self._offsets[topic] = off + 1
+                self.messages.append((topic, key, json.loads(value)))
+                out.append((0, off))
+            return out
+
+
+@dataclass
+class _Pending:
+    """One queued event."""
+    record: Record
+    future: Future
+    t_enq: float
+
+
+_STOP = object()
+
+
+class EventBus:
+    """Thin Kafka publisher with safe no-op fallback and an async batched path."""
+
+    def __init__(
+        self,
+        transport: Optional[Any] = None,
+        *,
+        batch_size: int = 500,
+        linger_ms: float = 5.0,
+        max_queue: int = 100_000,
+        enqueue_timeout_s: float = 0.0,
+    ) -> None:
+        """Initialize producer from settings; fall back to logging if unavailable.
+
+        Args:
+            transport: Object with `send_batch(records)`; by default Kafka from settings
+                (or `LoggingTransport` when confluent_kafka is unavailable).
+            batch_size: Maximum events per batch of the async path.
+            linger_ms: How long the first event of a batch waits for company.
+            max_queue: Maximum queued async events.
+            enqueue_timeout_s: How long `publish_async` waits for room in a full queue
+                before failing the future with BufferError.
+        """
+        self._producer = None
+        if transport is None:
+            s = get_settings()
+            self.kafka_bootstrap = s.KAFKA_BOOTSTRAP
+            # Lazy import to avoid hard dependency if not used
+            try:
+                from confluent_kafka import Producer  # type: ignore
+                self._producer = Producer({'bootstrap.servers': self.kafka_bootstrap})
+            except Exception:
+                self._producer = None
+            transport = KafkaTransport(self._producer) if self._producer else LoggingTransport()
+        self.transport = transport
+        self.batch_size = max(1, int(batch_size))
+        self.linger_s = max(0.0, float(linger_ms)) / 1000.0
+        self.enqueue_timeout_s = enqueue_timeout_s
+        self.stats = BusStats()
+        self._q: "queue.Queue[Any]" = queue.Queue(maxsize=max(1, int(max_queue)))
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self._closed = False
+        # Guards `_closed` + enqueue so nothing can be queued behind the stop marker.
+        self._lock = threading.Lock()
 
     def publish(self, topic: str, key: str, value: dict[str, Any]) -> None:
         """Publish a message to Kafka or log it if producer is unavailable.
@@ -37,7 +228,234 @@ class EventBus:
         if self._producer:
             self._producer.produce(topic, key=key, value=payload)
             self._producer.flush()
+        elif not isinstance(self.transport, LoggingTransport):
+            res = self.transport.send_batch([(topic, key, payload)])[0]
+            if isinstance(res, Exception):
+                raise res
         log.info(f"PUBLISH topic={topic} key={key} value={value}")
 
+    # ---------- async path ----------
+    def publish_async(self, topic: str, key: str, value: dict[str, Any]) -> Future:
+        """Queue an event for batched delivery and return a Future of its `DeliveryReport`.
+
+        Serialization happens here, so a non-serializable value raises immediately.
+
+        Raises:
+            RuntimeError: If the bus is closed.
+        """
+        if self._closed:
+            raise RuntimeError("EventBus is closed")
+        payload = json.dumps(value).encode("utf-8")
+        fut: Future = Future()
+        item = _Pending((topic, key, payload), fut, time.perf_counter())
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("EventBus is closed")
+            self._ensure_worker()
+            try:
+                if self.enqueue_timeout_s > 0:
+                    self._q.put(item, timeout=self.enqueue_timeout_s)
+                else:
+                    self._q.put_nowait(item)
+            except queue.Full:
+                fut.set_exception(BufferError("event queue full"))
+                self._count("queue_full")
+                return fut
+        self.stats.enqueued += 1
+        self._set_depth()
+        return fut
+
+    async def apublish(self, topic: str, key: str, value: dict[str, Any]) -> DeliveryReport:
+        """Awaitable `publish_async`."""
+        return await asyncio.wrap_future(self.publish_async(topic, key, value))
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until every event queued so far is delivered or failed; False on timeout.
+
+        Returns at once after `close()` (which already delivered the queue), and
+        stops waiting if the background thread exits before reaching the marker.
+        """
+        t = self._thread
+        if t is None or self._closed:
+            return True
+        if not t.is_alive():
+            return False
+        marker: Future = Future()
+        with self._lock:
+            if self._closed:
+                return True
+            self._q.put(marker)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            wait_s = 0.1 if deadline is None else min(0.1, deadline - time.monotonic())
+            try:
+                marker.result(timeout=max(0.0, wait_s))
+                return True
+            except FutureTimeout:
+                pass
+            except Exception:
+                return False
+            if not t.is_alive():  # stopped by a concurrent close(); it drained everything ahead of us
+                return self._closed
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+
+    def close(self, timeout: Optional[float] = 10.0) -> None:
+        """Deliver everything still queued, then stop the background thread."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            t = self._thread
+            if t is not None:
+                self._q.put(_STOP)
+        if t is not None:
+            t.join(timeout=timeout)
+
+    def _ensure_worker(self) -> None:
+        """Start the batching thread on first use (and flush it at interpreter exit)."""
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is None:
+                t = threading.Thread(target=self._loop, name="event-bus", daemon=True)
+                t.start()
+                self._thread = t
+                atexit.register(self.close)
+
+    def _loop(self) -> None:
+        """Thread body: collect a batch by size/linger, send it, repeat until stopped."""
+        while True:
+            item = self._q.get()
+            if item is _STOP:
+                self._drain()
+                return
+            if isinstance(item, Future):  # flush marker with nothing ahead of it
+                item.set_result(True)
+                continue
+            batch, markers, stop = self._collect(item)
+            self._send(batch)
+            for m in markers:
+                m.set_result(True)
+            if stop:
+                self._drain()
+                return
+
+    def _collect(self, first: _Pending) -> Tuple[List[_Pending], List[Future], bool]:
+        """Gather events until `batch_size` or the first event's linger deadline; return (batch, flush markers, stop_seen)."""
+        batch = [first]
+        markers: List[Future] = []
+        deadline = first.t_enq + self.linger_s
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                item = self._q.get(timeout=remaining) if remaining > 0 else self._q.get_nowait()
+            except queue.Empty:
+                break
+            if item is _STOP:
+                return batch, markers, True
+            if isinstance(item, Future):
+                markers.append(item)
+                break  # a flush should not wait for the linger deadline
+            batch.append(item)
+        return batch, markers, False
+
+    def _drain(self) -> None:
+        """Send whatever is still queued once the stop marker was consumed, in batches.
+
+        `close()` enqueues the marker under the same lock as `publish_async()`, so
+        every accepted event is ahead of it; this only guards against leaks.
+        """
+        pending: List[_Pending] = []
+        while True:
+            try:
+                item = self._q.get_nowait()
+            except queue.Empty:
+                break
+            if isinstance(item, _Pending):
+                pending.append(item)
+            elif isinstance(item, Future):
+                item.set_result(True)
+        for i in range(0, len(pending), self.batch_size):
+            self._send(pending[i:i + self.batch_size])
+
+    def _send(self, batch: List[_Pending]) -> None:
+        """Send one batch through the transport and resolve its futures."""
+        self._set_depth()
+        self.stats.batches += 1
+        self.stats.max_batch = max(self.stats.max_batch, len(batch))
+        try:
+            results = self.transport.send_batch([p.record for p in batch])
+        except Exception as e:
+            results = [e] * len(batch)
+        now = time.perf_counter()
+        for p, res in zip(batch, results):
+            if isinstance(res, Exception):
+                self.stats.failed += 1
+                self._count("error")
+                p.future.set_exception(res)
+                continue
+            latency = now - p.t_enq
+            self.stats.delivered += 1
+            self._count("ok")
+            if _PUBLISH_SECONDS:
+                try:
+                    _PUBLISH_SECONDS.observe(latency)
+                except Exception:
+                    pass
+            p.future.set_result(DeliveryReport(p.record[0], p.record[1], res[0], res[1], latency))
+
+    def _set_depth(self) -> None:
+        """Best-effort queue depth gauge."""
+        if _QUEUE_DEPTH:
+            try:
+                _QUEUE_DEPTH.set(self._q.qsize())
+            except Exception:
+                pass
+
+    @staticmethod
+    def _count(outcome: str) -> None:
+        """Best-effort publish counter."""
+        if _PUBLISHED:
+            try:
+                _PUBLISHED.labels(outcome=outcome).inc()
+            except Exception:
+                pass
+
 
 bus = EventBus()
+
+
+def _bench(n_events: int = 5000, rtt_ms: float = 2.0) -> Dict[str, float]:
+    """Events/sec of synchronous `publish` vs `publish_async` against a transport with a fixed round-trip."""
+    out: Dict[str, float] = {}
+    sync_n = max(1, n_events // 20)  # the sync path is slow; time a slice of it
+    bus_ = EventBus(InMemoryTransport(latency_s=rtt_ms / 1000.0))
+    logging.getLogger(__name__).setLevel(logging.WARNING)
+    t0 = time.perf_counter()
+    for i in range(sync_n):
+        bus_.publish("bench", str(i), {"i": i})
+    out["sync_events_per_s"] = sync_n / (time.perf_counter() - t0)
+    bus_ = EventBus(InMemoryTransport(latency_s=rtt_ms / 1000.0))
+    t0 = time.perf_counter()
+    futs = [bus_.publish_async("bench", str(i), {"i": i}) for i in range(n_events)]
+    out["async_enqueue_us"] = (time.perf_counter() - t0) / n_events * 1e6
+    lat = [f.result().latency_s for f in futs]
+    out["async_events_per_s"] = n_events / (time.perf_counter() - t0)
+    out["async_mean_latency_ms"] = sum(lat) / len(lat) * 1000
+    out["async_mean_batch"] = bus_.stats.delivered / max(bus_.stats.batches, 1)
+    bus_.close()
+    return out
+
+
+if __name__ == "__main__":  # pragma: no cover
+    import argparse
+
+    logging.basicConfig(level=logging.INFO)
+    ap = argparse.ArgumentParser(description="Benchmark sync vs batched async event publishing")
+    ap.add_argument("--events", type=int, default=5000)
+    ap.add_argument("--rtt-ms", type=float, default=2.0)
+    ns = ap.parse_args()
+    res = _bench(ns.events, ns.rtt_ms)
+    logging.getLogger(__name__).setLevel(logging.INFO)
+    log.info(json.dumps(res, indent=2))
@@ -5,17 +5,32 @@ This module provides:
 - A dataclass `LLMGeneratorConfig` for runtime configuration.
 - An `LLMGenerator` class that builds a schema-constrained prompt, calls an LLM (or a mock),
   extracts JSON safely, validates/repairs it against a JSON Schema, and localizes output.
+- Report caches (`MemoryReportCache`, optional `RedisReportCache`) keyed by a stable hash of
+  the prompt inputs and the output-affecting config, so identical signals skip the model call.
+- `LLMGenerator.generate_batch`, which deduplicates identical inputs and runs the remaining
+  model calls concurrently under a bounded worker pool.
+
+The schema, its prompt rendering and its compiled validator are built once per generator.
+
+Benchmark:
+    python -m reports.llm_generator --signals 200 --unique 50 --latency-ms 20
 
 Note: Structure and behavior preserved; only documentation/type-hints added to satisfy linters.
 """
 
 from __future__ import annotations
+import copy
 import json
+import logging
 import re
 import hashlib
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 import pandas as pd
 from dataclasses import dataclass, field, asdict  # noqa: F401 (asdict/field may be used by consumers)
-from typing import Any, Callable, Dict, List, Optional
+from typing import Any, Callable, Dict, List, Optional, Protocol, Sequence, Tuple
 from localization import localize_payload, bidi_wrap  # noqa: F401 (bidi_wrap exported for downstream usage)
 
 # --- Schema validation (jsonschema) ---
@@ -31,6 +46,29 @@ except Exception:  # pragma: no cover
 
     _HAS_JSONSCHEMA = False
 
+try:  # pragma: no cover
+    from core.schema.validator_cache import CompiledValidator  # type: ignore
+except Exception:  # pragma: no cover
+    CompiledValidator = None  # type: ignore
+
+try:  # pragma: no cover
+    import redis  # type: ignore
+except Exception:  # pragma: no cover
+    redis = None  # type: ignore
+
+try:
+    from prometheus_client import Counter  # type: ignore
+except Exception:  # pragma: no cover
+    Counter = None  # type: ignore
+
+log = logging.getLogger("reports.llm_generator")
+
+_CACHE_LOOKUPS = (
+    Counter("llm_generator_cache_lookups_total",
+            "Report cache lookups by outcome.", ["outcome"])
+    if Counter else None
+)
+
 JsonObj = Dict[str, Any]
 LLMCallable = Callable[[str], str]
 
@@ -45,6 +83,112 @@ def _stable_hash(obj: Any) -> str:
     return hashlib.sha256(s.encode("utf-8")).hexdigest()[:16]
 
 
+def _count_lookup(outcome: str, n: int = 1) -> None:
+    """Best-effort cache lookup counter."""
+    if _CACHE_LOOKUPS:
+        try:
+            _CACHE_LOOKUPS.labels(outcome=outcome).inc(n)
+        except Exception:
+            pass
+
+
+class ReportCache(Protocol):
+    """Minimal interface for report caches (values are JSON-serializable dicts)."""
+
+    def get(self, key: str) -> Optional[JsonObj]:
+        """Return a private copy of the cached report, or None on miss/expiry."""
+        ...
+
+    def set(self, key: str, value: JsonObj) -> None:
+        """Store `value` under `key`."""
+        ...
+
+
+class MemoryReportCache:
+    """Thread-safe in-process LRU cache with a per-entry TTL."""
+
+    def __init__(self, ttl_s: float = 300.0, max_items: int = 1024) -> None:
+        """Create an empty cache.
+
+        Args:
+            ttl_s: Seconds an entry stays valid.
+            max_items: Maximum entries kept; the least recently used is evicted first.
+        """
+        self.ttl_s = float(ttl_s)
+        self.max_items = max(1, int(max_items))
+        self._items: "OrderedDict[str, Tuple[float, JsonObj]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[JsonObj]:
+        """Return a deep copy of the entry for `key` (None if absent or expired)."""
+        now = time.monotonic()
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                return None
+            if item[0] <= now:
+                del self._items[key]
+                return None
+            self._items.move_to_end(key)
+            value = item[1]
+        return copy.deepcopy(value)
+
+    def set(self, key: str, value: JsonObj) -> None:
+        """Store a deep copy of `value`, evicting the oldest entries beyond `max_items`."""
+        item = (time.monotonic() + self.ttl_s, copy.deepcopy(value))
+        with self._lock:
+            self._items[key] = item
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_items:
+                self._items.popitem(last=False)
+
+    def clear(self) -> None:
+        """Drop every entry."""
+        with self._lock:
+            self._items.clear()
+
+    def __len__(self) -> int:
+        """Number of stored (possibly expired) entries."""
+        return len(self._items)
+
+
+class RedisReportCache:
+    """Report cache shared across processes via Redis (JSON values, `SETEX` TTL)."""
+
+    def __init__(self, url: str = "redis://localhost:6379/0", prefix: str = "llm_report", ttl_s: float = 300.0) -> None:
+        """Connect to Redis.
+
+        Args:
+            url: Redis connection URL.
+            prefix: Key namespace, e.g. "llm_report".
+            ttl_s: Seconds an entry stays valid.
+        Raises:
+            RuntimeError: If redis-py is not available.
+        """
+        if redis is None:
+            raise RuntimeError("redis-py is required for RedisReportCache")
+        self._r = redis.from_url(url, decode_responses=True)
+        self._prefix = prefix
+        self.ttl_s = max(1, int(ttl_s))
+
+    def get(self, key: str) -> Optional[JsonObj]:
+        """Return the decoded entry for `key`; Redis or decode errors count as a miss."""
+        try:
+            val = self._r.get(f"{self._prefix}:{key}")
+            return json.loads(val) if val is not None else None
+        except Exception as e:
+            log.warning("report cache read failed: %s", e)
+            return None
+
+    def set(self, key: str, value: JsonObj) -> None:
+        """Store `value` as compact JSON (best-effort)."""
+        try:
+            payload = json.dumps(value, ensure_ascii=False, separators=(",", ":"), default=str)
+            self._r.setex(f"{self._prefix}:{key}", self.ttl_s, payload)
+        except Exception as e:
+            log.warning("report cache write failed: %s", e)
+
+
 @dataclass
 class LLMGeneratorConfig:
     """Configuration for `LLMGenerator`.
@@ -58,6 +202,9 @@ class LLMGeneratorConfig:
         lang: Output language code ("fa" or "en").
         tone: Desired tone ("neutral"|"formal"|"concise"|"analytical").
         force_json: If True, prompt requests strict JSON-only output.
+        cache_ttl_s: TTL of the default in-memory report cache; <= 0 disables it.
+        cache_max_items: Capacity of the default in-memory report cache.
+        batch_workers: Default concurrent model calls in `generate_batch`.
     """
     provider: str = "mock"   # "openai"|"anthropic"|"ollama"|"mock"
     model: str = "gpt-4o-mini"
@@ -67,6 +214,13 @@ class LLMGeneratorConfig:
     lang: str = "fa"  # "en" or "fa"
     tone: str = "neutral"  # "neutral"|"formal"|"concise"|"analytical"
     force_json: bool = True
+    cache_ttl_s: float = 300.0
+    cache_max_items: int = 1024
+    batch_workers: int = 4
+
+
+# Runtime knobs that never change the generated report (excluded from cache keys).
+_NON_OUTPUT_FIELDS = ("cache_ttl_s", "cache_max_items", "batch_workers")
 
 
 class LLMGenerator:
@@ -75,16 +229,39 @@ class LLMGenerator:
     Expects a callable to actually run the model; defaults to a deterministic mock.
     """
 
-    def __init__(self, cfg: LLMGeneratorConfig, llm_call: Optional[LLMCallable] = None) -> None:
+    def __init__(
+        self,
+        cfg: LLMGeneratorConfig,
+        llm_call: Optional[LLMCallable] = None,
+        cache: Optional[ReportCache] = None,
+        cache_namespace: str = "",
+    ) -> None:
         """Initialize the generator.
 
         Args:
             cfg: Configuration for generation and validation.
             llm_call: Callable that takes a prompt string and returns raw model text.
                       If None, a deterministic mock is used.
+            cache: Report cache (e.g. `RedisReportCache`); defaults to an in-memory cache
+                   sized by `cfg.cache_ttl_s`/`cfg.cache_max_items` (disabled if the TTL is <= 0).
+            cache_namespace: Extra cache-key component, e.g. to keep different `llm_call`
+                             backends with the same config apart in a shared cache.
         """
         self.cfg = cfg
         self.llm_call = llm_call or self._mock_llm
+        if cache is None and cfg.cache_ttl_s > 0:
+            cache = MemoryReportCache(cfg.cache_ttl_s, cfg.cache_max_items)
+        self.cache = cache
+        self.cache_namespace = cache_namespace
+        # schema, its prompt rendering and its validator are fixed per generator
+        self._schema = self.schema()
+        self._schema_str = json.dumps(self._schema, ensure_ascii=False, indent=2)
+        self._validator = None
+        if _HAS_JSONSCHEMA and CompiledValidator is not None:
+            try:
+                self._validator = CompiledValidator(self._schema, auto_draft=True)
+            except Exception as e:  # pragma: no cover
+                log.warning("falling back to per-call schema validation: %s", e)
 
     # ---------- Schema ----------
     def schema(self) -> JsonObj:
@@ -161,7 +338,7 @@ class LLMGenerator:
         """
         lang = self.cfg.lang
         tone = self.cfg.tone
-        schema_str = json.dumps(self.schema(), ensure_ascii=False, indent=2)
+        schema_str = self._schema_str
         # instruction in the requested language
         if lang.startswith("fa"):
             instr = (
@@ -189,9 +366,24 @@ class LLMGenerator:
         return prompt
 
     # ---------- Generation ----------
+    def cache_key(self, signal: JsonObj, citations: List[JsonObj]) -> str:
+        """Return the stable cache key for (`signal`, `citations`) under the current config.
+
+        Only config fields that change the report take part, so resizing the cache or the
+        worker pool keeps existing entries valid.
+        """
+        cfg = {k: v for k, v in asdict(self.cfg).items() if k not in _NON_OUTPUT_FIELDS}
+        s = json.dumps(
+            {"ns": self.cache_namespace, "cfg": cfg, "signal": signal, "citations": citations},
+            sort_keys=True, ensure_ascii=False, separators=(",", ":"), default=str,
+        )
+        return hashlib.sha256(s.encode("utf-8")).hexdigest()
+
     def generate(self, signal: JsonObj, citations: List[JsonObj]) -> JsonObj:
         """Generate a report JSON from `signal` and `citations`, validate, repair, and localize.
 
+        A cached report for identical inputs and config is returned without calling the model.
+
         Args:
             signal: Input signal payload.
             citations: Evidence objects for the insight section.
@@ -199,6 +391,79 @@ class LLMGenerator:
         Returns:
             A schema-conformant JSON object localized per configuration.
         """
+        if self.cache is None:
+            return self._generate_uncached(signal, citations)
+        key = self.cache_key(signal, citations)
+        hit = self.cache.get(key)
+        if hit is not None:
+            _count_lookup("hit")
+            return hit
+        _count_lookup("miss")
+        obj = self._generate_uncached(signal, citations)
+        self.cache.set(key, obj)
+        return obj
+
+    def generate_batch(
+        self,
+        signals: Sequence[JsonObj],
+        citations: Optional[Sequence[List[JsonObj]]] = None,
+        *,
+        max_workers: Optional[int] = None,
+    ) -> List[JsonObj]:
+        """Generate one report per signal, calling the model once per distinct input.
+
+        Inputs are deduplicated by `cache_key`, cache hits are served directly and the
+        remaining model calls run on at most `max_workers` threads. Each output slot gets
+        its own copy, so callers may mutate results freely.
+
+        Args:
+            signals: Signal payloads.
+            citations: Per-signal evidence lists (same length as `signals`); None means no evidence.
+            max_workers: Concurrent model calls (default `cfg.batch_workers`).
+
+        Returns:
+            Reports in input order.
+
+        Raises:
+            ValueError: If `citations` and `signals` differ in length.
+            Exception: The first failure (in input order) of any model call.
+        """
+        cits: Sequence[List[JsonObj]] = citations if citations is not None else [[] for _ in signals]
+        if len(cits) != len(signals):
+            raise ValueError("citations must have one entry per signal")
+        keys = [self.cache_key(s, c) for s, c in zip(signals, cits)]
+        todo: Dict[str, Tuple[JsonObj, List[JsonObj]]] = {}
+        done: Dict[str, JsonObj] = {}
+        for k, s, c in zip(keys, signals, cits):
+            if k in todo or k in done:
+                continue
+            hit = self.cache.get(k) if self.cache is not None else None
+            if hit is not None:
+                done[k] = hit
+            else:
+                todo[k] = (s, c)
+        if self.cache is not None:
+            _count_lookup("hit", len(done))
+            _count_lookup("miss", len(todo))
+        if todo:
+            workers = max(1, min(int(max_workers or self.cfg.batch_workers), len(todo)))
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="llm-report") as pool:
+                futs = {k: pool.submit(self._generate_uncached, s, c) for k, (s, c) in todo.items()}
+            for k in keys:  # surface the first failure in input order
+                if k in futs:
+                    done[k] = futs[k].result()
+                    if self.cache is not None:
+                        self.cache.set(k, done[k])
+                    del futs[k]
+        seen: set[str] = set()
+        out: List[JsonObj] = []
+        for k in keys:
+            out.append(done[k] if k not in seen else copy.deepcopy(done[k]))
+            seen.add(k)
+        return out
+
+    def _generate_uncached(self, signal: JsonObj, citations: List[JsonObj]) -> JsonObj:
+        """Run the model for one input and post-process its output (no cache involved)."""
         prompt = self.build_prompt(signal, citations)
         raw = self.llm_call(prompt)
         obj = self._extract_json(raw)
@@ -297,7 +562,7 @@ class LLMGenerator:
         # --- validate against JSON schema ---
         if _HAS_JSONSCHEMA and validate is not None:
             try:
-                validate(obj, self.schema())
+                self._validate(obj)
             except ValidationError as e:
                 # minimal second pass repair
                 if "insights" in obj:
@@ -310,10 +575,17 @@ class LLMGenerator:
                         "citations": [{"source":"signal","id":_stable_hash(signal)}]
                     }]
                 # re-validate
-                validate(obj, self.schema())
+                self._validate(obj)
         # If jsonschema is unavailable, we at least return a well-formed object per our logic above
         return obj
 
+    def _validate(self, obj: JsonObj) -> None:
+        """Validate `obj` with the compiled validator (or `jsonschema.validate` as a fallback)."""
+        if self._validator is not None:
+            self._validator.validate(obj)
+        else:
+            validate(obj, self._schema)
+
     # ---------- Mock LLM ----------
     def _mock_llm(self, prompt: str) -> str:
         """Deterministic mock backend: parses SIGNAL/CITATIONS from the prompt and returns schema-compliant JSON."""
@@ -369,3 +641,48 @@ class LLMGenerator:
             ]
         }
         return json.dumps(out, ensure_ascii=False, separators=(",",":"))
+
+
+def _bench(n_signals: int = 200, n_unique: int = 50, latency_ms: float = 20.0, workers: int = 8) -> Dict[str, float]:
+    """Reports/sec of sequential uncached `generate` vs `generate_batch` (mock model with fixed latency)."""
+    base_cfg = LLMGeneratorConfig(lang="en", cache_ttl_s=0)
+    mock = LLMGenerator(base_cfg)._mock_llm
+
+    def slow_llm(prompt: str) -> str:
+        """Mock backend with a fixed network-like delay."""
+        time.sleep(latency_ms / 1000.0)
+        return mock(prompt)
+
+    signals = [
+        {"symbol": f"SYM{i % n_unique}", "timeframe": "1h", "side": "LONG", "prob_tp": 0.6,
+         "entry": 100.0, "sl": 98.0, "tp": 104.0, "model_version": "bench"}
+        for i in range(n_signals)
+    ]
+    cits = [[{"source": "bench", "id": s["symbol"]}] for s in signals]
+    out: Dict[str, float] = {}
+    gen = LLMGenerator(base_cfg, llm_call=slow_llm)
+    t0 = time.perf_counter()
+    for s, c in zip(signals, cits):
+        gen.generate(s, c)
+    out["sequential_reports_per_s"] = n_signals / (time.perf_counter() - t0)
+    gen = LLMGenerator(LLMGeneratorConfig(lang="en", batch_workers=workers), llm_call=slow_llm)
+    t0 = time.perf_counter()
+    gen.generate_batch(signals, cits)
+    out["batch_reports_per_s"] = n_signals / (time.perf_counter() - t0)
+    t0 = time.perf_counter()
+    gen.generate_batch(signals, cits)
+    out["cached_batch_reports_per_s"] = n_signals / (time.perf_counter() - t0)
+    return out
+
+
+if __name__ == "__main__":  # pragma: no cover
+    import argparse
+
+    logging.basicConfig(level=logging.INFO)
+    ap = argparse.ArgumentParser(description="Benchmark cached/batched report generation")
+    ap.add_argument("--signals", type=int, default=200)
+    ap.add_argument("--unique", type=int, default=50)
+    ap.add_argument("--latency-ms", type=float, default=20.0)
+    ap.add_argument("--workers", type=int, default=8)
+    ns = ap.parse_args()
+    log.info(json.dumps(_bench(ns.signals, ns.unique, ns.latency_ms, ns.workers), indent=2))
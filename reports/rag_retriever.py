@@ -1,17 +1,23 @@
 # reports/rag_retriever.py
-"""Lightweight TF-IDF RAG retriever with provenance and minimal JSON-Schema validation.
+"""Lightweight TF-IDF/BM25 RAG retriever with provenance and minimal JSON-Schema validation.
 
 This module provides:
 - Tokenization with a Unicode-aware regex
-- In-memory TF-IDF vectorizer + cosine similarity
+- Incremental inverted index (posting lists, doc lengths, DF) with save/load
+- TF-IDF cosine similarity (default) or Okapi BM25 scoring over postings
 - Simple `Doc` dataclass with source/timestamp/meta
 - Search that returns ranked results (with snippets)
 - Helpers to convert results into `citations` for LLM pipelines
 """
 
 from __future__ import annotations
+import gzip
+import heapq
+import json
 import math
+import os
 import re
+import uuid
 from dataclasses import dataclass, field
 from typing import Any, Dict, List, Optional, Tuple
 import datetime as dt
@@ -59,17 +65,79 @@ class Doc:
     meta: Dict[str, Any] = field(default_factory=dict)
 
 class Retriever:
-    """In-memory TF-IDF retriever with cosine similarity and basic schema-validated outputs."""
+    """In-memory retriever over an inverted index: TF-IDF cosine (default) or BM25, with schema-validated outputs.
 
-    def __init__(self) -> None:
-        """Initialize empty store and DF table."""
+    Documents are tokenized once, when added. Posting lists (term -> {slot: tf}),
+    document lengths and DF are maintained incrementally by `add` /
+    `add_documents` / `remove_documents`; a query only visits the postings of
+    its own terms. Document norms (TF-IDF) depend on N and DF, so they are
+    recomputed from the postings — not by re-tokenizing — after the corpus
+    changes. `save` / `load` persist the index so restarts skip tokenization.
+    """
+
+    _FORMAT = 1
+
+    def __init__(self, scoring: str = "tfidf", k1: float = 1.5, b: float = 0.75) -> None:
+        """Initialize an empty index.
+
+        Args:
+            scoring: "tfidf" (cosine, the original ranking) or "bm25".
+            k1, b: BM25 parameters.
+        """
+        if scoring not in ("tfidf", "bm25"):
+            raise ValueError(f"Unknown scoring: {scoring}")
+        self.scoring = scoring
+        self.k1 = float(k1)
+        self.b = float(b)
         self.docs: List[Doc] = []
         self.df: Dict[str, int] = {}   # document frequency
         self.voc_size: int = 0
-        self._built = False
+        self._slots: Dict[int, Doc] = {}          # slot -> doc; slots grow with insertion order
+        self._postings: Dict[str, Dict[int, int]] = {}
+        self._doc_len: Dict[int, int] = {}
+        self._total_len = 0
+        self._next_slot = 0
+        self._norms: Optional[Dict[int, float]] = None  # TF-IDF norms, None = stale
+        self._built = True
+
+    # ---------- indexing ----------
+    def _index(self, d: Doc) -> None:
+        """Tokenize `d` once and add it to postings, DF and lengths."""
+        slot = self._next_slot
+        self._next_slot += 1
+        terms = _tokenize(d.text)
+        tf: Dict[str, int] = {}
+        for t in terms:
+            tf[t] = tf.get(t, 0) + 1
+        for t, f in tf.items():
+            self._postings.setdefault(t, {})[slot] = f
+            self.df[t] = self.df.get(t, 0) + 1
+        self._slots[slot] = d
+        self._doc_len[slot] = len(terms)
+        self._total_len += len(terms)
+
+    def _unindex(self, slot: int) -> None:
+        """Remove the document in `slot` from postings, DF and lengths."""
+        d = self._slots.pop(slot)
+        for t in set(_tokenize(d.text)):
+            post = self._postings.get(t)
+            if post is not None and post.pop(slot, None) is not None:
+                if not post:
+                    del self._postings[t]
+                n = self.df.get(t, 0) - 1
+                if n > 0:
+                    self.df[t] = n
+                else:
+                    self.df.pop(t, None)
+        self._total_len -= self._doc_len.pop(slot, 0)
+
+    def _changed(self) -> None:
+        """Refresh derived stats after the corpus changed."""
+        self.voc_size = len(self.df)
+        self._norms = None
 
     def add(self, doc_id: str, text: str, source: str, timestamp: Optional[str] = None, **meta: Any) -> None:
-        """Add a document to the index. Marks index as needing rebuild.
+        """Add a document and index it immediately.
 
         Args:
             doc_id: Stable unique identifier.
@@ -78,19 +146,92 @@ class Retriever:
             timestamp: Optional ISO timestamp string.
             **meta: Arbitrary extra metadata kept on the `Doc`.
         """
-        self.docs.append(Doc(doc_id=doc_id, text=text, source=source, timestamp=timestamp, meta=meta))
-        self._built = False
+        self.add_documents([Doc(doc_id=doc_id, text=text, source=source, timestamp=timestamp, meta=meta)])
+
+    def add_documents(self, docs: List[Doc]) -> None:
+        """Index `docs` incrementally (no full rebuild)."""
+        if not self._built:
+            self.build()
+        for d in docs:
+            self.docs.append(d)
+            self._index(d)
+        self._changed()
+
+    def remove_documents(self, doc_ids: List[str]) -> int:
+        """Remove every document whose `doc_id` is in `doc_ids`; return how many were removed."""
+        if not self._built:
+            self.build()
+        ids = set(doc_ids)
+        gone = [slot for slot, d in self._slots.items() if d.doc_id in ids]
+        for slot in gone:
+            self._unindex(slot)
+        if gone:
+            self.docs = list(self._slots.values())
+            self._changed()
+        return len(gone)
 
     def build(self) -> None:
-        """(Re)build document frequencies for TF-IDF."""
+        """(Re)build the whole index from `self.docs` (only needed if `docs` was modified directly)."""
+        docs = list(self.docs)
         self.df.clear()
-        for d in self.docs:
-            terms = set(_tokenize(d.text))
-            for t in terms:
-                self.df[t] = self.df.get(t, 0) + 1
-        self.voc_size = len(self.df)
+        self._slots.clear()
+        self._postings.clear()
+        self._doc_len.clear()
+        self._total_len = 0
+        self._next_slot = 0
+        for d in docs:
+            self._index(d)
+        self.docs = docs
+        self._changed()
         self._built = True
 
+    # ---------- persistence ----------
+    def save(self, path: str) -> None:
+        """Write docs, postings and lengths to `path` (JSON, gzip if it ends with .gz), atomically."""
+        if not self._built:
+            self.build()
+        order = list(self._slots)  # insertion order
+        remap = {slot: i for i, slot in enumerate(order)}
+        state = {
+            "format": self._FORMAT,
+            "scoring": self.scoring, "k1": self.k1, "b": self.b,
+            "docs": [
+                {"doc_id": d.doc_id, "text": d.text, "source": d.source, "timestamp": d.timestamp, "meta": d.meta}
+                for d in (self._slots[s] for s in order)
+            ],
+            "doc_len": [self._doc_len[s] for s in order],
+            "postings": {t: [[remap[s], f] for s, f in post.items()] for t, post in self._postings.items()},
+        }
+        data = json.dumps(state, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        tmp = f"{path}.tmp_{uuid.uuid4().hex[:6]}"
+        with (gzip.open(tmp, "wb") if path.endswith(".gz") else open(tmp, "wb")) as f:
+            f.write(data)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str) -> "Retriever":
+        """Restore a retriever written by `save` without re-tokenizing the corpus."""
+        with (gzip.open(path, "rb") if path.endswith(".gz") else open(path, "rb")) as f:
+            state = json.loads(f.read().decode("utf-8"))
+        if state.get("format") != cls._FORMAT:
+            raise ValueError(f"Unsupported retriever index format: {state.get('format')}")
+        r = cls(scoring=state["scoring"], k1=state["k1"], b=state["b"])
+        r.docs = [Doc(**d) for d in state["docs"]]
+        r._slots = dict(enumerate(r.docs))
+        r._next_slot = len(r.docs)
+        r._doc_len = dict(enumerate(state["doc_len"]))
+        r._total_len = sum(state["doc_len"])
+        r._postings = {t: {s: f for s, f in post} for t, post in state["postings"].items()}
+        r.df = {t: len(post) for t, post in r._postings.items()}
+        r._changed()
+        return r
+
+    # ---------- scoring ----------
+    def _idf(self, df: int) -> float:
+        """Smoothed TF-IDF idf for a term with document frequency `df`."""
+        N = max(1, len(self._slots))
+        return math.log((N + 1) / (df + 1)) + 1.0
+
     def _tfidf(self, terms: List[str]) -> Dict[str, float]:
         """Compute a sparse TF-IDF vector for the provided `terms`."""
         if not self._built:
@@ -98,47 +239,87 @@ class Retriever:
         tf: Dict[str, float] = {}
         for t in terms:
             tf[t] = tf.get(t, 0.0) + 1.0
-        N = max(1, len(self.docs))
-        vec: Dict[str, float] = {}
-        for t, f in tf.items():
-            df = self.df.get(t, 0)
-            idf = math.log((N + 1) / (df + 1)) + 1.0
-            vec[t] = f * idf
-        return vec
-
-    @staticmethod
-    def _cosine(a: Dict[str, float], b: Dict[str, float]) -> float:
-        """Cosine similarity between two sparse vectors `a` and `b`."""
-        if not a or not b:
-            return 0.0
-        common = set(a) & set(b)
-        num = sum(a[t] * b[t] for t in common)
-        da = math.sqrt(sum(v * v for v in a.values()))
-        db = math.sqrt(sum(v * v for v in b.values()))
-        if da == 0 or db == 0:
-            return 0.0
-        return num / (da * db)
+        return {t: f * self._idf(self.df.get(t, 0)) for t, f in tf.items()}
+
+    def _doc_norms(self) -> Dict[int, float]:
+        """L2 norms of the documents' TF-IDF vectors, recomputed from postings when stale."""
+        if self._norms is None:
+            sq: Dict[int, float] = {slot: 0.0 for slot in self._slots}
+            for t, post in self._postings.items():
+                idf = self._idf(len(post))
+                for slot, f in post.items():
+                    w = f * idf
+                    sq[slot] += w * w
+            self._norms = {slot: math.sqrt(v) for slot, v in sq.items()}
+        return self._norms
+
+    def _scores_tfidf(self, q_terms: List[str]) -> Dict[int, float]:
+        """Cosine scores of the documents sharing at least one term with the query."""
+        q_vec = self._tfidf(q_terms)
+        qn = math.sqrt(sum(v * v for v in q_vec.values()))
+        if qn == 0:
+            return {}
+        dots: Dict[int, float] = {}
+        for t, qw in q_vec.items():
+            post = self._postings.get(t)
+            if not post:
+                continue
+            idf = self._idf(len(post))
+            for slot, f in post.items():
+                dots[slot] = dots.get(slot, 0.0) + qw * f * idf
+        norms = self._doc_norms()
+        return {slot: (v / (qn * norms[slot]) if norms[slot] else 0.0) for slot, v in dots.items()}
+
+    def _scores_bm25(self, q_terms: List[str]) -> Dict[int, float]:
+        """Okapi BM25 scores of the documents sharing at least one term with the query."""
+        N = len(self._slots)
+        if not N:
+            return {}
+        avgdl = (self._total_len / N) or 1.0
+        qtf: Dict[str, int] = {}
+        for t in q_terms:
+            qtf[t] = qtf.get(t, 0) + 1
+        k1, b = self.k1, self.b
+        scores: Dict[int, float] = {}
+        for t, qf in qtf.items():
+            post = self._postings.get(t)
+            if not post:
+                continue
+            n = len(post)
+            idf = math.log(1.0 + (N - n + 0.5) / (n + 0.5))
+            for slot, f in post.items():
+                denom = f + k1 * (1.0 - b + b * self._doc_len[slot] / avgdl)
+                scores[slot] = scores.get(slot, 0.0) + qf * idf * f * (k1 + 1.0) / denom
+        return scores
 
     def search(self, query: str, top_k: int = 5, min_score: float = 0.0) -> List[Dict[str, Any]]:
         """Search `query` and return up to `top_k` results with score ≥ `min_score`.
 
+        Only documents in the query terms' posting lists are scored. With
+        `min_score <= 0` the remaining slots are filled with zero-score documents
+        in insertion order, as the linear scan did.
+
         Returns:
             A list of dicts: {doc_id, score, snippet, source, timestamp}.
             If `jsonschema` is available, each item is validated against `_RETRIEVAL_RESULT_SCHEMA`.
         """
         if not self._built:
             self.build()
+        if top_k <= 0:
+            return []
         q_terms = _tokenize(query)
-        q_vec = self._tfidf(q_terms)
-        scores: List[Tuple[float, Doc]] = []
-        for d in self.docs:
-            d_vec = self._tfidf(_tokenize(d.text))
-            sc = self._cosine(q_vec, d_vec)
-            if sc >= min_score:
-                scores.append((sc, d))
-        scores.sort(key=lambda x: x[0], reverse=True)
+        raw = self._scores_bm25(q_terms) if self.scoring == "bm25" else self._scores_tfidf(q_terms)
+        # score desc, then insertion order (slots are monotonic)
+        ranked = heapq.nsmallest(top_k, ((-sc, slot) for slot, sc in raw.items() if sc > 0.0 and sc >= min_score))
+        scores: List[Tuple[float, Doc]] = [(-neg, self._slots[slot]) for neg, slot in ranked]
+        if len(scores) < top_k and min_score <= 0.0:
+            for slot, d in self._slots.items():
+                if len(scores) >= top_k:
+                    break
+                if raw.get(slot, 0.0) == 0.0:
+                    scores.append((0.0, d))
         results: List[Dict[str, Any]] = []
-        for sc, d in scores[: top_k]:
+        for sc, d in scores:
             snippet = d.text[:240].replace("\n", " ")
             results.append({
                 "doc_id": d.doc_id,
@@ -8,12 +8,19 @@
 
 from __future__ import annotations
 from typing import Any, Dict, List, Callable, Optional
-from jsonschema import validate, ValidationError, Draft7Validator, SchemaError
+from jsonschema import validate, ValidationError, SchemaError
 import importlib
 import logging
 
+from core.schema.validator_cache import ValidatorCache
+
 logger = logging.getLogger("schema_guard")
 
+# Compiled validators: (name, version) for the default registry, recompiled when the
+# schema file's mtime changes; (getter, name, version) for injected getters. Bounded so
+# per-call getters cannot grow it without limit.
+_VALIDATORS = ValidatorCache(max_items=256)
+
 
 class SchemaValidationError(ValueError):
     """Raised when a payload fails schema validation or required guardrail checks."""
@@ -26,6 +33,15 @@ class SchemaValidationError(ValueError):
         super().__init__(f"[{name} v{version}] Schema validation failed at {'.'.join(map(str, self.path))}: {message}")
 
 
+def _schema_token(name: str, version: str) -> Any:
+    """Freshness token of a schema in the default registry (its file mtime; None if unknown)."""
+    try:
+        mod = importlib.import_module("storage.schema_registry")
+        return mod.schema_mtime(name, version)
+    except Exception:
+        return None
+
+
 def _lazy_registry_getter() -> Callable[[str, str], Dict[str, Any]]:
     """Import and return `storage.schema_registry.get` without creating a static dependency."""
     try:
@@ -62,20 +78,27 @@ def ensure(
     """
     logger.debug(f"🔎 Validating payload for schema: {name} v{version}")
 
-    # Fetch schema from registry (lazy import to avoid layer violation)
-    getter = registry_get or _lazy_registry_getter()
-    try:
-        schema = getter(name, version)
-    except Exception as e:
-        logger.error(f"❌ Failed to fetch schema {name} v{version}: {e}")
-        raise RuntimeError(f"Unable to retrieve schema '{name}' v{version}") from e
+    # Fetch schema from registry (lazy import to avoid layer violation) — only on a cache miss
+    if registry_get is None:
+        getter = _lazy_registry_getter()
+        key: Any = (name, version)
+        token = _schema_token(name, version)
+    else:
+        getter = registry_get
+        key, token = (registry_get, name, version), None
+
+    def _load() -> Dict[str, Any]:
+        """Fetch the schema from the registry, wrapping failures as RuntimeError."""
+        try:
+            return getter(name, version)
+        except Exception as e:
+            logger.error(f"❌ Failed to fetch schema {name} v{version}: {e}")
+            raise RuntimeError(f"Unable to retrieve schema '{name}' v{version}") from e
 
     # Validate against JSON Schema
     try:
-        validator = Draft7Validator(schema)
-        errors = sorted(validator.iter_errors(payload), key=lambda e: e.path)
-        if errors:
-            err = errors[0]  # first error for clarity
+        err = _VALIDATORS.get(key, _load, token=token).first_error(payload)
+        if err is not None:  # first error (smallest path) for clarity
             raise SchemaValidationError(name, version, err.message, list(err.path))
         logger.debug(f"✅ Schema validated successfully: {name} v{version}")
     except SchemaError as se:
@@ -3,12 +3,21 @@
 
 Includes:
 - Token-level Jaccard similarity for plagiarism-style overlap checks.
-- Pairwise similarity sweep over submissions with a high-similarity threshold.
+- Pairwise similarity sweep over submissions with a high-similarity threshold,
+  either exact (all pairs) or via a MinHash/LSH index that only verifies
+  candidate pairs.
 - Simple proctoring rule flags for window switching, idle time, and copy/paste.
 """
 
-from typing import List
+from typing import Dict, List, Optional
+import hashlib
 import math  # kept intentionally; structure unchanged
+import time
+
+import numpy as np
+
+_MERSENNE_P = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64(0xFFFFFFFF)
 
 def jaccard_similarity(a: str, b: str) -> float:
     """Compute Jaccard similarity between two strings using whitespace tokenization.
@@ -25,26 +34,232 @@ def jaccard_similarity(a: str, b: str) -> float:
     union = len(sa | sb) or 1
     return inter / union
 
-def similarity_check(submissions: List[str]) -> list[tuple[int, int, float]]:
-    """Find highly similar submission pairs using Jaccard similarity.
+def shingles(text: str, k: int = 1) -> set[str]:
+    """Return the set of k-token shingles of `text` (lowercased, whitespace tokens).
 
-    Iterates over all i<j pairs and records those with similarity > 0.8.
+    With k=1 this is the token set used by `jaccard_similarity`.
 
     Args:
-        submissions: List of raw submission texts.
+        text: Input text.
+        k: Tokens per shingle.
 
     Returns:
-        List of tuples (i, j, sim) where i and j are indices into `submissions`
-        and `sim` is the Jaccard similarity score.
+        Set of shingles (tokens joined by a single space).
+    """
+    toks = text.lower().split()
+    if k <= 1:
+        return set(toks)
+    return {" ".join(toks[i:i + k]) for i in range(len(toks) - k + 1)}
+
+
+def _set_jaccard(sa: set, sb: set) -> float:
+    """Jaccard similarity of two precomputed sets (same formula as `jaccard_similarity`)."""
+    return len(sa & sb) / (len(sa | sb) or 1)
+
+
+def lsh_params(threshold: float, num_perm: int, target_recall: float = 0.99) -> tuple[int, int]:
+    """Pick (bands, rows) for LSH banding.
+
+    A pair with Jaccard s becomes a candidate with probability 1 - (1 - s^r)^b.
+    The largest r (fewest false candidates) whose probability at `threshold`
+    still reaches `target_recall` is chosen.
+
+    Args:
+        threshold: Similarity at which pairs must be found.
+        num_perm: MinHash signature length (b * r <= num_perm).
+        target_recall: Minimum candidate probability at `threshold`.
+
+    Returns:
+        Tuple (bands, rows).
     """
+    best = (num_perm, 1)
+    for r in range(1, num_perm + 1):
+        b = num_perm // r
+        if 1.0 - (1.0 - threshold ** r) ** b >= target_recall:
+            best = (b, r)
+    return best
+
+
+class MinHashLSH:
+    """Incremental MinHash/LSH index of submissions with exact Jaccard verification of candidates."""
+
+    def __init__(
+        self,
+        threshold: float = 0.8,
+        num_perm: int = 128,
+        shingle_size: int = 1,
+        bands: Optional[int] = None,
+        target_recall: float = 0.99,
+        seed: int = 1,
+    ) -> None:
+        """Create an empty index.
+
+        Args:
+            threshold: Pairs with Jaccard > threshold are reported.
+            num_perm: MinHash signature length.
+            shingle_size: Tokens per shingle (1 matches `jaccard_similarity`).
+            bands: LSH bands (rows = num_perm // bands); derived from `target_recall` if None.
+            target_recall: Candidate probability at `threshold` used to derive the banding.
+            seed: Seed of the hash permutations.
+        """
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        if bands is None:
+            self.bands, self.rows = lsh_params(threshold, num_perm, target_recall)
+        else:
+            self.bands, self.rows = bands, num_perm // bands
+        rng = np.random.default_rng(seed)
+        # h_i(x) = (a_i * x + b_i) mod p over 32-bit token hashes; a*x + b fits in uint64
+        self._a = rng.integers(1, 1 << 32, size=num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, 1 << 32, size=num_perm, dtype=np.uint64)
+        self._buckets: List[Dict[bytes, List[int]]] = [{} for _ in range(self.bands)]
+        self._sets: List[set] = []
+
+    def __len__(self) -> int:
+        """Number of inserted submissions."""
+        return len(self._sets)
+
+    def signature(self, sh: set) -> np.ndarray:
+        """MinHash signature (num_perm uint64 values) of a shingle set.
+
+        Args:
+            sh: Shingle set (non-empty).
+
+        Returns:
+            Array of per-permutation minimum hash values.
+        """
+        x = np.fromiter(
+            (int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=4).digest(), "little") for s in sh),
+            dtype=np.uint64, count=len(sh),
+        )
+        hv = (self._a[:, None] * x[None, :] + self._b[:, None]) % _MERSENNE_P & _MAX_HASH
+        return hv.min(axis=1)
+
+    def _band_keys(self, sig: np.ndarray) -> List[bytes]:
+        """One bucket key per band."""
+        r = self.rows
+        return [sig[i * r:(i + 1) * r].tobytes() for i in range(self.bands)]
+
+    def _query(self, sh: set, keys: List[bytes]) -> list[tuple[int, float]]:
+        """Verify the bucket-mates of `keys` exactly; return (index, sim) with sim > threshold."""
+        cand: set[int] = set()
+        for band, key in zip(self._buckets, keys):
+            hit = band.get(key)
+            if hit:
+                cand.update(hit)
+        out = []
+        for j in sorted(cand):
+            sim = _set_jaccard(self._sets[j], sh)
+            if sim > self.threshold:
+                out.append((j, sim))
+        return out
+
+    def query(self, text: str) -> list[tuple[int, float]]:
+        """Find indexed submissions similar to `text` without inserting it.
+
+        Args:
+            text: Submission text.
+
+        Returns:
+            List of (index, sim) sorted by index.
+        """
+        sh = shingles(text, self.shingle_size)
+        if not sh:
+            return []  # an empty submission has Jaccard 0 with everything
+        return self._query(sh, self._band_keys(self.signature(sh)))
+
+    def insert(self, text: str) -> list[tuple[int, float]]:
+        """Check `text` against the index, then add it.
+
+        Args:
+            text: Submission text.
+
+        Returns:
+            List of (earlier index, sim) pairs above the threshold.
+        """
+        sh = shingles(text, self.shingle_size)
+        idx = len(self._sets)
+        self._sets.append(sh)
+        if not sh:
+            return []
+        keys = self._band_keys(self.signature(sh))
+        out = self._query(sh, keys)
+        for band, key in zip(self._buckets, keys):
+            band.setdefault(key, []).append(idx)
+        return out
+
+
+def _similarity_check_exact(submissions: List[str], threshold: float) -> list[tuple[int, int, float]]:
+    """All-pairs Jaccard sweep (O(n^2))."""
     n = len(submissions); out = []
     for i in range(n):
         for j in range(i+1, n):
             sim = jaccard_similarity(submissions[i], submissions[j])
-            if sim > 0.8:
+            if sim > threshold:
                 out.append((i, j, sim))
     return out
 
+
+def similarity_check(
+    submissions: List[str], threshold: float = 0.8, method: str = "auto", **lsh_kwargs
+) -> list[tuple[int, int, float]]:
+    """Find highly similar submission pairs using Jaccard similarity.
+
+    Records i<j pairs with similarity > `threshold`. "exact" iterates over all
+    pairs; "lsh" inserts submissions into a `MinHashLSH` index and verifies
+    only candidate pairs (may miss a small fraction, see `measure_recall`);
+    "auto" uses exact for up to 200 submissions and LSH above.
+
+    Args:
+        submissions: List of raw submission texts.
+        threshold: Similarity cut-off.
+        method: "exact", "lsh" or "auto".
+        **lsh_kwargs: Extra `MinHashLSH` arguments.
+
+    Returns:
+        List of tuples (i, j, sim) where i and j are indices into `submissions`
+        and `sim` is the Jaccard similarity score, ordered by (i, j).
+    """
+    if method == "auto":
+        method = "exact" if len(submissions) <= 200 else "lsh"
+    if method == "exact":
+        return _similarity_check_exact(submissions, threshold)
+    if method != "lsh":
+        raise ValueError(f"unknown method: {method}")
+    index = MinHashLSH(threshold=threshold, **lsh_kwargs)
+    out = [(i, j, sim) for j, text in enumerate(submissions) for i, sim in index.insert(text)]
+    out.sort(key=lambda t: (t[0], t[1]))
+    return out
+
+
+def measure_recall(submissions: List[str], threshold: float = 0.8, **lsh_kwargs) -> dict:
+    """Compare LSH against the exact sweep at `threshold`.
+
+    Args:
+        submissions: List of raw submission texts.
+        threshold: Similarity cut-off for both methods.
+        **lsh_kwargs: Extra `MinHashLSH` arguments.
+
+    Returns:
+        Dict with recall, pair counts and the wall time of each method.
+    """
+    t0 = time.perf_counter()
+    exact = _similarity_check_exact(submissions, threshold)
+    t1 = time.perf_counter()
+    approx = similarity_check(submissions, threshold, method="lsh", **lsh_kwargs)
+    t2 = time.perf_counter()
+    truth = {(i, j) for i, j, _ in exact}
+    found = {(i, j) for i, j, _ in approx}
+    return {
+        "threshold": threshold,
+        "exact_pairs": len(truth),
+        "lsh_pairs": len(found),
+        "recall": len(truth & found) / len(truth) if truth else 1.0,
+        "exact_seconds": t1 - t0,
+        "lsh_seconds": t2 - t1,
+    }
+
 def proctoring_flags(window_switches: int, idle_seconds: int, copy_paste_count: int) -> dict:
     """Raise simple boolean proctoring flags based on fixed thresholds.
 
@@ -65,3 +280,33 @@ def proctoring_flags(window_switches: int, idle_seconds: int, copy_paste_count:
     if idle_seconds > 300: flags["idle"] = True
     if copy_paste_count > 5: flags["copy_paste"] = True
     return flags
+
+
+def _synthetic_class(n: int, seed: int = 0) -> List[str]:
+    """Submissions where about a quarter are lightly edited copies of others."""
+    rng = np.random.default_rng(seed)
+    vocab = [f"w{i}" for i in range(5000)]
+    subs: List[str] = []
+    for i in range(n):
+        if subs and rng.random() < 0.25:
+            toks = subs[int(rng.integers(len(subs)))].split()
+            for _ in range(int(rng.integers(0, 4))):
+                toks[int(rng.integers(len(toks)))] = vocab[int(rng.integers(len(vocab)))]
+            subs.append(" ".join(toks))
+        else:
+            subs.append(" ".join(rng.choice(vocab, size=int(rng.integers(40, 120)))))
+    return subs
+
+
+if __name__ == "__main__":  # pragma: no cover
+    import argparse
+    import json
+    import logging
+
+    logging.basicConfig(level=logging.INFO)
+    ap = argparse.ArgumentParser(description="Recall and speed of MinHash/LSH vs exact similarity_check")
+    ap.add_argument("--n", type=int, default=2000)
+    ap.add_argument("--threshold", type=float, default=0.8)
+    ap.add_argument("--num-perm", type=int, default=128)
+    ns = ap.parse_args()
+    logging.info(json.dumps(measure_recall(_synthetic_class(ns.n), ns.threshold, num_perm=ns.num_perm), indent=2))
@@ -1,15 +1,44 @@
 """FastAPI app for the NEXUSA Recommender service.
 
 Provides an endpoint to suggest next lessons based on a simple DKT surrogate.
+Per-user state lives in a bounded `KnowledgeStore` (idle users are evicted to
+SQLite and reloaded on demand) instead of one `DKTModel` object per user.
 """
 
+import os
+import threading
+from typing import Optional
+
 from fastapi import FastAPI
 from packages.schemas.recommender import Recommendation
 from .bkt import predict as bkt_predict  # noqa: F401  # kept for structural compatibility
-from .dkt import DKTModel
+from .dkt import DKTModel  # noqa: F401  # reference implementation of the surrogate
+from .knowledge_store import KnowledgeStore
 
 app = FastAPI(title="NEXUSA Recommender Service", version="1.0.0")
-_models: dict[str, DKTModel] = {}
+
+STATE_PATH = os.getenv("RECOMMENDER_STATE_PATH", os.path.join("artifacts", "recommender_state.sqlite"))
+MAX_RESIDENT = int(os.getenv("RECOMMENDER_MAX_RESIDENT", "10000"))
+
+_STORE: Optional[KnowledgeStore] = None
+_STORE_LOCK = threading.Lock()
+
+
+def get_store() -> KnowledgeStore:
+    """Return the process-wide knowledge-state store, opening it on first use."""
+    global _STORE
+    if _STORE is None:
+        with _STORE_LOCK:
+            if _STORE is None:
+                _STORE = KnowledgeStore(STATE_PATH, max_resident=MAX_RESIDENT)
+    return _STORE
+
+
+@app.on_event("shutdown")
+def _close_store() -> None:
+    """Persist resident user state on shutdown."""
+    if _STORE is not None:
+        _STORE.close()
 
 
 @app.post("/recommender/next", response_model=Recommendation)
@@ -20,15 +49,15 @@ def next_lessons(payload: dict) -> Recommendation:
         payload: JSON body containing:
             - user_id (str): Identifier of the user.
             - last_correct (bool): Whether the user's last answer was correct.
+            - skill (str, optional): Skill of the answered item; updates its BKT mastery.
 
     Returns:
         Recommendation: DTO with user_id, list of suggested lesson IDs, and a reason.
     """
     user_id = payload.get("user_id", "unknown")
     correct = bool(payload.get("last_correct", False))
-    model = _models.setdefault(user_id, DKTModel())
-    model.update(correct)
-    mastery = model.mastery()  # 0..1
+    skill = payload.get("skill")
+    mastery = get_store().record(user_id, correct, skill=str(skill) if skill is not None else None)  # 0..1
     # Simple policy: suggest easier lessons if mastery<0.6, else advanced ids
     lessons = [1, 2, 3] if mastery < 0.6 else [10, 11, 12]
     reason = f"mastery={mastery:.2f} via DKT surrogate"
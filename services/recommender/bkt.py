@@ -1,8 +1,12 @@
 """Simple Bayesian Knowledge Tracing (BKT) helper.
 
-Exposes a rule-based update to estimate the next-step knowledge probability.
+Exposes a rule-based update to estimate the next-step knowledge probability,
+plus a vectorized variant for many (user, skill) beliefs at once.
 """
 
+import numpy as np
+
+
 def predict(p_know: float, p_learn: float, p_slip: float, p_guess: float, correct: bool) -> float:
     """Update knowledge belief given the latest response using BKT.
 
@@ -22,3 +26,29 @@ def predict(p_know: float, p_learn: float, p_slip: float, p_guess: float, correc
         p_know_given = (p_know * p_slip) / (p_know * p_slip + (1 - p_know) * (1 - p_guess) + 1e-9)
     p_next = p_know_given + (1 - p_know_given) * p_learn
     return float(p_next)
+
+
+def predict_batch(p_know: np.ndarray, correct: np.ndarray, p_learn, p_slip, p_guess) -> np.ndarray:
+    """Vectorized `predict` over arrays of beliefs and responses.
+
+    Args:
+        p_know: Array of prior knowledge probabilities.
+        correct: Boolean array (same shape) of response outcomes.
+        p_learn: Learning probability (scalar or broadcastable array).
+        p_slip: Slip probability (scalar or broadcastable array).
+        p_guess: Guess probability (scalar or broadcastable array).
+
+    Returns:
+        A float64 array of next-step knowledge probabilities, equal to `predict`
+        applied element-wise.
+    """
+    p = np.asarray(p_know, dtype=np.float64)
+    c = np.asarray(correct, dtype=bool)
+    hit = p * (1 - p_slip)
+    miss = p * p_slip
+    p_given = np.where(
+        c,
+        hit / (hit + (1 - p) * p_guess + 1e-9),
+        miss / (miss + (1 - p) * (1 - p_guess) + 1e-9),
+    )
+    return p_given + (1 - p_given) * p_learn
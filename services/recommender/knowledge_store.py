@@ -0,0 +1,439 @@
+"""Compact, bounded knowledge-state store for the Recommender service.
+
+Per-user state lives in preallocated NumPy arrays, one row per resident user:
+- `mastery`: float64 BKT knowledge probability per skill (columns grow as new
+  skills appear; float32 would drift, since `1 - p` loses precision near 1);
+- `history`: uint8 ring buffer of recent correctness for the DKT surrogate
+  (same window/mean semantics as `DKTModel`).
+
+At most `max_resident` users are held in memory; the least recently used one
+is evicted to a local SQLite file and reloaded on demand. Skill columns follow
+an append-only skill list kept in that file, so processes sharing it agree on
+which column holds which skill. `update_batch` and
+`predict_correct` score many (user, skill) pairs with one vectorized BKT step.
+
+Benchmark:
+    python -m services.recommender.knowledge_store --users 50000 --resident 5000
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from itertools import islice
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .bkt import predict_batch
+
+log = logging.getLogger("recommender.knowledge_store")
+
+
+@dataclass(frozen=True)
+class BKTParams:
+    """BKT parameters shared by every skill."""
+    p_init: float = 0.3
+    p_learn: float = 0.1
+    p_slip: float = 0.1
+    p_guess: float = 0.2
+
+
+class _SQLiteStates:
+    """SQLite user -> packed state rows plus the shared skill -> column list."""
+
+    def __init__(self, path: str) -> None:
+        """Open (creating if needed) the state database at `path` (":memory:" keeps it in RAM)."""
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=5.0)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")  # durable at checkpoints; fine for a state cache
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS state ("
+            " user_id TEXT PRIMARY KEY, mastery BLOB NOT NULL, history BLOB NOT NULL,"
+            " hist_len INTEGER NOT NULL, hist_pos INTEGER NOT NULL, updated REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE TABLE IF NOT EXISTS meta (k TEXT PRIMARY KEY, v TEXT NOT NULL)")
+        self._conn.commit()
+
+    def get_many(self, user_ids: List[str]) -> Dict[str, Tuple[bytes, bytes, int, int]]:
+        """Return stored rows for whichever `user_ids` exist."""
+        out: Dict[str, Tuple[bytes, bytes, int, int]] = {}
+        for i in range(0, len(user_ids), 500):
+            chunk = user_ids[i:i + 500]
+            rows = self._conn.execute(
+                f"SELECT user_id, mastery, history, hist_len, hist_pos FROM state"
+                f" WHERE user_id IN ({','.join('?' * len(chunk))})", chunk
+            ).fetchall()
+            for uid, m, h, n, pos in rows:
+                out[uid] = (m, h, n, pos)
+        return out
+
+    def put_many(self, rows: List[Tuple[str, bytes, bytes, int, int]]) -> None:
+        """Insert or replace packed rows."""
+        now = time.time()
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO state (user_id, mastery, history, hist_len, hist_pos, updated)"
+            " VALUES (?, ?, ?, ?, ?, ?)",
+            [(*r, now) for r in rows],
+        )
+        self._conn.commit()
+
+    def get_meta(self, k: str) -> Optional[str]:
+        """Return a metadata value."""
+        row = self._conn.execute("SELECT v FROM meta WHERE k = ?", (k,)).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, k: str, v: str) -> None:
+        """Store a metadata value."""
+        self._conn.execute("INSERT OR REPLACE INTO meta (k, v) VALUES (?, ?)", (k, v))
+        self._conn.commit()
+
+    def register_skills(self, skills: List[str]) -> List[str]:
+        """Append unseen `skills` to the stored skill list in one write transaction; return the full list.
+
+        The list is re-read under the write lock, so concurrent processes extend it
+        instead of overwriting each other's columns.
+        """
+        self._conn.commit()
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = self._conn.execute("SELECT v FROM meta WHERE k = 'skills'").fetchone()
+            stored: List[str] = json.loads(row[0]) if row else []
+            known = set(stored)
+            added = [s for s in skills if s not in known]
+            if added:
+                stored.extend(added)
+                self._conn.execute("INSERT OR REPLACE INTO meta (k, v) VALUES ('skills', ?)", (json.dumps(stored),))
+            self._conn.commit()
+        except BaseException:
+            self._conn.rollback()
+            raise
+        return stored
+
+    def count(self) -> int:
+        """Number of stored users."""
+        return int(self._conn.execute("SELECT COUNT(*) FROM state").fetchone()[0])
+
+    def close(self) -> None:
+        """Close the connection."""
+        self._conn.close()
+
+
+class KnowledgeStore:
+    """Bounded, NumPy-packed per-user knowledge state with LRU eviction to SQLite."""
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        *,
+        max_resident: int = 10_000,
+        params: BKTParams = BKTParams(),
+        history_len: int = 20,
+        initial_skills: int = 16,
+    ) -> None:
+        """Open the store.
+
+        Args:
+            path: SQLite file for evicted users; None keeps them in an in-memory database.
+            max_resident: Users kept in the NumPy arrays before LRU eviction.
+            params: BKT parameters.
+            history_len: DKT surrogate window (as `DKTModel(maxlen=...)`, at most 255).
+            initial_skills: Initial skill-column capacity (doubles as skills appear).
+        """
+        self.params = params
+        self.max_resident = max(1, int(max_resident))
+        self.history_len = max(1, min(255, int(history_len)))
+        self._db = _SQLiteStates(path or ":memory:")
+        self._lock = threading.RLock()
+        skills = json.loads(self._db.get_meta("skills") or "[]")
+        self._skills: Dict[str, int] = {s: i for i, s in enumerate(skills)}
+        cols = max(int(initial_skills), len(skills), 1)
+        self._mastery = np.full((self.max_resident, cols), params.p_init, dtype=np.float64)
+        self._history = np.zeros((self.max_resident, self.history_len), dtype=np.uint8)
+        self._hist_len = np.zeros(self.max_resident, dtype=np.uint8)
+        self._hist_pos = np.zeros(self.max_resident, dtype=np.uint8)
+        self._slots: "OrderedDict[str, int]" = OrderedDict()  # LRU order, most recent last
+        self._free: List[int] = list(range(self.max_resident - 1, -1, -1))
+        self.loads = 0
+        self.evictions = 0
+
+    # ---------- skills ----------
+    def _skill_cols(self, skills: Sequence[str]) -> np.ndarray:
+        """Column index per skill, registering (and persisting) unseen skills."""
+        new = [s for s in dict.fromkeys(skills) if s not in self._skills]
+        if new:
+            self._adopt_skills(self._db.register_skills(new))
+        return np.fromiter((self._skills[s] for s in skills), dtype=np.intp, count=len(skills))
+
+    def _adopt_skills(self, stored: List[str]) -> None:
+        """Take columns for skills appended to the shared list (ours or another process's)."""
+        if stored[:len(self._skills)] != list(self._skills):
+            raise RuntimeError("stored skill list diverged from this store's columns")
+        for s in stored[len(self._skills):]:
+            self._skills[s] = len(self._skills)
+        need = len(self._skills)
+        if need > self._mastery.shape[1]:
+            cols = max(need, 2 * self._mastery.shape[1])
+            grown = np.full((self.max_resident, cols), self.params.p_init, dtype=np.float64)
+            grown[:, :self._mastery.shape[1]] = self._mastery
+            self._mastery = grown
+
+    # ---------- residency ----------
+    def _slots_for(self, user_ids: Sequence[str]) -> np.ndarray:
+        """Slot per user, loading non-resident users and evicting LRU ones as needed.
+
+        The caller must pass at most `max_resident` distinct users.
+        """
+        uniq = list(dict.fromkeys(user_ids))
+        missing = [u for u in uniq if u not in self._slots]
+        if missing:
+            keep = set(uniq)
+            need = len(missing) - len(self._free)
+            if need > 0:
+                # evict a little extra so steady churn commits to SQLite in larger groups
+                need = max(need, self.max_resident // 32)
+                victims = list(islice((u for u in self._slots if u not in keep), need))
+                self._evict(victims)
+            stored = self._db.get_many(missing)
+            if any(len(row[0]) // 8 > len(self._skills) for row in stored.values()):
+                # written by a process that knows more skills: pick up their columns first
+                self._adopt_skills(json.loads(self._db.get_meta("skills") or "[]"))
+            n_cols = len(self._skills)
+            for u in missing:
+                slot = self._free.pop()
+                self._slots[u] = slot
+                row = stored.get(u)
+                if row is None:
+                    self._mastery[slot, :] = self.params.p_init
+                    self._history[slot, :] = 0
+                    self._hist_len[slot] = 0
+                    self._hist_pos[slot] = 0
+                    continue
+                self.loads += 1
+                m = np.frombuffer(row[0], dtype=np.float64)[:n_cols]
+                self._mastery[slot, :] = self.params.p_init
+                self._mastery[slot, :m.shape[0]] = m
+                h = np.frombuffer(row[1], dtype=np.uint8)
+                self._history[slot, :] = 0
+                if h.shape[0] == self.history_len:
+                    self._history[slot] = h
+                    self._hist_len[slot] = row[2]
+                    self._hist_pos[slot] = row[3]
+                else:  # window size changed: keep the most recent outcomes in order
+                    recent = np.roll(h, -row[3])[h.shape[0] - row[2]:][-self.history_len:]
+                    self._history[slot, :recent.shape[0]] = recent
+                    self._hist_len[slot] = recent.shape[0]
+                    self._hist_pos[slot] = recent.shape[0] % self.history_len
+        for u in uniq:
+            self._slots.move_to_end(u)
+        return np.fromiter((self._slots[u] for u in user_ids), dtype=np.intp, count=len(user_ids))
+
+    def _pack(self, user_id: str, slot: int) -> Tuple[str, bytes, bytes, int, int]:
+        """Serialize one resident row."""
+        n_cols = len(self._skills)
+        return (
+            user_id,
+            self._mastery[slot, :n_cols].tobytes(),
+            self._history[slot].tobytes(),
+            int(self._hist_len[slot]),
+            int(self._hist_pos[slot]),
+        )
+
+    def _evict(self, user_ids: List[str]) -> None:
+        """Write `user_ids` to SQLite and free their slots."""
+        if not user_ids:
+            return
+        self._db.put_many([self._pack(u, self._slots[u]) for u in user_ids])
+        for u in user_ids:
+            self._free.append(self._slots.pop(u))
+        self.evictions += len(user_ids)
+
+    def _chunks(self, user_ids: Sequence[str]) -> List[Tuple[int, int]]:
+        """Split positions into consecutive ranges with at most `max_resident` distinct users each."""
+        out: List[Tuple[int, int]] = []
+        start, seen = 0, set()
+        for i, u in enumerate(user_ids):
+            if u not in seen and len(seen) >= self.max_resident:
+                out.append((start, i))
+                start, seen = i, set()
+            seen.add(u)
+        out.append((start, len(user_ids)))
+        return out
+
+    # ---------- DKT surrogate ----------
+    def record(self, user_id: str, correct: bool, skill: Optional[str] = None) -> float:
+        """Record one answer and return the user's DKT-surrogate mastery.
+
+        Args:
+            user_id: User identifier.
+            correct: Whether the answer was correct.
+            skill: Optional skill; when given its BKT mastery is updated as well.
+
+        Returns:
+            Mean of the last `history_len` outcomes (as `DKTModel.mastery`).
+        """
+        with self._lock:
+            slot = int(self._slots_for([user_id])[0])
+            pos = int(self._hist_pos[slot])
+            self._history[slot, pos] = 1 if correct else 0
+            self._hist_pos[slot] = (pos + 1) % self.history_len
+            self._hist_len[slot] = min(int(self._hist_len[slot]) + 1, self.history_len)
+            if skill is not None:
+                self._update_chunk([user_id], np.asarray([skill]), np.asarray([bool(correct)]))
+            return self._dkt_mastery(slot)
+
+    def _dkt_mastery(self, slot: int) -> float:
+        """Mean recent correctness of a resident slot (0.5 with no history)."""
+        n = int(self._hist_len[slot])
+        if n == 0:
+            return 0.5
+        return float(self._history[slot].sum(dtype=np.int64) / n)
+
+    def mastery(self, user_id: str) -> float:
+        """DKT-surrogate mastery of `user_id` (0.5 for unknown users)."""
+        with self._lock:
+            return self._dkt_mastery(int(self._slots_for([user_id])[0]))
+
+    # ---------- BKT ----------
+    def update_batch(self, user_ids: Sequence[str], skills: Sequence[str], correct: Sequence[bool]) -> np.ndarray:
+        """Apply many BKT observations at once.
+
+        Repeated (user, skill) pairs are applied in input order, so the result equals
+        calling `bkt.predict` once per observation.
+
+        Args:
+            user_ids: User per observation.
+            skills: Skill per observation.
+            correct: Outcome per observation.
+
+        Returns:
+            Posterior knowledge probability after each observation (float64, input order).
+        """
+        if not (len(user_ids) == len(skills) == len(correct)):
+            raise ValueError("user_ids, skills and correct must have the same length")
+        out = np.empty(len(user_ids), dtype=np.float64)
+        skills_arr = np.asarray(list(skills), dtype=object)
+        correct_arr = np.asarray(correct, dtype=bool)
+        with self._lock:
+            for a, b in self._chunks(user_ids):
+                out[a:b] = self._update_chunk(user_ids[a:b], skills_arr[a:b], correct_arr[a:b])
+        return out
+
+    def _update_chunk(self, user_ids: Sequence[str], skills: np.ndarray, correct: np.ndarray) -> np.ndarray:
+        """Vectorized BKT step for users that fit in memory together."""
+        rows = self._slots_for(user_ids)
+        cols = self._skill_cols(list(skills))
+        out = np.empty(rows.shape[0], dtype=np.float64)
+        # rank of each observation among earlier ones for the same (row, col): apply rank by rank
+        flat = rows * self._mastery.shape[1] + cols
+        order = np.argsort(flat, kind="stable")
+        sorted_flat = flat[order]
+        starts = np.r_[0, np.flatnonzero(np.diff(sorted_flat)) + 1]
+        rank = np.empty_like(order)
+        rank[order] = np.arange(order.shape[0]) - np.repeat(starts, np.diff(np.r_[starts, order.shape[0]]))
+        p = self.params
+        for r in range(int(rank.max()) + 1 if rank.size else 0):
+            idx = np.flatnonzero(rank == r)
+            prior = self._mastery[rows[idx], cols[idx]]
+            post = predict_batch(prior, correct[idx], p.p_learn, p.p_slip, p.p_guess)
+            self._mastery[rows[idx], cols[idx]] = post
+            out[idx] = post
+        return out
+
+    def skill_mastery(self, user_ids: Sequence[str], skills: Sequence[str]) -> np.ndarray:
+        """Knowledge probabilities as a (len(user_ids), len(skills)) matrix."""
+        out = np.empty((len(user_ids), len(skills)), dtype=np.float64)
+        with self._lock:
+            cols = self._skill_cols(list(skills))
+            for a, b in self._chunks(user_ids):
+                rows = self._slots_for(user_ids[a:b])
+                out[a:b] = self._mastery[np.ix_(rows, cols)]
+        return out
+
+    def predict_correct(self, user_ids: Sequence[str], skills: Sequence[str]) -> np.ndarray:
+        """P(correct answer) for every (user, skill) pair as a matrix: p·(1-slip) + (1-p)·guess."""
+        m = self.skill_mastery(user_ids, skills)
+        return m * (1 - self.params.p_slip) + (1 - m) * self.params.p_guess
+
+    # ---------- lifecycle ----------
+    def flush(self) -> None:
+        """Persist every resident user (they stay resident)."""
+        with self._lock:
+            if self._slots:
+                self._db.put_many([self._pack(u, s) for u, s in self._slots.items()])
+
+    def close(self) -> None:
+        """Persist resident users and close the database."""
+        with self._lock:
+            self.flush()
+            self._db.close()
+
+    def __len__(self) -> int:
+        """Number of resident users."""
+        return len(self._slots)
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by the resident-state arrays."""
+        return self._mastery.nbytes + self._history.nbytes + self._hist_len.nbytes + self._hist_pos.nbytes
+
+
+def _bench(n_users: int = 50_000, n_skills: int = 50, resident: int = 5_000, n_obs: int = 200_000) -> Dict[str, float]:
+    """Per-observation cost of scalar `bkt.predict` over dict state vs `KnowledgeStore.update_batch`."""
+    import tempfile
+
+    from .bkt import predict
+
+    rng = np.random.default_rng(0)
+    users = [f"u{i}" for i in rng.integers(0, n_users, n_obs)]
+    skills = [f"s{i}" for i in rng.integers(0, n_skills, n_obs)]
+    correct = rng.random(n_obs) < 0.6
+    p = BKTParams()
+    out: Dict[str, float] = {}
+
+    state: Dict[Tuple[str, str], float] = {}
+    t0 = time.perf_counter()
+    for u, s, c in zip(users, skills, correct):
+        state[(u, s)] = predict(state.get((u, s), p.p_init), p.p_learn, p.p_slip, p.p_guess, bool(c))
+    out["scalar_us_per_obs"] = (time.perf_counter() - t0) / n_obs * 1e6
+    out["scalar_state_entries"] = len(state)
+
+    path = os.path.join(tempfile.mkdtemp(), "state.sqlite")
+    store = KnowledgeStore(path, max_resident=resident, params=p, initial_skills=n_skills)
+    t0 = time.perf_counter()
+    step = max(resident // 2, 1)
+    res = np.concatenate([
+        store.update_batch(users[i:i + step], skills[i:i + step], correct[i:i + step])
+        for i in range(0, n_obs, step)
+    ])
+    out["batch_us_per_obs"] = (time.perf_counter() - t0) / n_obs * 1e6
+    ref = np.array([state[(u, s)] for u, s in zip(users, skills)])
+    last = {}
+    for i, key in enumerate(zip(users, skills)):
+        last[key] = i
+    idx = np.fromiter(last.values(), dtype=np.intp)
+    out["max_abs_diff_final_state"] = float(np.abs(res[idx] - ref[idx]).max())
+    out["resident_mb"] = store.nbytes / 2**20
+    out["evictions"] = store.evictions
+    out["reloads"] = store.loads
+    store.close()
+    return out
+
+
+if __name__ == "__main__":  # pragma: no cover
+    import argparse
+
+    logging.basicConfig(level=logging.INFO)
+    ap = argparse.ArgumentParser(description="Benchmark the recommender knowledge-state store")
+    ap.add_argument("--users", type=int, default=50_000)
+    ap.add_argument("--skills", type=int, default=50)
+    ap.add_argument("--resident", type=int, default=5_000)
+    ap.add_argument("--obs", type=int, default=200_000)
+    ns = ap.parse_args()
+    log.info(json.dumps(_bench(ns.users, ns.skills, ns.resident, ns.obs), indent=2))
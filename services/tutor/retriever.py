@@ -1,40 +1,61 @@
 """Tiny in-memory retriever for the Tutor service.
 
-Builds embeddings for a small document store and supports cosine-similarity
-search over those embeddings.
+Embeds a small document store into a `VectorIndex` (built lazily on the first
+query, reusing embeddings cached on disk when the embedder is reproducible
+across processes) and supports cosine-similarity search
+over those embeddings.
 """
 
+import os
+import threading
+from typing import Dict, Optional
+
+from packages.common import embeddings
 from packages.common.embeddings import embed_texts
-from typing import List, Dict
+from .vector_index import VectorIndex
 
 # A toy in-memory "vector store"
 DOCS: Dict[str, str] = {
     "doc://lesson1": "بیت‌کوین یک شبکه غیرمتمرکز است. عرضه کل 21 میلیون است.",
     "doc://lesson2": "اتریوم از قراردادهای هوشمند پشتیبانی می‌کند."
 }
-EMBS = {k: v for k, v in zip(DOCS.keys(), embed_texts(list(DOCS.values())))}
 
+INDEX_DIR = os.getenv("TUTOR_INDEX_DIR", os.path.join("artifacts", "tutor_index"))
+INDEX_MODE = os.getenv("TUTOR_INDEX_MODE", "auto")  # exact | ivf | auto
 
-def _cos(a: list[float], b: list[float]) -> float:
-    """Compute cosine similarity between two equal-length vectors.
+_INDEX: Optional[VectorIndex] = None
+_INDEX_LOCK = threading.Lock()
 
-    Args:
-        a: First dense vector.
-        b: Second dense vector.
+
+def get_index() -> VectorIndex:
+    """Return the document index, building it on first use.
 
     Returns:
-        Cosine similarity in the range [-1, 1], numerically stabilized.
+        The process-wide `VectorIndex` over `DOCS`.
     """
-    import numpy as np
-    va, vb = np.array(a), np.array(b)
-    return float(va.dot(vb) / (np.linalg.norm(va) * np.linalg.norm(vb) + 1e-9))
+    global _INDEX
+    if _INDEX is None:
+        with _INDEX_LOCK:
+            if _INDEX is None:
+                # Hash-fallback vectors change with the per-process hash seed; keep those in memory only.
+                cache_dir = INDEX_DIR if embeddings.disk_cacheable() else None
+                _INDEX = VectorIndex(embed_texts, model=embeddings.model_name(), cache_dir=cache_dir, mode=INDEX_MODE).build(DOCS)
+    return _INDEX
+
+
+def reset_index() -> None:
+    """Drop the index so the next query rebuilds it (call after changing `DOCS`)."""
+    global _INDEX
+    with _INDEX_LOCK:
+        _INDEX = None
 
 
 def search_docs(query: str, top_k: int = 3) -> list[tuple[str, float]]:
     """Retrieve top-k documents most similar to the query.
 
-    Embeds the query, scores cosine similarity against all docs, and returns
-    the highest-scoring results in descending order.
+    Embeds the query and scores it against all docs with one matrix product
+    (or the IVF candidate lists for large corpora), returning the
+    highest-scoring results in descending order.
 
     Args:
         query: Natural-language search text.
@@ -44,5 +65,4 @@ def search_docs(query: str, top_k: int = 3) -> list[tuple[str, float]]:
         A list of (document_id, score) tuples sorted by score (desc).
     """
     qv = embed_texts([query])[0]
-    scored = [(doc_id, _cos(qv, emb)) for doc_id, emb in EMBS.items()]
-    return sorted(scored, key=lambda x: x[1], reverse=True)[:top_k]
+    return get_index().search(qv, top_k=top_k)
@@ -0,0 +1,237 @@
+"""Matrix-backed vector index for the Tutor retriever.
+
+Normalized embeddings live in one contiguous float32 matrix, so an exact query
+is a single matrix-vector product followed by an `argpartition` top-k. For
+large corpora an IVF mode (k-means coarse quantizer + inverted lists) scores
+only the rows of the `n_probe` closest clusters.
+
+Embeddings are persisted under `cache_dir` keyed by a hash of the embedder name
+and document text, so unchanged documents are never re-embedded across
+restarts.
+"""
+
+import hashlib
+import logging
+import os
+import uuid
+from typing import Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+log = logging.getLogger("tutor.vector_index")
+
+EmbedFn = Callable[[List[str]], Sequence[Sequence[float]]]
+
+
+def content_key(text: str, model: str) -> str:
+    """Return the cache key for `text` embedded by `model`.
+
+    Args:
+        text: Document text.
+        model: Embedder identifier; different models never share vectors.
+
+    Returns:
+        A hex digest identifying the (model, text) pair.
+    """
+    return hashlib.sha256(f"{model}\x00{text}".encode("utf-8")).hexdigest()
+
+
+def _normalize(mat: np.ndarray) -> np.ndarray:
+    """Return a C-contiguous float32 copy of `mat` with unit-length rows (zero rows stay zero)."""
+    m = np.ascontiguousarray(mat, dtype=np.float32)
+    norms = np.linalg.norm(m, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return m / norms
+
+
+def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the `k` largest `scores`, best first."""
+    k = min(k, scores.shape[0])
+    if k <= 0:
+        return np.empty(0, dtype=np.intp)
+    idx = np.argpartition(-scores, k - 1)[:k] if k < scores.shape[0] else np.arange(scores.shape[0])
+    return idx[np.argsort(-scores[idx], kind="stable")]
+
+
+class EmbeddingStore:
+    """Content-hash keyed embedding cache persisted as one `embeddings.npz` (keys + vectors)."""
+
+    def __init__(self, cache_dir: Optional[str]) -> None:
+        """Open (or lazily create) the store.
+
+        Args:
+            cache_dir: Directory for the cache file; None keeps vectors in memory only.
+        """
+        self.cache_dir = cache_dir
+        self._row: Dict[str, int] = {}
+        self._vecs: Optional[np.ndarray] = None
+        if cache_dir:
+            self._load()
+
+    def _path(self) -> str:
+        """Return the cache file path."""
+        assert self.cache_dir
+        return os.path.join(self.cache_dir, "embeddings.npz")
+
+    def _load(self) -> None:
+        """Load the existing cache file; a missing or unreadable cache starts empty."""
+        try:
+            with np.load(self._path(), allow_pickle=False) as z:
+                keys = z["keys"].tolist()
+                vecs = z["vectors"]
+        except FileNotFoundError:
+            return
+        except Exception as e:
+            log.warning("ignoring unreadable embedding cache in %s: %s", self.cache_dir, e)
+            return
+        if len(keys) != vecs.shape[0]:
+            log.warning("embedding cache in %s is inconsistent; ignoring it", self.cache_dir)
+            return
+        self._row = {k: i for i, k in enumerate(keys)}
+        self._vecs = vecs
+
+    def _save(self) -> None:
+        """Write keys and vectors into one file replaced atomically.
+
+        A single rename keeps keys and vectors from the same writer together even
+        when several processes rebuild the cache concurrently (last writer wins).
+        """
+        if not self.cache_dir or self._vecs is None:
+            return
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = self._path()
+        tmp = f"{path}.tmp_{uuid.uuid4().hex[:6]}.npz"
+        keys = np.array(sorted(self._row, key=self._row.__getitem__), dtype=str)
+        np.savez(tmp, keys=keys, vectors=np.asarray(self._vecs))
+        os.replace(tmp, path)
+
+    def get_many(self, texts: List[str], model: str, embed_fn: EmbedFn) -> np.ndarray:
+        """Return raw embeddings for `texts`, embedding (and persisting) only unseen ones.
+
+        Args:
+            texts: Documents to embed.
+            model: Embedder identifier used in the cache key.
+            embed_fn: Function embedding a list of texts.
+
+        Returns:
+            A (len(texts), dim) float32 matrix in input order.
+        """
+        keys = [content_key(t, model) for t in texts]
+        missing = list(dict.fromkeys(k for k in keys if k not in self._row))
+        if missing:
+            by_key = dict(zip(keys, texts))
+            new = np.asarray(embed_fn([by_key[k] for k in missing]), dtype=np.float32)
+            base = 0 if self._vecs is None else self._vecs.shape[0]
+            self._vecs = new if self._vecs is None else np.concatenate([np.asarray(self._vecs), new], axis=0)
+            self._row.update({k: base + i for i, k in enumerate(missing)})
+            self._save()
+            log.info("embedded %d new documents (%d cached)", len(missing), len(set(keys)) - len(missing))
+        assert self._vecs is not None or not texts
+        if not texts:
+            return np.empty((0, 0), dtype=np.float32)
+        return np.asarray(self._vecs[[self._row[k] for k in keys]], dtype=np.float32)
+
+
+class VectorIndex:
+    """Cosine-similarity index over a normalized float32 matrix, exact or IVF."""
+
+    def __init__(
+        self,
+        embed_fn: EmbedFn,
+        *,
+        model: str = "default",
+        cache_dir: Optional[str] = None,
+        mode: str = "exact",
+        ivf_min_docs: int = 20_000,
+        n_lists: Optional[int] = None,
+        n_probe: int = 8,
+        seed: int = 0,
+    ) -> None:
+        """Create an empty index.
+
+        Args:
+            embed_fn: Function embedding a list of texts.
+            model: Embedder identifier (part of the embedding cache key).
+            cache_dir: Where embeddings are persisted; None disables persistence.
+            mode: "exact", "ivf", or "auto" (IVF once the corpus has `ivf_min_docs` documents).
+            ivf_min_docs: Corpus size at which "auto" switches to IVF.
+            n_lists: IVF cluster count (default ~sqrt(N)).
+            n_probe: IVF clusters scanned per query.
+            seed: RNG seed for k-means initialization.
+        """
+        if mode not in ("exact", "ivf", "auto"):
+            raise ValueError(f"unknown mode: {mode}")
+        self.embed_fn = embed_fn
+        self.model = model
+        self.mode = mode
+        self.ivf_min_docs = ivf_min_docs
+        self.n_lists = n_lists
+        self.n_probe = n_probe
+        self.seed = seed
+        self.store = EmbeddingStore(cache_dir)
+        self.ids: List[str] = []
+        self.matrix = np.empty((0, 0), dtype=np.float32)
+        self._centroids: Optional[np.ndarray] = None
+        self._lists: List[np.ndarray] = []
+
+    def build(self, docs: Dict[str, str]) -> "VectorIndex":
+        """(Re)build the index over `docs` (id -> text), reusing cached embeddings.
+
+        Args:
+            docs: Mapping of document id to text.
+
+        Returns:
+            The index itself.
+        """
+        self.ids = list(docs)
+        raw = self.store.get_many(list(docs.values()), self.model, self.embed_fn)
+        self.matrix = _normalize(raw) if len(self.ids) else np.empty((0, 0), dtype=np.float32)
+        use_ivf = self.mode == "ivf" or (self.mode == "auto" and len(self.ids) >= self.ivf_min_docs)
+        if use_ivf and len(self.ids) > 1:
+            self._train_ivf()
+        else:
+            self._centroids, self._lists = None, []
+        return self
+
+    def _train_ivf(self, iters: int = 10) -> None:
+        """Spherical k-means coarse quantizer and the per-cluster row lists."""
+        n = self.matrix.shape[0]
+        k = max(1, min(n, self.n_lists or int(np.sqrt(n))))
+        rng = np.random.default_rng(self.seed)
+        cent = self.matrix[rng.choice(n, k, replace=False)].copy()
+        for _ in range(iters):
+            assign = np.argmax(self.matrix @ cent.T, axis=1)
+            sums = np.zeros_like(cent)
+            np.add.at(sums, assign, self.matrix)
+            empty = np.bincount(assign, minlength=k) == 0
+            sums[empty] = cent[empty]  # keep empty clusters where they are
+            cent = _normalize(sums)
+        assign = np.argmax(self.matrix @ cent.T, axis=1)
+        order = np.argsort(assign, kind="stable")
+        bounds = np.searchsorted(assign[order], np.arange(k + 1))
+        self._centroids = cent
+        self._lists = [order[bounds[i]:bounds[i + 1]] for i in range(k)]
+
+    def search(self, query_vec: Sequence[float], top_k: int = 3) -> list[tuple[str, float]]:
+        """Return the `top_k` most similar documents to `query_vec`.
+
+        Args:
+            query_vec: Raw (unnormalized) query embedding.
+            top_k: Maximum number of results.
+
+        Returns:
+            A list of (document_id, cosine score) tuples sorted by score (desc).
+        """
+        if not self.ids or top_k <= 0:
+            return []
+        q = _normalize(np.asarray(query_vec, dtype=np.float32)[None, :])[0]
+        if self._centroids is None:
+            scores = self.matrix @ q
+            rows = _top_k(scores, top_k)
+            return [(self.ids[i], float(scores[i])) for i in rows]
+        probe = _top_k(self._centroids @ q, self.n_probe)
+        cand = np.concatenate([self._lists[c] for c in probe])
+        scores = self.matrix[cand] @ q
+        best = _top_k(scores, top_k)
+        return [(self.ids[cand[i]], float(scores[i])) for i in best]
+
@@ -0,0 +1,290 @@
+from __future__ import annotations
+"""
+inference_batcher
+-----------------
+In-process micro-batching front-end for `ModelRunner`.
+
+At candle close every (symbol, tf) asks for a prediction at nearly the same
+moment, each with a one-row frame. `MicroBatcher` queues those requests, waits
+at most `max_wait_ms` (or until `max_batch_rows` rows are pending), runs a
+single vectorized `predict_proba_array` over the concatenated rows and hands
+every caller its own slice back.
+
+- Thread callers: `predict_proba(X)` (blocking) or `submit(X)` → Future.
+- asyncio callers: `await apredict_proba(X)`.
+- Feature selection/ordering happens in the caller's thread through the
+  runner's cached column mapping, so the batching thread only stacks arrays.
+
+Observability (Prometheus, no-op if unavailable): queue-time and batch-size
+histograms plus a request counter; the same numbers are kept in `stats`.
+"""
+
+import asyncio
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+try:
+    from prometheus_client import Counter, Histogram  # type: ignore
+except Exception:  # pragma: no cover
+    Counter = None  # type: ignore
+    Histogram = None  # type: ignore
+
+log = logging.getLogger("signals.inference_batcher")
+
+# -------- Observability (Prometheus) --------
+_QUEUE_SECONDS = (
+    Histogram("inference_batcher_queue_seconds",
+              "Time a request waits before its batch starts.",
+              buckets=(0.0005, 0.001, 0.002, 0.005, 0.01, 0.02, 0.05, 0.1, 0.25))
+    if Histogram else None
+)
+_BATCH_ROWS = (
+    Histogram("inference_batcher_batch_rows",
+              "Rows per vectorized predict_proba call.",
+              buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024, 4096))
+    if Histogram else None
+)
+_REQUESTS = (
+    Counter("inference_batcher_requests_total",
+            "Requests served by the micro-batcher.", ["outcome"])
+    if Counter else None
+)
+
+
+def _observe(metric: Any, value: float) -> None:
+    """Best-effort histogram observation."""
+    if metric:
+        try:
+            metric.observe(value)
+        except Exception:
+            pass
+
+
+@dataclass
+class BatcherStats:
+    """In-process counters mirroring the Prometheus metrics."""
+    requests: int = 0
+    batches: int = 0
+    rows: int = 0
+    errors: int = 0
+    queue_seconds_total: float = 0.0
+    max_batch_rows: int = 0
+    batch_sizes: Dict[int, int] = field(default_factory=dict)
+
+    @property
+    def mean_batch_rows(self) -> float:
+        """Average rows per batch."""
+        return self.rows / self.batches if self.batches else 0.0
+
+
+@dataclass
+class _Request:
+    """One queued prediction request."""
+    arr: np.ndarray
+    future: Future
+    t_enq: float
+
+
+_STOP = object()
+
+
+class MicroBatcher:
+    """Collects concurrent prediction requests and serves them with one model call per batch."""
+
+    def __init__(self, runner: Any, *, max_batch_rows: int = 512, max_wait_ms: float = 2.0) -> None:
+        """Start the batching thread for `runner` (a `ModelRunner` or anything with the same API)."""
+        self.runner = runner
+        self.max_batch_rows = max(1, int(max_batch_rows))
+        self.max_wait_s = max(0.0, float(max_wait_ms)) / 1000.0
+        self.stats = BatcherStats()
+        self._q: "queue.Queue[Any]" = queue.Queue()
+        self._closed = False
+        # Guards `_closed` + enqueue so nothing can be queued behind the stop marker.
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._loop, name="inference-batcher", daemon=True)
+        self._thread.start()
+
+    # ---------- public API ----------
+    def submit(self, X: pd.DataFrame | np.ndarray) -> Future:
+        """Queue `X` (frame, or an already ordered float matrix) and return a Future of its probabilities.
+
+        Rows are kept in the runner's input dtype (float32 for ONNX), so batches
+        reach the model without an extra cast.
+        """
+        if self._closed:
+            raise RuntimeError("MicroBatcher is closed")
+        arr = X if isinstance(X, np.ndarray) else self.runner._select_and_order(X)
+        arr = np.atleast_2d(np.asarray(arr, dtype=getattr(self.runner, "_input_dtype", float)))
+        fut: Future = Future()
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("MicroBatcher is closed")
+            self._q.put(_Request(arr, fut, time.perf_counter()))
+        return fut
+
+    def predict_proba(self, X: pd.DataFrame | np.ndarray, timeout: Optional[float] = None) -> np.ndarray:
+        """Blocking batched `predict_proba`."""
+        return self.submit(X).result(timeout=timeout)
+
+    async def apredict_proba(self, X: pd.DataFrame | np.ndarray) -> np.ndarray:
+        """Awaitable batched `predict_proba`."""
+        return await asyncio.wrap_future(self.submit(X))
+
+    def close(self, timeout: Optional[float] = 5.0) -> None:
+        """Serve everything already queued, then stop the batching thread."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._q.put(_STOP)
+        self._thread.join(timeout=timeout)
+
+    def __enter__(self) -> "MicroBatcher":
+        """Context-manager entry."""
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        """Context-manager exit; drains and stops the thread."""
+        self.close()
+
+    # ---------- batching thread ----------
+    def _collect(self, first: _Request) -> tuple[List[_Request], bool]:
+        """Gather requests until the row cap or the first request's deadline; return (batch, stop_seen)."""
+        batch = [first]
+        rows = first.arr.shape[0]
+        deadline = first.t_enq + self.max_wait_s
+        while rows < self.max_batch_rows:
+            remaining = deadline - time.perf_counter()
+            try:
+                item = self._q.get(timeout=remaining) if remaining > 0 else self._q.get_nowait()
+            except queue.Empty:
+                break
+            if item is _STOP:
+                return batch, True
+            batch.append(item)
+            rows += item.arr.shape[0]
+        return batch, False
+
+    def _loop(self) -> None:
+        """Thread body: block for a request, collect a batch, run it, repeat."""
+        while True:
+            item = self._q.get()
+            if item is _STOP:
+                self._drain()
+                return
+            batch, stop = self._collect(item)
+            self._run(batch)
+            if stop:
+                self._drain()
+                return
+
+    def _drain(self) -> None:
+        """Fail anything still queued once the stop marker was consumed.
+
+        `close()` enqueues the marker under the same lock as `submit()`, so every
+        accepted request is served before it; this only guards against leaks.
+        """
+        while True:
+            try:
+                item = self._q.get_nowait()
+            except queue.Empty:
+                break
+            if item is not _STOP and not item.future.done():
+                item.future.set_exception(RuntimeError("MicroBatcher is closed"))
+                self._count("error", 1)
+
+    def _run(self, batch: List[_Request]) -> None:
+        """Run one model call per feature width in `batch` and scatter the results."""
+        t_start = time.perf_counter()
+        groups: Dict[int, List[_Request]] = {}
+        for r in batch:
+            groups.setdefault(r.arr.shape[1], []).append(r)
+            wait = t_start - r.t_enq
+            self.stats.queue_seconds_total += wait
+            _observe(_QUEUE_SECONDS, wait)
+        self.stats.requests += len(batch)
+        for reqs in groups.values():
+            arr = reqs[0].arr if len(reqs) == 1 else np.concatenate([r.arr for r in reqs], axis=0)
+            n = arr.shape[0]
+            self.stats.batches += 1
+            self.stats.rows += n
+            self.stats.max_batch_rows = max(self.stats.max_batch_rows, n)
+            self.stats.batch_sizes[n] = self.stats.batch_sizes.get(n, 0) + 1
+            _observe(_BATCH_ROWS, n)
+            try:
+                p = np.asarray(self.runner.predict_proba_array(arr))
+            except Exception as e:
+                self.stats.errors += len(reqs)
+                log.warning("batched predict_proba failed for %d rows: %s", n, e)
+                for r in reqs:
+                    r.future.set_exception(e)
+                self._count("error", len(reqs))
+                continue
+            offsets = np.cumsum([0] + [r.arr.shape[0] for r in reqs])
+            for r, a, b in zip(reqs, offsets[:-1], offsets[1:]):
+                r.future.set_result(p[a:b])
+            self._count("ok", len(reqs))
+
+    @staticmethod
+    def _count(outcome: str, n: int) -> None:
+        """Best-effort request counter."""
+        if _REQUESTS:
+            try:
+                _REQUESTS.labels(outcome=outcome).inc(n)
+            except Exception:
+                pass
+
+
+def _bench(n_requests: int = 2000, n_features: int = 32, concurrency: int = 64) -> Dict[str, float]:
+    """Requests/sec of direct per-request `predict_proba` vs the micro-batcher (sklearn LogisticRegression)."""
+    import os
+    import tempfile
+    from concurrent.futures import ThreadPoolExecutor
+
+    import joblib
+    from sklearn.linear_model import LogisticRegression
+
+    from signals.model_runner import ModelRunner, ModelRunnerConfig
+
+    rng = np.random.default_rng(0)
+    cols = [f"f{i}" for i in range(n_features)]
+    Xtr = rng.normal(size=(2000, n_features))
+    clf = LogisticRegression(max_iter=200).fit(Xtr, (Xtr[:, 0] > 0).astype(int))
+    path = os.path.join(tempfile.mkdtemp(), "m.joblib")
+    joblib.dump(clf, path)
+    runner = ModelRunner(ModelRunnerConfig(model_path=path, feature_order=cols))
+    frames = [pd.DataFrame(rng.normal(size=(1, n_features)), columns=cols) for _ in range(n_requests)]
+
+    out: Dict[str, float] = {}
+    with ThreadPoolExecutor(concurrency) as pool:
+        t0 = time.perf_counter()
+        list(pool.map(runner.predict_proba, frames))
+        out["direct_req_per_s"] = n_requests / (time.perf_counter() - t0)
+        with MicroBatcher(runner, max_batch_rows=256, max_wait_ms=2.0) as mb:
+            t0 = time.perf_counter()
+            list(pool.map(mb.predict_proba, frames))
+            out["batched_req_per_s"] = n_requests / (time.perf_counter() - t0)
+            out["mean_batch_rows"] = mb.stats.mean_batch_rows
+            out["mean_queue_ms"] = mb.stats.queue_seconds_total / max(mb.stats.requests, 1) * 1000
+    return out
+
+
+if __name__ == "__main__":  # pragma: no cover
+    import argparse
+    import json
+
+    logging.basicConfig(level=logging.INFO)
+    ap = argparse.ArgumentParser(description="Benchmark the ModelRunner micro-batcher")
+    ap.add_argument("--requests", type=int, default=2000)
+    ap.add_argument("--features", type=int, default=32)
+    ap.add_argument("--concurrency", type=int, default=64)
+    ns = ap.parse_args()
+    log.info(json.dumps(_bench(ns.requests, ns.features, ns.concurrency), indent=2))
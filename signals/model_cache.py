@@ -0,0 +1,416 @@
+from __future__ import annotations
+"""
+model_cache
+-----------
+Hot-swappable model serving driven by `signals.registry`.
+
+`ModelRunner` loads one artifact in its constructor, so switching the active
+model in the registry used to need a restart. `ModelCache` watches the registry
+file instead and keeps the serving models current:
+
+- A watcher thread polls `REGISTRY_FILE` by mtime (call `notify()` to wake it
+  immediately, e.g. from a registry event consumer).
+- New artifacts are loaded and warmed up in that thread; requests keep hitting
+  the previous models until the new routing table is published with a single
+  reference swap, so in-flight predictions are never blocked.
+- Recently used runners stay in an LRU, so a registry rollback swaps back
+  without reloading.
+- When the active entry is a canary with `traffic_pct < 100`, that share of
+  keys is routed to it and the rest to the last promoted production model.
+  Routing hashes the request key (e.g. "BTCUSDT:1h"), so a key always sees the
+  same model for a given canary.
+
+Artifacts resolve to `<registry dir>/<model_id>.pkl` like `ModelRegistry.register`
+checks; the registry entry's `meta` may override `artifact`, `model_type` and
+`feature_order`. Pass `runner_factory` to build runners differently.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from signals import registry as _registry
+from signals.model_runner import ModelRunner, ModelRunnerConfig
+
+try:
+    from prometheus_client import Counter, Histogram  # type: ignore
+except Exception:  # pragma: no cover
+    Counter = None  # type: ignore
+    Histogram = None  # type: ignore
+
+log = logging.getLogger("signals.model_cache")
+
+# -------- Observability (Prometheus) --------
+_SWAPS = (
+    Counter("model_cache_swaps_total", "Routing tables published by the model cache.")
+    if Counter else None
+)
+_LOADS = (
+    Counter("model_cache_loads_total", "Model loads by outcome (ok/error/lru_hit).", ["outcome"])
+    if Counter else None
+)
+_LOAD_SECONDS = (
+    Histogram("model_cache_load_seconds", "Background load + warm-up latency in seconds.")
+    if Histogram else None
+)
+_ROUTED = (
+    Counter("model_cache_routed_total", "Requests routed by role.", ["role"])
+    if Counter else None
+)
+
+_BUCKETS = 10_000  # routing resolution: 0.01% of traffic
+
+
+def _inc(metric: Any, **labels: str) -> None:
+    """Best-effort counter increment."""
+    if metric:
+        try:
+            (metric.labels(**labels) if labels else metric).inc()
+        except Exception:
+            pass
+
+
+def canary_bucket(key: str, salt: str = "") -> int:
+    """Stable bucket in [0, 10000) for `key`; `salt` (the canary id) gives each rollout its own cohort."""
+    h = hashlib.blake2b(f"{salt}\x00{key}".encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(h, "big") % _BUCKETS
+
+
+@dataclass(frozen=True)
+class Routing:
+    """Immutable routing table; replaced as a whole on every swap."""
+    primary_id: Optional[str]
+    primary: Any
+    canary_id: Optional[str] = None
+    canary: Any = None
+    traffic_pct: float = 0.0
+    version: int = 0  # registry mtime_ns this table was built from
+
+    def pick(self, key: Optional[str]) -> Tuple[Optional[str], Any, str]:
+        """Return (model_id, runner, role) for `key`; keyless requests go to the primary."""
+        if self.canary is not None and key is not None:
+            if canary_bucket(key, self.canary_id or "") < self.traffic_pct * (_BUCKETS / 100.0):
+                return self.canary_id, self.canary, "canary"
+        return self.primary_id, self.primary, "primary"
+
+
+def _previous_production(reg: Dict[str, Any], exclude: str) -> Optional[str]:
+    """Last promoted model other than `exclude` (same lookup as `ModelRegistry.rollback`)."""
+    for ev in reversed(reg.get("history", [])):
+        if ev.get("event") == "promote" and ev.get("model_id") != exclude and ev.get("model_id") in reg.get("models", {}):
+            return ev["model_id"]
+    return None
+
+
+def plan_routing(reg: Dict[str, Any]) -> Tuple[Optional[str], Optional[str], float]:
+    """Resolve a registry document into (primary_id, canary_id, canary traffic_pct).
+
+    A production (or 100%) active model serves everything. A canary below 100%
+    gets its share and the previous production model serves the rest; without
+    one the canary serves everything.
+    """
+    active = reg.get("active") or {}
+    model_id = active.get("model_id")
+    if not model_id:
+        return None, None, 0.0
+    pct = float(active.get("traffic_pct", 100))
+    if active.get("stage") != "canary" or pct >= 100:
+        return model_id, None, 0.0
+    base = _previous_production(reg, model_id)
+    if base is None:
+        return model_id, None, 0.0
+    return base, model_id, max(0.0, pct)
+
+
+class ModelCache:
+    """Registry-driven model cache with background loading, atomic swaps and canary routing."""
+
+    def __init__(
+        self,
+        registry_file: Optional[str] = None,
+        *,
+        runner_factory: Optional[Callable[[str, Dict[str, Any]], Any]] = None,
+        poll_interval_s: float = 2.0,
+        lru_size: int = 4,
+        warmup_rows: Tuple[int, ...] = (1,),
+    ) -> None:
+        """Create the cache; call `start()` (or use it as a context manager) to load and begin watching.
+
+        `runner_factory(model_id, registry_entry)` must return a warmed-up object
+        with `predict_proba` / `predict_proba_array`; the default builds a
+        `ModelRunner` from the registry entry.
+        """
+        self.registry_file = registry_file or _registry.REGISTRY_FILE
+        self.artifacts_dir = os.path.dirname(self.registry_file) or "."
+        self.runner_factory = runner_factory or self._default_factory
+        self.poll_interval_s = max(0.05, float(poll_interval_s))
+        self.lru_size = max(1, int(lru_size))
+        self.warmup_rows = tuple(warmup_rows)
+        self._routing = Routing(None, None)
+        self._lru: "OrderedDict[str, Tuple[Any, Any]]" = OrderedDict()  # model_id -> (artifact stamp, runner)
+        self._refresh_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._failed_version: Optional[int] = None
+        self.swaps = 0
+        self.load_errors = 0
+
+    # ---------- lifecycle ----------
+    def start(self) -> "ModelCache":
+        """Load the current registry state synchronously, then start the watcher thread."""
+        self.refresh()
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._watch, name="model-cache-watch", daemon=True)
+            self._thread.start()
+        return self
+
+    def close(self, timeout: Optional[float] = 5.0) -> None:
+        """Stop the watcher thread; loaded runners stay usable."""
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
+            self._thread = None
+
+    def __enter__(self) -> "ModelCache":
+        """Context-manager entry; starts the cache."""
+        return self.start()
+
+    def __exit__(self, *exc: Any) -> None:
+        """Context-manager exit; stops the watcher."""
+        self.close()
+
+    def notify(self) -> None:
+        """Wake the watcher now instead of at the next poll (for event-driven callers)."""
+        self._wake.set()
+
+    # ---------- serving ----------
+    @property
+    def routing(self) -> Routing:
+        """The routing table currently in effect."""
+        return self._routing
+
+    def runner_for(self, key: Optional[str] = None) -> Tuple[Optional[str], Any]:
+        """Return (model_id, runner) that should serve `key`."""
+        model_id, runner, role = self._routing.pick(key)
+        if runner is None:
+            raise RuntimeError("no model loaded (registry has no active model)")
+        _inc(_ROUTED, role=role)
+        return model_id, runner
+
+    def predict_proba(self, X: pd.DataFrame, key: Optional[str] = None) -> np.ndarray:
+        """`predict_proba` on the model routed for `key`."""
+        return self.runner_for(key)[1].predict_proba(X)
+
+    def predict_proba_array(self, arr: np.ndarray, key: Optional[str] = None) -> np.ndarray:
+        """`predict_proba_array` on the model routed for `key`."""
+        return self.runner_for(key)[1].predict_proba_array(arr)
+
+    # ---------- loading ----------
+    def _registry_version(self) -> Optional[int]:
+        """mtime_ns of the registry file (None if it does not exist yet)."""
+        try:
+            return os.stat(self.registry_file).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def _artifact_path(self, model_id: str, entry: Dict[str, Any]) -> str:
+        """Artifact location for a registry entry (`meta.artifact` or `<dir>/<model_id>.pkl`)."""
+        meta = entry.get("meta") or {}
+        return meta.get("artifact") or os.path.join(self.artifacts_dir, f"{model_id}.pkl")
+
+    def _artifact_stamp(self, model_id: str, entry: Dict[str, Any]) -> Any:
+        """Identity of the artifact on disk; a re-exported file with the same id gets reloaded."""
+        try:
+            st = os.stat(self._artifact_path(model_id, entry))
+            return st.st_mtime_ns, st.st_size
+        except OSError:
+            return None
+
+    def _default_factory(self, model_id: str, entry: Dict[str, Any]) -> ModelRunner:
+        """Build a warmed-up `ModelRunner` for a registry entry."""
+        meta = entry.get("meta") or {}
+        return ModelRunner(ModelRunnerConfig(
+            model_path=self._artifact_path(model_id, entry),
+            model_type=meta.get("model_type", "sklearn"),
+            feature_order=meta.get("feature_order"),
+            warmup_rows=self.warmup_rows,
+        ))
+
+    def _get_runner(self, model_id: str, entry: Dict[str, Any]) -> Any:
+        """Runner for `model_id` from the LRU, or freshly loaded and warmed up."""
+        stamp = self._artifact_stamp(model_id, entry)
+        hit = self._lru.get(model_id)
+        if hit is not None and hit[0] == stamp:
+            self._lru.move_to_end(model_id)
+            _inc(_LOADS, outcome="lru_hit")
+            return hit[1]
+        t0 = time.perf_counter()
+        try:
+            runner = self.runner_factory(model_id, entry)
+        except Exception:
+            _inc(_LOADS, outcome="error")
+            raise
+        if _LOAD_SECONDS:
+            try:
+                _LOAD_SECONDS.observe(time.perf_counter() - t0)
+            except Exception:
+                pass
+        _inc(_LOADS, outcome="ok")
+        log.info("loaded model %s in %.3fs", model_id, time.perf_counter() - t0)
+        self._lru[model_id] = (stamp, runner)
+        self._lru.move_to_end(model_id)
+        return runner
+
+    def _evict(self, pinned: Tuple[Optional[str], ...]) -> None:
+        """Trim the LRU to `lru_size`, never dropping models that are currently routed."""
+        for model_id in list(self._lru):
+            if len(self._lru) <= self.lru_size:
+                break
+            if model_id not in pinned:
+                del self._lru[model_id]
+
+    def _read(self) -> Optional[Dict[str, Any]]:
+        """Read the registry JSON; None if missing or mid-write/corrupt (keep serving the current models)."""
+        try:
+            with open(self.registry_file, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, json.JSONDecodeError) as e:
+            log.warning("could not read registry %s: %s", self.registry_file, e)
+            return None
+
+    def refresh(self, force: bool = False) -> bool:
+        """Reload routing if the registry changed (or `force`); return True if a new table was published.
+
+        Loading and warm-up happen here, before the swap; on failure the
+        current routing stays in place and the change is retried next poll.
+        """
+        with self._refresh_lock:
+            version = self._registry_version()
+            if version is None or (not force and version == self._routing.version):
+                return False
+            reg = self._read()
+            if reg is None:
+                return False
+            primary_id, canary_id, pct = plan_routing(reg)
+            models = reg.get("models", {})
+            try:
+                primary = self._get_runner(primary_id, models.get(primary_id, {})) if primary_id else None
+                canary = self._get_runner(canary_id, models.get(canary_id, {})) if canary_id else None
+            except Exception as e:
+                self.load_errors += 1
+                # warn once per registry version; later polls retry quietly
+                (log.debug if self._failed_version == version else log.warning)(
+                    "model load failed (keeping %s): %s", self._routing.primary_id, e)
+                self._failed_version = version
+                return False
+            self._failed_version = None
+            self._routing = Routing(primary_id, primary, canary_id, canary, pct, version)  # atomic publish
+            self._evict((primary_id, canary_id))
+            self.swaps += 1
+            _inc(_SWAPS)
+            log.info("routing: primary=%s canary=%s traffic_pct=%s", primary_id, canary_id, pct)
+            return True
+
+    def _watch(self) -> None:
+        """Watcher thread: poll the registry mtime (or wake on `notify`) and refresh."""
+        while not self._stop.is_set():
+            self._wake.wait(self.poll_interval_s)
+            self._wake.clear()
+            if self._stop.is_set():
+                return
+            try:
+                self.refresh()
+            except Exception as e:  # never let the watcher die
+                log.warning("model cache refresh error: %s", e)
+
+
+def _bench(seconds: float = 3.0, n_features: int = 16, threads: int = 8) -> Dict[str, float]:
+    """Hammer `predict_proba_array` from several threads while the registry flips models; report latency/swaps."""
+    import tempfile
+    from concurrent.futures import ThreadPoolExecutor
+
+    import joblib
+    from sklearn.linear_model import LogisticRegression
+
+    rng = np.random.default_rng(0)
+    d = tempfile.mkdtemp()
+    Xtr = rng.normal(size=(2000, n_features))
+    for i, mid in enumerate(("model_a", "model_b")):
+        clf = LogisticRegression(max_iter=200).fit(Xtr, (Xtr[:, i] > 0).astype(int))
+        joblib.dump(clf, os.path.join(d, f"{mid}.pkl"))
+    reg_file = os.path.join(d, "model_registry.json")
+
+    def write(active: str, stage: str, pct: int) -> None:
+        """Write a registry document with `model_a` as the promoted baseline."""
+        doc = {
+            "active": {"model_id": active, "stage": stage, "traffic_pct": pct},
+            "models": {m: {"stage": "production", "traffic_pct": 100, "meta": {}} for m in ("model_a", "model_b")},
+            "history": [{"event": "promote", "model_id": "model_a"}],
+        }
+        _registry._atomic_write(reg_file, json.dumps(doc))
+
+    write("model_a", "production", 100)
+    X = rng.normal(size=(1, n_features))
+    lat: list = []
+    stop = threading.Event()
+
+    def worker(t: int) -> None:
+        """Issue keyed predictions until stopped."""
+        i = 0
+        while not stop.is_set():
+            t0 = time.perf_counter()
+            cache.predict_proba_array(X, key=f"SYM{t}:{i % 50}")
+            lat.append(time.perf_counter() - t0)
+            i += 1
+
+    with ModelCache(reg_file, poll_interval_s=0.05, lru_size=2) as cache:
+        with ThreadPoolExecutor(threads) as pool:
+            futs = [pool.submit(worker, t) for t in range(threads)]
+            t_end = time.time() + seconds
+            flip = 0
+            while time.time() < t_end:
+                time.sleep(0.1)
+                flip += 1
+                if flip % 2:
+                    write("model_b", "canary", 20)
+                else:
+                    write("model_a", "production", 100)
+                time.sleep(0.001)  # distinct mtime on coarse filesystems
+            stop.set()
+            for f in futs:
+                f.result()
+        a = np.asarray(lat) * 1e3
+        return {
+            "requests": float(a.size),
+            "swaps": float(cache.swaps),
+            "load_errors": float(cache.load_errors),
+            "p50_ms": float(np.percentile(a, 50)),
+            "p99_ms": float(np.percentile(a, 99)),
+            "max_ms": float(a.max()),
+        }
+
+
+if __name__ == "__main__":  # pragma: no cover
+    import argparse
+
+    logging.basicConfig(level=logging.INFO)
+    ap = argparse.ArgumentParser(description="Exercise registry-driven hot swaps under load")
+    ap.add_argument("--seconds", type=float, default=3.0)
+    ap.add_argument("--features", type=int, default=16)
+    ap.add_argument("--threads", type=int, default=8)
+    ns = ap.parse_args()
+    logging.info(json.dumps(_bench(ns.seconds, ns.features, ns.threads), indent=2))
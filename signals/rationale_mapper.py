@@ -4,14 +4,27 @@ rationale_mapper
 ----------------
 Maps feature attributions (SHAP or proxy) to a compact rationale payload with a stable ID.
 
+`explain_batch` attributes a whole frame at once: SHAP values come from one
+explainer call per batch (explainers are cached per model, built over a proper
+background sample), proxy contributions are a single array expression, top-k
+uses `argpartition` and rationale IDs are hashed from the selected arrays.
+`explain_row` is the one-row case of the same path.
+
+SHAP background: call `set_background(model, X_train)` before live use. Without
+it, rows seen so far are collected in a per-model reservoir sample; explainers
+over a partial reservoir are used once and not cached, and the explainer is
+only cached once `background_size` rows have been seen.
+
 Observability:
-- Prometheus counters for explain calls (by method) and SHAP fallbacks.
-- Prometheus histogram for end-to-end latency of `explain_row`.
+- Prometheus counters for explained rows (by method) and SHAP fallbacks.
+- Prometheus histogram for explain latency, labelled by method.
 """
 
+from collections import OrderedDict
 from dataclasses import dataclass
 from typing import Dict, List, Any, Optional, Tuple
 import hashlib
+import threading
 import numpy as np
 import pandas as pd
 import time
@@ -35,7 +48,8 @@ _EXPLAIN_COUNT = (
 _EXPLAIN_SECONDS = (
     Histogram(
         "rationale_mapper_explain_seconds",
-        "Latency of explain_row in seconds.",
+        "Latency of explain_row / explain_batch in seconds.",
+        ["method"],  # shap | proxy
     )
     if Histogram
     else None
@@ -58,10 +72,43 @@ class RationaleConfig:
         top_k: تعداد ویژگی‌های برتر در خروجی.
         use_shap: در صورت موجود بودن SHAP از آن استفاده شود.
         normalize: نرمال‌سازی مقادیر به طوری که جمع قدرمطلق‌ها برابر 1 شود.
+        background_size: rows sampled as the SHAP background when none was set explicitly.
+        explainer_cache_size: number of models whose explainers are kept.
+        seed: RNG seed for background sampling.
     """
     top_k: int = 5
     use_shap: bool = True
     normalize: bool = True
+    background_size: int = 100
+    explainer_cache_size: int = 8
+    seed: int = 0
+
+
+def _row_sum(a: np.ndarray) -> np.ndarray:
+    """Row sums (rows x 1) accumulated column by column, so a row sums identically in any batch size.
+
+    `a.sum(axis=1)` may change summation order with the number of rows; the
+    last-ulp differences would change rationale IDs between `explain_row` and
+    `explain_batch`.
+    """
+    s = np.zeros((a.shape[0], 1))
+    for j in range(a.shape[1]):
+        s[:, 0] += a[:, j]
+    return s
+
+
+def _record(method: str, rows: int, t0: float) -> None:
+    """Best-effort explain metrics: rows explained and latency, both by method."""
+    if _EXPLAIN_COUNT:
+        try:
+            _EXPLAIN_COUNT.labels(method=method).inc(rows)
+        except Exception:
+            pass
+    if _EXPLAIN_SECONDS:
+        try:
+            _EXPLAIN_SECONDS.labels(method=method).observe(time.time() - t0)
+        except Exception:
+            pass
 
 
 class RationaleMapper:
@@ -78,99 +125,238 @@ class RationaleMapper:
             self._has_shap = True
         except Exception:
             self._has_shap = False
+        # id(model) -> (model, value); holding the model keeps its id from being reused
+        self._explainers: "OrderedDict[int, Tuple[Any, Any]]" = OrderedDict()
+        self._backgrounds: Dict[int, Tuple[Any, np.ndarray]] = {}
+        # id(model) -> (model, reservoir rows, rows seen) until `background_size` rows were seen
+        self._reservoirs: "OrderedDict[int, Tuple[Any, np.ndarray, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._rng = np.random.default_rng(cfg.seed)
+
+    # ---------- SHAP ----------
+    def _sample(self, arr: np.ndarray) -> np.ndarray:
+        """Up to `background_size` rows of `arr`, sampled without replacement."""
+        n = self.cfg.background_size
+        if len(arr) <= n:
+            return arr
+        return arr[np.sort(self._rng.choice(len(arr), n, replace=False))]
 
-    def _proxy_contrib(self, model: Any, x_row: pd.Series) -> Dict[str, float]:
-        """تخمین مشارکت ویژگی‌ها بدون SHAP.
+    def set_background(self, model: Any, X: pd.DataFrame | np.ndarray) -> None:
+        """Use rows of `X` (e.g. training data) as the SHAP background for `model`; drops its cached explainer."""
+        bg = self._sample(np.asarray(X, dtype=float))
+        with self._lock:
+            self._backgrounds[id(model)] = (model, bg)
+            self._explainers.pop(id(model), None)
+            self._reservoirs.pop(id(model), None)
+
+    def _reservoir(self, model: Any, arr: np.ndarray) -> Tuple[np.ndarray, bool]:
+        """Add `arr` to the reservoir sample of rows seen for `model`; return (background, full).
+
+        Caller holds the lock.
+        """
+        key, n = id(model), max(1, self.cfg.background_size)
+        entry = self._reservoirs.get(key)
+        if entry is None or entry[0] is not model or entry[1].shape[1] != arr.shape[1]:
+            entry = (model, np.empty((0, arr.shape[1])), 0)
+        _, res, seen = entry
+        take = min(n - len(res), len(arr))
+        if take > 0:
+            res = np.concatenate([res, arr[:take]], axis=0)
+        rest = arr[take:]
+        if len(rest):
+            # Algorithm R: row i (1-based over all rows seen) replaces a slot with probability n / i
+            j = self._rng.integers(0, seen + take + 1 + np.arange(len(rest)))
+            hit = j < n
+            res = res.copy()
+            res[j[hit]] = rest[hit]
+        seen += len(arr)
+        if len(res) >= n:
+            self._reservoirs.pop(key, None)
+            return res, True
+        self._reservoirs[key] = (model, res, seen)
+        self._reservoirs.move_to_end(key)
+        while len(self._reservoirs) > max(1, self.cfg.explainer_cache_size):
+            self._reservoirs.popitem(last=False)
+        return res, False
+
+    def _explainer(self, model: Any, arr: np.ndarray) -> Any:
+        """SHAP explainer for `model` over its background (explicit, or a reservoir of rows seen so far).
+
+        Only explainers over a full background are cached; until `background_size`
+        rows have been seen, each call builds a throwaway explainer.
+        """
+        key = id(model)
+        with self._lock:
+            hit = self._explainers.get(key)
+            if hit is not None and hit[0] is model:
+                self._explainers.move_to_end(key)
+                return hit[1]
+            bg_entry = self._backgrounds.get(key)
+            if bg_entry is not None and bg_entry[0] is model:
+                bg, cache = bg_entry[1], True
+            else:
+                bg, cache = self._reservoir(model, arr)
+        import shap
+        explainer = shap.Explainer(model, bg) if hasattr(model, "predict_proba") else shap.Explainer(model)
+        if not cache:
+            return explainer
+        with self._lock:
+            self._explainers[key] = (model, explainer)
+            self._explainers.move_to_end(key)
+            while len(self._explainers) > max(1, self.cfg.explainer_cache_size):
+                self._explainers.popitem(last=False)
+        return explainer
+
+    def _shap_values(self, model: Any, arr: np.ndarray) -> np.ndarray:
+        """SHAP values for all rows in one explainer call (rows x features, positive class for classifiers)."""
+        sv = self._explainer(model, arr)(arr)
+        values = np.asarray(sv.values if hasattr(sv, "values") else sv, dtype=float)
+        if values.ndim == 3:
+            values = values[:, :, -1]
+        if values.shape != arr.shape:
+            raise ValueError(f"unexpected SHAP output shape {values.shape} for input {arr.shape}")
+        return values
+
+    # ---------- proxy ----------
+    def _proxy_matrix(self, model: Any, arr: np.ndarray) -> np.ndarray:
+        """تخمین مشارکت ویژگی‌ها بدون SHAP، برای همه ردیف‌ها به‌صورت برداری.
 
         اولویت‌ها:
           1) مدل‌های خطی با coef_
           2) مدل‌های درختی با feature_importances_
-          3) نرمال‌سازی Z-score برای سایر مدل‌ها
+          3) نرمال‌سازی Z-score (در طول هر ردیف) برای سایر مدل‌ها
 
         Args:
             model: شیء مدل (sklearn-compatible).
-            x_row: داده‌ی تک‌ردیفه به صورت Series (ویژگی‌ها به عنوان ایندکس).
+            arr: ماتریس ویژگی‌ها (rows x features).
 
         Returns:
-            دیکشنری از نام ویژگی به مقدار مشارکت.
+            ماتریس مشارکت؛ برای ضرایب کوتاه‌تر از تعداد ویژگی‌ها فقط ستون‌های اول.
         """
-        contrib: Dict[str, float] = {}
-        if hasattr(model, "coef_"):
-            coefs = np.ravel(model.coef_)
-            features = x_row.index.tolist()
-            for i, f in enumerate(features[: len(coefs)]):
-                contrib[f] = float(coefs[i] * float(x_row[f]))
-        elif hasattr(model, "feature_importances_"):
-            imps = np.ravel(model.feature_importances_)
-            features = x_row.index.tolist()
-            for i, f in enumerate(features[: len(imps)]):
-                contrib[f] = float(imps[i] * float(x_row[f]))
+        for attr in ("coef_", "feature_importances_"):
+            if hasattr(model, attr):
+                w = np.ravel(getattr(model, attr))[: arr.shape[1]].astype(float)
+                return arr[:, : len(w)] * w
+        # Default: z-score magnitude as importance
+        m = max(arr.shape[1], 1)
+        mu = _row_sum(arr) / m
+        sd = np.sqrt(_row_sum((arr - mu) ** 2) / m)
+        return np.abs((arr - mu) / (sd + 1e-12))
+
+    # ---------- payloads ----------
+    def _payloads(self, contrib: np.ndarray, names: List[str]) -> List[Dict[str, Any]]:
+        """Normalize, take top-k per row with `argpartition` and hash rationale IDs from the selected arrays."""
+        if self.cfg.normalize:
+            s = _row_sum(np.abs(contrib))
+            s[s == 0] = 1.0
+            contrib = contrib / s
+        n_rows, m = contrib.shape
+        k = min(self.cfg.top_k, m)
+        if k <= 0:
+            rid = hashlib.sha256(b"").hexdigest()[:16]
+            return [{"top_features": [], "rationale_id": rid} for _ in range(n_rows)]
+        mag = np.abs(contrib)
+        if k < m:
+            idx = np.sort(np.argpartition(-mag, k - 1, axis=1)[:, :k], axis=1)
         else:
-            # Default: z-score magnitude as importance
-            z = (x_row - x_row.mean()) / (x_row.std(ddof=0) + 1e-12)
-            for f in x_row.index:
-                contrib[f] = float(abs(z[f]))
-        return contrib
+            idx = np.broadcast_to(np.arange(m), (n_rows, m))
+        # by |value| desc; stable over feature order for ties
+        order = np.argsort(-np.take_along_axis(mag, idx, axis=1), axis=1, kind="stable")
+        idx = np.take_along_axis(idx, order, axis=1)
+        vals = np.ascontiguousarray(np.take_along_axis(contrib, idx, axis=1))
 
-    def explain_row(self, model: Any, X_row: pd.Series) -> Dict[str, Any]:
-        """تولید rationale برای یک ردیف داده با استفاده از SHAP یا روش جایگزین.
+        name_arr = np.array(names, dtype=object)
+        enc_arr = np.array([n.encode("utf-8") for n in names], dtype=object)
+        out: List[Dict[str, Any]] = []
+        for r in range(n_rows):
+            row_idx, row_vals = idx[r], vals[r]
+            # stable rationale id: selected feature names + their float64 values
+            rid = hashlib.sha256(b"\x1f".join(enc_arr[row_idx]) + b"\x1e" + row_vals.tobytes()).hexdigest()[:16]
+            out.append({"top_features": list(zip(name_arr[row_idx].tolist(), row_vals.tolist())), "rationale_id": rid})
+        return out
+
+    def explain_batch(self, model: Any, X: pd.DataFrame) -> List[Dict[str, Any]]:
+        """تولید rationale برای همه ردیف‌های X در یک گذر برداری (SHAP یا روش جایگزین).
 
         Args:
             model: مدل آموزش‌دیده (sklearn/سایر).
-            X_row: سری شامل ویژگی‌های یک ردیف (ایندکس‌ها نام ویژگی‌ها).
+            X: دیتافریم ویژگی‌ها (ستون‌ها نام ویژگی‌ها).
 
         Returns:
-            Payload شامل:
+            یک payload به ازای هر ردیف، به همان ترتیب:
               - "top_features": لیست زوج‌های (feature, contribution) مرتب‌شده بر حسب |value|
               - "rationale_id": شناسه پایدار 16 کاراکتری بر اساس hash از top_features
         """
+        return self._explain_array(model, X.to_numpy(dtype=float), [str(c) for c in X.columns])
+
+    def _explain_array(self, model: Any, arr: np.ndarray, names: List[str]) -> List[Dict[str, Any]]:
+        """Shared body of `explain_batch` / `explain_row` over a float matrix and its column names."""
         _t0 = time.time()
         method = "proxy"
-        x = X_row.astype(float)
+        contrib: Optional[np.ndarray] = None
 
-        if self.cfg.use_shap and self._has_shap:
+        if self.cfg.use_shap and self._has_shap and len(arr):
             try:
-                import shap
-                if hasattr(model, "predict_proba"):
-                    explainer = shap.Explainer(model, np.array([x.values]))
-                else:
-                    explainer = shap.Explainer(model)
-                sv = explainer(np.array([x.values]))  # one row
-                values = sv.values[0] if hasattr(sv, "values") else np.ravel(sv)[0]
-                contrib = {f: float(values[i]) for i, f in enumerate(X_row.index)}
+                contrib = self._shap_values(model, arr)
                 method = "shap"
             except Exception:
-                contrib = self._proxy_contrib(model, x)
                 if _SHAP_FALLBACK_COUNT:
                     try:
                         _SHAP_FALLBACK_COUNT.inc()
                     except Exception:
                         pass
-        else:
-            contrib = self._proxy_contrib(model, x)
+        if contrib is None:
+            contrib = self._proxy_matrix(model, arr)
 
-        # normalize to sum=1 for comparability
-        if self.cfg.normalize:
-            s = sum(abs(v) for v in contrib.values()) or 1.0
-            contrib = {k: float(v / s) for k, v in contrib.items()}
-
-        # top-k features
-        top = sorted(contrib.items(), key=lambda kv: abs(kv[1]), reverse=True)[: self.cfg.top_k]
-        rationale_payload = {"top_features": top}
-        # stable rationale id
-        rid = hashlib.sha256(str(top).encode("utf-8")).hexdigest()[:16]
-        rationale_payload["rationale_id"] = rid
-
-        # metrics
-        if _EXPLAIN_COUNT:
-            try:
-                _EXPLAIN_COUNT.labels(method=method).inc()
-            except Exception:
-                pass
-        if _EXPLAIN_SECONDS:
-            try:
-                _EXPLAIN_SECONDS.observe(time.time() - _t0)
-            except Exception:
-                pass
+        payloads = self._payloads(contrib, names[: contrib.shape[1]])
+        _record(method, len(arr), _t0)
+        return payloads
+
+    def explain_row(self, model: Any, X_row: pd.Series) -> Dict[str, Any]:
+        """تولید rationale برای یک ردیف داده با استفاده از SHAP یا روش جایگزین.
+
+        Args:
+            model: مدل آموزش‌دیده (sklearn/سایر).
+            X_row: سری شامل ویژگی‌های یک ردیف (ایندکس‌ها نام ویژگی‌ها).
+
+        Returns:
+            Payload شامل:
+              - "top_features": لیست زوج‌های (feature, contribution) مرتب‌شده بر حسب |value|
+              - "rationale_id": شناسه پایدار 16 کاراکتری بر اساس hash از top_features
+        """
+        arr = X_row.to_numpy(dtype=float).reshape(1, -1)
+        return self._explain_array(model, arr, [str(c) for c in X_row.index])[0]
+
+
+def _bench(n_rows: int = 2000, n_features: int = 30) -> Dict[str, float]:
+    """Rows/sec of per-row `explain_row` vs one `explain_batch` call (proxy path, linear model)."""
+    from sklearn.linear_model import LogisticRegression
+
+    rng = np.random.default_rng(0)
+    cols = [f"f{i}" for i in range(n_features)]
+    X = pd.DataFrame(rng.normal(size=(n_rows, n_features)), columns=cols)
+    model = LogisticRegression(max_iter=200).fit(X.to_numpy(), (X["f0"] > 0).astype(int))
+    mapper = RationaleMapper(RationaleConfig(use_shap=False))
+
+    out: Dict[str, float] = {}
+    t0 = time.perf_counter()
+    for _, row in X.iterrows():
+        mapper.explain_row(model, row)
+    out["explain_row_rows_per_s"] = n_rows / (time.perf_counter() - t0)
+    t0 = time.perf_counter()
+    mapper.explain_batch(model, X)
+    out["explain_batch_rows_per_s"] = n_rows / (time.perf_counter() - t0)
+    return out
+
+
+if __name__ == "__main__":  # pragma: no cover
+    import argparse
+    import json
+    import logging
 
-        return rationale_payload
+    logging.basicConfig(level=logging.INFO)
+    ap = argparse.ArgumentParser(description="Benchmark per-row vs batched rationale mapping")
+    ap.add_argument("--rows", type=int, default=2000)
+    ap.add_argument("--features", type=int, default=30)
+    ns = ap.parse_args()
+    logging.info(json.dumps(_bench(ns.rows, ns.features), indent=2))
@@ -14,6 +14,12 @@ Observability:
 - Prometheus histograms:
     * assemble_seconds
     * publish_seconds
+    * assemble_batch_seconds / publish_batch_seconds (batch path)
+
+`emit_batch(df, emitter)` is the column-wise equivalent of `emit_from_df`:
+ATR column resolved once, SL/TP, sides, IDs and timestamps computed per
+column, payloads serialized in one pass and handed to the publisher as a
+batch (Kafka produce loop with a single poll, or one buffered file append).
 """
 
 import os
@@ -22,7 +28,8 @@ import uuid
 import logging
 import hashlib
 import time
-from dataclasses import dataclass
+import threading
+from dataclasses import dataclass, field
 from typing import Dict, Any, Optional, Tuple, List, Callable
 
 import pandas as pd
@@ -76,6 +83,22 @@ _PUBLISH_SECONDS = (
     if Histogram
     else None
 )
+_ASSEMBLE_BATCH_SECONDS = (
+    Histogram(
+        "assemble_batch_seconds",
+        "Latency of assembling a batch of signal payloads in seconds.",
+    )
+    if Histogram
+    else None
+)
+_PUBLISH_BATCH_SECONDS = (
+    Histogram(
+        "publish_batch_seconds",
+        "Latency of publishing a batch of signals in seconds.",
+    )
+    if Histogram
+    else None
+)
 _KAFKA_DELIVERY_FAIL = (
     Counter(
         "kafka_delivery_fail_total",
@@ -94,6 +117,12 @@ _FALLBACK_FILE_WRITES = (
 )
 
 
+def _clamp01(x: np.ndarray) -> np.ndarray:
+    """Element-wise `min(1.0, max(0.0, x))` with Python's semantics (NaN -> 0.0)."""
+    y = np.where(x > 0.0, x, 0.0)
+    return np.where(y < 1.0, y, 1.0)
+
+
 class _Publisher:
     """Thin publisher abstraction: prefers Kafka, otherwise appends to JSONL file."""
 
@@ -104,6 +133,8 @@ class _Publisher:
         os.makedirs(self.out_dir, exist_ok=True)
         self._use_kafka = False
         self._producer = None
+        self._fh: Any = None  # persistent append handle for the file sink
+        self._fh_lock = threading.Lock()
         try:
             from confluent_kafka import Producer  # type: ignore
             conf = {
@@ -128,23 +159,12 @@ class _Publisher:
 
         if self._use_kafka and self._producer is not None:
             sink = "kafka"
-
-            def _cb(err: Optional[Exception], msg: Any) -> None:
-                """Kafka delivery callback; increments failure metric on error."""
-                if err:
-                    log.warning("Kafka delivery failed: %s", err)
-                    if _KAFKA_DELIVERY_FAIL:
-                        try:
-                            _KAFKA_DELIVERY_FAIL.inc()
-                        except Exception:
-                            pass
-
             try:
                 self._producer.produce(
                     self.topic,
                     key=key.encode("utf-8"),
                     value=payload.encode("utf-8"),
-                    on_delivery=_cb,  # type: ignore[arg-type]
+                    on_delivery=self._on_delivery,  # type: ignore[arg-type]
                 )
                 self._producer.poll(0)  # trigger delivery callbacks
             except Exception as e:
@@ -178,19 +198,110 @@ class _Publisher:
             except Exception:
                 pass
 
+    @staticmethod
+    def _on_delivery(err: Optional[Exception], msg: Any) -> None:
+        """Kafka delivery callback; increments failure metric on error."""
+        if err:
+            log.warning("Kafka delivery failed: %s", err)
+            if _KAFKA_DELIVERY_FAIL:
+                try:
+                    _KAFKA_DELIVERY_FAIL.inc()
+                except Exception:
+                    pass
+
+    def publish_many(self, items: List[Tuple[str, str]]) -> None:
+        """Publish pre-serialized `(key, json)` pairs: one produce loop + poll, or one buffered file append."""
+        if not items:
+            return
+        t0 = time.time()
+        counts: Dict[Tuple[str, str], int] = {}
+        pending = items
+        if self._use_kafka and self._producer is not None:
+            pending = []
+            for key, payload in items:
+                try:
+                    try:
+                        self._producer.produce(self.topic, key=key.encode("utf-8"), value=payload.encode("utf-8"),
+                                               on_delivery=self._on_delivery)  # type: ignore[arg-type]
+                    except BufferError:
+                        # local queue full: serve delivery reports, then retry once
+                        self._producer.poll(0.5)
+                        self._producer.produce(self.topic, key=key.encode("utf-8"), value=payload.encode("utf-8"),
+                                               on_delivery=self._on_delivery)  # type: ignore[arg-type]
+                    counts[("kafka", "ok")] = counts.get(("kafka", "ok"), 0) + 1
+                except Exception as e:
+                    log.warning("Kafka produce failed, falling back to file: %s", e)
+                    pending.append((key, payload))
+            self._producer.poll(0)  # trigger delivery callbacks
+            if pending and _FALLBACK_FILE_WRITES:
+                try:
+                    _FALLBACK_FILE_WRITES.inc(len(pending))
+                except Exception:
+                    pass
+        if pending:
+            try:
+                self._write_lines([p for _, p in pending])
+                counts[("file", "ok")] = len(pending)
+            except Exception as fe:
+                counts[("file", "fail")] = len(pending)
+                log.error("File write failed: %s", fe)
+
+        if _PUBLISH_BATCH_SECONDS:
+            try:
+                _PUBLISH_BATCH_SECONDS.observe(time.time() - t0)
+            except Exception:
+                pass
+        if _PUBLISH_COUNT:
+            for (sink, result), n in counts.items():
+                try:
+                    _PUBLISH_COUNT.labels(sink=sink, result=result).inc(n)
+                except Exception:
+                    pass
+
     def flush(self) -> None:
-        """Flush pending Kafka messages (no-op for file sink)."""
+        """Flush pending Kafka messages and the file sink buffer."""
         if self._use_kafka and self._producer is not None:
             try:
                 self._producer.flush(2.0)
             except Exception:
                 pass
+        with self._fh_lock:
+            if self._fh is not None:
+                try:
+                    self._fh.flush()
+                except Exception:
+                    pass
+
+    def close(self) -> None:
+        """Flush everything and close the file sink handle."""
+        self.flush()
+        with self._fh_lock:
+            if self._fh is not None:
+                try:
+                    self._fh.close()
+                finally:
+                    self._fh = None
+
+    def _write_lines(self, payloads: List[str]) -> None:
+        """Append JSON lines to <out_dir>/<topic>.jsonl through a persistent buffered handle (flushed per call)."""
+        with self._fh_lock:
+            if self._fh is None:
+                fname = os.path.join(self.out_dir, f"{self.topic}.jsonl")
+                self._fh = open(fname, "a", encoding="utf-8", buffering=1 << 20)
+            try:
+                self._fh.write("\n".join(payloads) + "\n")
+                self._fh.flush()
+            except Exception:
+                # drop the handle so the next write reopens the file
+                try:
+                    self._fh.close()
+                finally:
+                    self._fh = None
+                raise
 
     def _write_file(self, payload: str) -> None:
         """Append a JSON line to <out_dir>/<topic>.jsonl."""
-        fname = os.path.join(self.out_dir, f"{self.topic}.jsonl")
-        with open(fname, "a", encoding="utf-8") as f:
-            f.write(payload + "\n")
+        self._write_lines([payload])
 
 
 @dataclass
@@ -204,7 +315,7 @@ class SLTPPolicy:
 class SignalEmitterConfig:
     """Configuration for SignalEmitter."""
     topic: str = "signals.v2"
-    sltp: SLTPPolicy = SLTPPolicy()
+    sltp: SLTPPolicy = field(default_factory=SLTPPolicy)
     version: str = "2.0.0"
     producer_out_dir: str = "/mnt/data/NEXUSA/signals_out"
 
@@ -331,9 +442,110 @@ class SignalEmitter:
         key = payload.get("signal_id") or uuid.uuid4().hex
         self.publisher.publish(key=key, value=payload)
 
+    def _calc_sltp_arrays(self, side: np.ndarray, close: np.ndarray, atr: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Column-wise `_calc_sltp` (same float operations, so results are bit-identical)."""
+        risk = np.where(np.isfinite(atr), atr, 0.01 * close) * self.cfg.sltp.atr_multiple
+        rr = self.cfg.sltp.rr_ratio
+        sl = np.where(side == "LONG", close - risk, np.where(side == "SHORT", close + risk, close))
+        tp = np.where(side == "LONG", close + rr * risk, np.where(side == "SHORT", close - rr * risk, close))
+        return sl, tp
+
+    @staticmethod
+    def _atr_column(df: pd.DataFrame) -> np.ndarray:
+        """Per-row ATR like `_find_atr`: first finite value among 'atr' columns, in column order (NaN if none)."""
+        out = np.full(len(df), np.nan)
+        for c in df.columns:
+            if "atr" in str(c).lower():
+                v = pd.to_numeric(df[c], errors="coerce").to_numpy(dtype=float, na_value=np.nan)
+                take = np.isnan(out) & np.isfinite(v)
+                out[take] = v[take]
+        return out
+
+    @staticmethod
+    def _ts_column(col: pd.Series) -> pd.Series:
+        """UTC timestamps for a column; values the vectorized parse rejects are retried one by one."""
+        ts = pd.to_datetime(col, utc=True, errors="coerce")
+        retry = ts.isna() & col.notna()
+        if retry.any():
+            ts = ts.astype(object)
+            for i in np.flatnonzero(retry.to_numpy()):
+                ts.iloc[i] = pd.to_datetime(col.iloc[i], utc=True, errors="coerce")
+        return ts
+
+    def assemble_batch(
+        self,
+        df: pd.DataFrame,
+        prob_tp: np.ndarray,
+        side: np.ndarray,
+        model_version: str,
+    ) -> List[Dict[str, Any]]:
+        """Assemble v2 payloads for every row of `df` column-wise (same payloads as `assemble` per row).
+
+        The whole batch is validated before anything is returned, so an invalid
+        `ts_event` or `close` in any row raises without partial output.
+        """
+        t0 = time.time()
+        n = len(df)
+        side = np.char.upper(np.asarray(side, dtype=str)) if n else np.asarray([], dtype=str)
+        symbols = [str(x) for x in df["symbol"].tolist()]
+        tfs = [str(x) for x in df["timeframe"].tolist()]
+        ts = self._ts_column(df["ts_event"])
+        if ts.isna().any():
+            raise ValueError("ts_event is invalid/NaT")
+        close = df["close"].to_numpy(dtype=float, na_value=np.nan)
+        if not np.isfinite(close).all():
+            raise ValueError("close price is NaN/inf; cannot compute SL/TP")
+        sl, tp = self._calc_sltp_arrays(side, close, self._atr_column(df))
+        p = _clamp01(np.asarray(prob_tp, dtype=float))
+
+        ts_iso = [t.isoformat() for t in ts]
+        ts_signal = pd.Timestamp.now(tz="UTC").isoformat()
+        ids = [
+            hashlib.sha256(f"{s}|{f}|{t}".encode("utf-8")).hexdigest()[:16]
+            for s, f, t in zip(symbols, tfs, ts_iso)
+        ]
+        payloads = [
+            {
+                "schema_version": self.cfg.version,
+                "signal_id": sid,
+                "symbol": s,
+                "tf": f,
+                "ts_event": t,
+                "ts_signal": ts_signal,
+                "side": sd,
+                "prob_tp": pr,
+                "entry": c,
+                "sl": a,
+                "tp": b,
+                "model_version": model_version,
+            }
+            for sid, s, f, t, sd, pr, c, a, b in zip(
+                ids, symbols, tfs, ts_iso, side.tolist(), p.tolist(), close.tolist(), sl.tolist(), tp.tolist()
+            )
+        ]
+
+        if _ASSEMBLE_COUNT and n:
+            labels, counts = np.unique(side, return_counts=True)
+            for lbl, cnt in zip(labels.tolist(), counts.tolist()):
+                try:
+                    _ASSEMBLE_COUNT.labels(side=lbl).inc(cnt)
+                except Exception:
+                    pass
+        if _ASSEMBLE_BATCH_SECONDS:
+            try:
+                _ASSEMBLE_BATCH_SECONDS.observe(time.time() - t0)
+            except Exception:
+                pass
+        return payloads
+
+    def publish_batch(self, payloads: List[Dict[str, Any]]) -> None:
+        """Serialize all payloads in one pass and publish them as one batch."""
+        enc = json.JSONEncoder(separators=(",", ":"), ensure_ascii=False).encode
+        self.publisher.publish_many([(p.get("signal_id") or uuid.uuid4().hex, enc(p)) for p in payloads])
+
     def close(self) -> None:
-        """Flush outstanding messages (Kafka)."""
-        self.publisher.flush()
+        """Flush outstanding messages (Kafka) and close the file sink."""
+        self.publisher.close()
 
 
 # --- Direction decision utility (uppercase, aligned with SL/TP) ---
@@ -392,6 +604,39 @@ def emit_from_df(
     return out
 
 
+def emit_batch(
+    df: pd.DataFrame,
+    emitter: SignalEmitter,
+    prob_col: Optional[str] = None,
+    score_col: str = "final_score",
+    model_version: str = "simple-v1",
+) -> List[Dict[str, Any]]:
+    """
+    Column-wise `emit_from_df`: same arguments and payloads, published as one batch.
+
+    Unlike the per-row path, nothing is published if any row is invalid.
+    """
+    required = {"symbol", "timeframe", "ts_event", "close"}
+    missing = required - set(df.columns)
+    if missing:
+        raise KeyError(f"Missing required columns: {missing}")
+
+    n = len(df)
+    score = df[score_col].to_numpy(dtype=float, na_value=np.nan) if score_col in df.columns else np.zeros(n)
+    side = np.where(score >= 0.35, "LONG", np.where(score <= -0.35, "SHORT", "NEUTRAL"))  # decide_direction
+    if prob_col and prob_col in df.columns:
+        prob_tp = df[prob_col].to_numpy(dtype=float, na_value=np.nan)
+        if score_col not in df.columns:
+            side = np.full(n, "NEUTRAL")
+    else:
+        # simple mapping score -> prob (fallback)
+        prob_tp = _clamp01(0.5 + score / 2.0)
+
+    payloads = emitter.assemble_batch(df, prob_tp=prob_tp, side=side, model_version=model_version)
+    emitter.publish_batch(payloads)
+    return payloads
+
+
 # --- Legacy adapter (kept for backwards compatibility; prefer SignalEmitter) ---
 def adapt_legacy_emit(df: pd.DataFrame) -> List[Dict[str, Any]]:
     """
@@ -0,0 +1,251 @@
+# storage/partition_catalog.py
+
+"""NEXUSA — partition_catalog.py
+
+Compact per-dataset partition index backed by a single SQLite file.
+
+`PartitionManager` records every data file it publishes here (partition key,
+path, size, row count, min/max `ts_event`), so that range discovery, retention
+planning and compaction planning become indexed lookups instead of walks over
+the lake.
+
+Layout (one row per data file):
+    files(symbol, tf, date, hour, region, path, ext, size, rows, min_ts, max_ts, added_at)
+
+`hour = -1` and `region = ''` encode "not set" so the key columns can be part
+of ordinary (non-NULL) indexes.
+
+A `meta` key/value table carries the `complete` marker: it is set only when
+the catalog is known to cover every data file of the dataset (created on an
+empty dataset, or after a full `rebuild_catalog()`). Until then callers must
+treat the index as partial and fall back to walking the lake.
+
+Stdlib only (sqlite3).
+"""
+from __future__ import annotations
+
+import datetime as _dt
+import os
+import sqlite3
+import threading
+import typing as T
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    symbol   TEXT    NOT NULL,
+    tf       TEXT    NOT NULL,
+    date     TEXT    NOT NULL,
+    hour     INTEGER NOT NULL DEFAULT -1,
+    region   TEXT    NOT NULL DEFAULT '',
+    path     TEXT    PRIMARY KEY,
+    ext      TEXT    NOT NULL,
+    size     INTEGER NOT NULL DEFAULT 0,
+    rows     INTEGER NOT NULL DEFAULT 0,
+    min_ts   INTEGER,
+    max_ts   INTEGER,
+    added_at TEXT    NOT NULL
+);
+CREATE INDEX IF NOT EXISTS files_partition ON files(symbol, tf, date, hour, region);
+CREATE INDEX IF NOT EXISTS files_range ON files(symbol, tf, min_ts, max_ts);
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+_KEY_COLS = "symbol, tf, date, hour, region"
+
+
+def _key_params(key: T.Any) -> tuple:
+    """Return the SQL parameter tuple for a PartitionKey-like object."""
+    return (
+        key.symbol,
+        key.tf,
+        key.date,
+        -1 if key.hour is None else int(key.hour),
+        key.region or "",
+    )
+
+
+def _key_from_row(row: sqlite3.Row) -> dict:
+    """Convert catalog key columns back into PartitionKey kwargs."""
+    return {
+        "symbol": row["symbol"],
+        "tf": row["tf"],
+        "date": row["date"],
+        "hour": None if row["hour"] < 0 else int(row["hour"]),
+        "region": row["region"] or None,
+    }
+
+
+class PartitionCatalog:
+    """SQLite-backed index of partitions and their data files for one dataset."""
+
+    def __init__(self, path: str) -> None:
+        """Open (or create) the catalog at local file `path`."""
+        self.path = path
+        d = os.path.dirname(os.path.abspath(path))
+        os.makedirs(d, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        """Close the underlying SQLite connection."""
+        with self._lock:
+            self._conn.close()
+
+    # ---------- meta ----------
+    def get_meta(self, key: str) -> str | None:
+        """Return the meta value stored under `key` (None when unset)."""
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return None if row is None else str(row["value"])
+
+    def set_meta(self, key: str, value: str) -> None:
+        """Store `value` under meta `key`."""
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+    def is_complete(self) -> bool:
+        """Return True if the catalog is known to index every data file of the dataset."""
+        return self.get_meta("complete") is not None
+
+    def mark_complete(self) -> None:
+        """Record that the catalog now indexes every data file of the dataset."""
+        self.set_meta("complete", _dt.datetime.now(tz=_dt.timezone.utc).isoformat())
+
+    # ---------- writes ----------
+    def _insert(self, key: T.Any, f: dict) -> None:
+        """Insert/replace one file row (caller holds the lock and transaction)."""
+        self._conn.execute(
+            f"INSERT OR REPLACE INTO files ({_KEY_COLS}, path, ext, size, rows, min_ts, max_ts, added_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                *_key_params(key),
+                f["path"],
+                f.get("ext", ""),
+                int(f.get("size", 0)),
+                int(f.get("rows", 0)),
+                f.get("min_ts"),
+                f.get("max_ts"),
+                _dt.datetime.now(tz=_dt.timezone.utc).isoformat(),
+            ),
+        )
+
+    def add_file(self, key: T.Any, path: str, *, ext: str, size: int, rows: int, min_ts: int | None, max_ts: int | None) -> None:
+        """Record a newly published data file for partition `key`."""
+        with self._lock:
+            self._insert(key, {"path": path, "ext": ext, "size": size, "rows": rows, "min_ts": min_ts, "max_ts": max_ts})
+
+    def replace_files(self, key: T.Any, removed: T.Iterable[str], added: T.Iterable[dict]) -> None:
+        """Atomically swap `removed` paths for `added` file entries in one transaction."""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.executemany("DELETE FROM files WHERE path = ?", [(p,) for p in removed])
+                for f in added:
+                    self._insert(key, f)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def remove_partition(self, key: T.Any) -> int:
+        """Drop every file row of partition `key`; return the number of rows removed."""
+        with self._lock:
+            cur = self._conn.execute(
+                "DELETE FROM files WHERE symbol = ? AND tf = ? AND date = ? AND hour = ? AND region = ?",
+                _key_params(key),
+            )
+            return cur.rowcount
+
+    # ---------- lookups ----------
+    def count_files(self) -> int:
+        """Return the number of indexed data files."""
+        with self._lock:
+            return int(self._conn.execute("SELECT COUNT(*) FROM files").fetchone()[0])
+
+    def files(self, key: T.Any) -> list[dict]:
+        """Return file entries (path, ext, size, rows, min_ts, max_ts) for partition `key`."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT path, ext, size, rows, min_ts, max_ts FROM files "
+                "WHERE symbol = ? AND tf = ? AND date = ? AND hour = ? AND region = ? ORDER BY min_ts",
+                _key_params(key),
+            ).fetchall()
+        return [dict(r) for r in rows]
+
+    def has_partition(self, key: T.Any) -> bool:
+        """Return True if any file is recorded for partition `key`."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM files WHERE symbol = ? AND tf = ? AND date = ? AND hour = ? AND region = ? LIMIT 1",
+                _key_params(key),
+            ).fetchone()
+        return row is not None
+
+    def partitions(
+        self,
+        *,
+        symbol: str | None = None,
+        tf: str | None = None,
+        start_ms: int | None = None,
+        end_ms: int | None = None,
+        before_date: str | None = None,
+    ) -> list[dict]:
+        """Return per-partition aggregates, optionally filtered by symbol/tf and time overlap.
+
+        Each item has the key fields plus `files`, `rows`, `bytes`, `min_ts`, `max_ts`.
+        `[start_ms, end_ms)` keeps partitions whose data overlaps the window;
+        `before_date` (YYYY-MM-DD) keeps partitions strictly older than that date.
+        """
+        where: list[str] = []
+        params: list[T.Any] = []
+        if symbol is not None:
+            where.append("symbol = ?")
+            params.append(symbol)
+        if tf is not None:
+            where.append("tf = ?")
+            params.append(tf)
+        if end_ms is not None:
+            where.append("min_ts < ?")
+            params.append(int(end_ms))
+        if start_ms is not None:
+            where.append("max_ts >= ?")
+            params.append(int(start_ms))
+        if before_date is not None:
+            where.append("date < ?")
+            params.append(before_date)
+        sql = (
+            f"SELECT {_KEY_COLS}, COUNT(*) AS files, SUM(rows) AS rows, SUM(size) AS bytes, "
+            "MIN(min_ts) AS min_ts, MAX(max_ts) AS max_ts FROM files"
+            + (" WHERE " + " AND ".join(where) if where else "")
+            + f" GROUP BY {_KEY_COLS} ORDER BY symbol, tf, date, hour, region"
+        )
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        out = []
+        for r in rows:
+            d = _key_from_row(r)
+            d.update(files=r["files"], rows=r["rows"] or 0, bytes=r["bytes"] or 0, min_ts=r["min_ts"], max_ts=r["max_ts"])
+            out.append(d)
+        return out
+
+    def compaction_candidates(self, *, small_bytes: int, min_files: int = 2) -> list[dict]:
+        """Return partition keys holding at least `min_files` files smaller than `small_bytes`."""
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {_KEY_COLS}, COUNT(*) AS small_files, SUM(size) AS small_bytes FROM files "
+                f"WHERE size < ? GROUP BY {_KEY_COLS} HAVING COUNT(*) >= ?",
+                (int(small_bytes), int(min_files)),
+            ).fetchall()
+        out = []
+        for r in rows:
+            d = _key_from_row(r)
+            d.update(small_files=r["small_files"], small_bytes=r["small_bytes"] or 0)
+            out.append(d)
+        return out
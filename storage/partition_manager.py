@@ -29,10 +29,13 @@ import os
 import pathlib as _pl
 import re
 import tempfile
+import threading
+import time
 import typing as T
 import uuid as _uuid
 import logging
 from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
 
 # Logger for CLI and module messages (replaces print usage)
 logging.basicConfig(level=logging.INFO)
@@ -49,7 +52,15 @@ try:
         to_iso_utc,
     )
 except Exception:  # fallback for relative import when run as script
-    from time_utils import candle_open_ms, candle_close_ms, iter_candles, parse_timeframe, tf_to_ms, to_iso_utc  # type: ignore
+    try:
+        from time_utils import candle_open_ms, candle_close_ms, iter_candles, parse_timeframe, tf_to_ms, to_iso_utc  # type: ignore
+    except Exception:
+        from core.utils.time_utils import candle_open_ms, candle_close_ms, iter_candles, parse_timeframe, tf_to_ms, to_iso_utc  # type: ignore
+
+try:
+    from .partition_catalog import PartitionCatalog
+except Exception:  # fallback for relative import when run as script
+    from partition_catalog import PartitionCatalog  # type: ignore
 
 # Optional dependencies
 try:  # pragma: no cover
@@ -151,6 +162,27 @@ class WriteResult:
     partition: PartitionKey
 
 
+@dataclasses.dataclass
+class CompactionResult:
+    """Outcome of compacting one partition: files merged, bytes moved, and time taken."""
+    partition: PartitionKey
+    files_in: int = 0
+    files_out: int = 0
+    rows: int = 0
+    bytes_read: int = 0
+    bytes_written: int = 0
+    elapsed_s: float = 0.0
+    written: list[str] = dataclasses.field(default_factory=list)
+    removed: list[str] = dataclasses.field(default_factory=list)
+    dry_run: bool = False
+
+    def dict(self) -> dict:
+        """Return a JSON-friendly summary of the compaction."""
+        d = dataclasses.asdict(self)
+        d["partition"] = self.partition.dict()
+        return d
+
+
 # --------------------------- storage backends ---------------------------
 
 class StorageBackend(ABC):
@@ -183,6 +215,21 @@ class StorageBackend(ABC):
         """Return a recursive flat listing of file paths under `prefix`."""
         ...
 
+    @abstractmethod
+    def read_bytes(self, path: str) -> bytes:
+        """Return the full contents of `path`. Raise FileNotFoundError if missing."""
+        ...
+
+    @abstractmethod
+    def size(self, path: str) -> int:
+        """Return the size of `path` in bytes (0 if missing)."""
+        ...
+
+    @abstractmethod
+    def delete(self, path: str) -> None:
+        """Delete `path` if it exists (no error if missing)."""
+        ...
+
 
 class LocalFS(StorageBackend):
     """Local filesystem backend (`file://`) implementation."""
@@ -217,23 +264,41 @@ class LocalFS(StorageBackend):
         p = self._to_local(prefix)
         if not p.exists():
             return []
+        # keep the caller's scheme so listings compare equal to manifest/catalog paths
+        scheme = "file://" if prefix.startswith("file://") else ""
         out = []
         for f in p.rglob("*"):
             if f.is_file():
-                out.append(str(f))
+                out.append(scheme + str(f))
         return out
 
+    def read_bytes(self, path: str) -> bytes:
+        """Read a local file fully into memory."""
+        with open(self._to_local(path), "rb") as f:
+            return f.read()
+
+    def size(self, path: str) -> int:
+        """Return local file size in bytes (0 if missing)."""
+        try:
+            return self._to_local(path).stat().st_size
+        except OSError:
+            return 0
+
+    def delete(self, path: str) -> None:
+        """Remove a local file if present."""
+        self._to_local(path).unlink(missing_ok=True)
+
 
 class S3(StorageBackend):  # pragma: no cover (requires boto3 + creds)
     """Amazon S3 backend using boto3."""
-    def __init__(self, root_uri: str) -> None:
-        """Initialize S3 backend and parse bucket/prefix from root URI."""
+    def __init__(self, root_uri: str, *, client: T.Any = None) -> None:
+        """Initialize S3 backend and parse bucket/prefix from root URI (optionally with a prebuilt client)."""
         super().__init__(root_uri)
-        if boto3 is None:
+        if client is None and boto3 is None:
             raise RuntimeError("boto3 not installed")
         if not root_uri.startswith("s3://"):
             raise ValueError("S3 root must start with s3://")
-        self._s3 = boto3.client("s3")
+        self._s3 = client if client is not None else boto3.client("s3")
         bucket, *key = root_uri[len("s3://"):].split("/", 1)
         self.bucket = bucket
         self.prefix = key[0] if key else ""
@@ -262,10 +327,11 @@ class S3(StorageBackend):  # pragma: no cover (requires boto3 + creds)
         self._s3.put_object(Bucket=b, Key=k, Body=data)
 
     def atomic_replace(self, tmp_path: str, final_path: str) -> None:
-        """No atomic rename on S3; write final object directly. `tmp_path` ignored."""
-        # On S3 there is no rename; upload final directly
-        # tmp_path ignored
-        pass
+        """No rename on S3: server-side copy tmp → final (atomic per object), then drop tmp."""
+        sb, sk = self._split(tmp_path)
+        db, dk = self._split(final_path)
+        self._s3.copy_object(Bucket=db, Key=dk, CopySource={"Bucket": sb, "Key": sk})
+        self._s3.delete_object(Bucket=sb, Key=sk)
 
     def listdir(self, prefix: str) -> list[str]:
         """List S3 objects under a prefix recursively."""
@@ -277,6 +343,27 @@ class S3(StorageBackend):  # pragma: no cover (requires boto3 + creds)
                 out.append(f"s3://{b}/{it['Key']}")
         return out
 
+    def read_bytes(self, path: str) -> bytes:
+        """Download an S3 object into memory."""
+        b, k = self._split(path)
+        try:
+            return self._s3.get_object(Bucket=b, Key=k)["Body"].read()
+        except self._s3.exceptions.NoSuchKey as e:
+            raise FileNotFoundError(path) from e
+
+    def size(self, path: str) -> int:
+        """Return S3 object size via HEAD (0 if missing)."""
+        b, k = self._split(path)
+        try:
+            return int(self._s3.head_object(Bucket=b, Key=k)["ContentLength"])
+        except Exception:
+            return 0
+
+    def delete(self, path: str) -> None:
+        """Delete an S3 object (S3 delete is idempotent)."""
+        b, k = self._split(path)
+        self._s3.delete_object(Bucket=b, Key=k)
+
 
 # --------------------------- manager ---------------------------
 
@@ -291,6 +378,7 @@ class PartitionManager:
         retention: RetentionPolicy | None = None,
         backend: StorageBackend | None = None,
         catalog: str = "hive",  # hive|iceberg|delta (behavioral hints only)
+        catalog_path: str | None = None,
     ) -> None:
         """Create a new manager with storage backend, partition policy, and retention tiers."""
         self.policy = policy or PartitionPolicy()
@@ -311,6 +399,54 @@ class PartitionManager:
                 self.backend = LocalFS(root_uri)
         self.root_uri = self.backend.root_uri
         self.catalog = catalog
+        # Partition index (SQLite). Defaults next to the dataset on LocalFS; remote
+        # backends need an explicit local `catalog_path` to enable indexed lookups.
+        if catalog_path is None and isinstance(self.backend, LocalFS):
+            catalog_path = os.path.join(self.dataset_root().replace("file://", ""), "_catalog.sqlite")
+        self.catalog_path = catalog_path
+        self._partition_catalog: PartitionCatalog | None = None
+        # Per-partition locks serializing manifest read-modify-write (appends vs compaction).
+        self._manifest_locks: dict[str, threading.Lock] = {}
+        self._manifest_locks_guard = threading.Lock()
+
+    @property
+    def partition_catalog(self) -> PartitionCatalog | None:
+        """Lazily opened partition index for this dataset (None when disabled).
+
+        A catalog created on a dataset with no data files is marked complete right
+        away; one opened over an existing lake stays partial until `rebuild_catalog()`.
+        """
+        if self._partition_catalog is None and self.catalog_path:
+            cat = PartitionCatalog(self.catalog_path)
+            if not cat.is_complete() and cat.count_files() == 0 and not self._data_files():
+                cat.mark_complete()
+            self._partition_catalog = cat
+        return self._partition_catalog
+
+    def _indexed_catalog(self) -> PartitionCatalog | None:
+        """Return the catalog only if it is complete (partial indexes fall back to walks)."""
+        cat = self.partition_catalog
+        if cat is None or not cat.is_complete():
+            return None
+        return cat
+
+    def _data_files(self) -> list[tuple[PartitionKey, str, str]]:
+        """Walk the dataset root and return (key, path, ext) for every data file."""
+        out: list[tuple[PartitionKey, str, str]] = []
+        try:
+            paths = self.backend.listdir(self.dataset_root())
+        except Exception:
+            return out
+        for p in paths:
+            m = self._HIVE_RE.search(p)
+            if not m:
+                continue
+            key = PartitionKey(
+                symbol=m["symbol"], tf=m["tf"], date=m["date"],
+                hour=int(m["hour"]) if m["hour"] is not None else None, region=m["region"],
+            )
+            out.append((key, p, m["ext"]))
+        return out
 
     # ---------- key derivation ----------
     def derive_key(self, *, symbol: str, tf: str, ts_event_ms: int, region: str | None = None) -> PartitionKey:
@@ -361,6 +497,16 @@ class PartitionManager:
             data = ("\n".join(json.dumps(r, ensure_ascii=False, sort_keys=True, separators=(",", ":")) for r in records) + "\n").encode("utf-8")
             return data, "jsonl", payload_hash
 
+    @staticmethod
+    def _record_stats(records: list[dict]) -> dict:
+        """Return row count and min/max `ts_event` of a batch for the partition catalog."""
+        ts = [r["ts_event"] for r in records if isinstance(r.get("ts_event"), (int, float))]
+        return {
+            "rows": len(records),
+            "min_ts": int(min(ts)) if ts else None,
+            "max_ts": int(max(ts)) if ts else None,
+        }
+
     def write_partition(self, key: PartitionKey, records: list[dict], *, overwrite: bool = False) -> WriteResult:
         """Write a batch of records into the partition (Parquet or JSONL). Returns WriteResult."""
         if not records:
@@ -371,45 +517,104 @@ class PartitionManager:
         if self.backend.exists(final_path) and not overwrite:
             # Assume idempotent
             return WriteResult(path=final_path, bytes_written=0, file_hash=payload_hash, idempotent_key=idempotent_key, partition=key)
+        # Open the catalog before publishing so a first write into an empty lake
+        # still finds no data files and marks the catalog complete.
+        cat = self.partition_catalog
         # Write via temp then atomic replace (local), or direct (S3)
         tmp_path = self.backend.join(".tmp", _uuid.uuid4().hex)
         self.backend.write_bytes(tmp_path, data, overwrite=True)
         self.backend.atomic_replace(tmp_path, final_path)
         # Update manifest (best-effort)
         self._update_manifest_append(key, final_path, len(data), ext)
+        if cat is not None:
+            cat.add_file(key, final_path, ext=ext, size=len(data), **self._record_stats(records))
         return WriteResult(path=final_path, bytes_written=len(data), file_hash=payload_hash, idempotent_key=idempotent_key, partition=key)
 
     # ---------- manifest (hive + hooks for iceberg/delta) ----------
-    def _update_manifest_append(self, key: PartitionKey, path: str, size: int, ext: str) -> None:
-        """Append a file entry to the partition manifest; create manifest if missing."""
-        meta = {
+    def _new_manifest(self, key: PartitionKey, ext: str) -> dict:
+        """Return an empty manifest document for `key`."""
+        return {
             "format": ext,
             "dataset": self.policy.dataset,
             "partition": key.dict(),
             "files": [],
             "updated_at": _dt.datetime.now(tz=_dt.timezone.utc).isoformat(),
             "catalog": self.catalog,
-            "version": 1,
+            "version": 0,
         }
+
+    def read_manifest(self, key: PartitionKey) -> dict | None:
+        """Load the partition manifest, or None if missing/unreadable."""
         manifest_path = self.manifest_path(key)
         try:
             if self.backend.exists(manifest_path):
-                raw = open(_pl.Path(manifest_path.replace("file://", "")), "rb").read() if isinstance(self.backend, LocalFS) else None
-                if raw:
-                    meta = json.loads(raw)
+                return json.loads(self.backend.read_bytes(manifest_path))
         except Exception:
             pass
-        # append new file
-        files = meta.setdefault("files", [])
-        files.append({"path": path, "size": size, "ext": ext})
-        if isinstance(self.backend, LocalFS):
-            self.backend.write_bytes(manifest_path, json.dumps(meta, ensure_ascii=False, indent=2).encode("utf-8"), overwrite=True)
+        return None
+
+    def _write_manifest(self, key: PartitionKey, meta: dict) -> None:
+        """Atomically publish a manifest (temp object + replace), bumping its version."""
+        meta["updated_at"] = _dt.datetime.now(tz=_dt.timezone.utc).isoformat()
+        meta["version"] = int(meta.get("version", 0)) + 1
+        tmp_path = self.backend.join(".tmp", _uuid.uuid4().hex)
+        self.backend.write_bytes(tmp_path, json.dumps(meta, ensure_ascii=False, indent=2).encode("utf-8"), overwrite=True)
+        self.backend.atomic_replace(tmp_path, self.manifest_path(key))
+
+    def _manifest_lock(self, key: PartitionKey) -> threading.Lock:
+        """Return the lock guarding the manifest of partition `key` (within this process)."""
+        part = self.partition_path(key)
+        with self._manifest_locks_guard:
+            lock = self._manifest_locks.get(part)
+            if lock is None:
+                lock = self._manifest_locks[part] = threading.Lock()
+            return lock
+
+    def _update_manifest_append(self, key: PartitionKey, path: str, size: int, ext: str) -> None:
+        """Append a file entry to the partition manifest; create manifest if missing."""
+        with self._manifest_lock(key):
+            meta = self.read_manifest(key) or self._new_manifest(key, ext)
+            # append new file
+            files = meta.setdefault("files", [])
+            files.append({"path": path, "size": size, "ext": ext})
+            self._write_manifest(key, meta)
         # For iceberg/delta, hooks could be added here to write real manifests
 
     # ---------- discovery & pruning ----------
-    def partitions_for_timerange(self, *, symbol: str, tf: str, start_ms: int, end_ms: int) -> list[PartitionKey]:
-        """Enumerate unique partition keys covering [start_ms, end_ms) for a symbol/timeframe."""
+    def partitions_for_timerange(
+        self, *, symbol: str, tf: str, start_ms: int, end_ms: int, existing_only: bool = False
+    ) -> list[PartitionKey]:
+        """Enumerate unique partition keys covering [start_ms, end_ms) for a symbol/timeframe.
+
+        With `existing_only=True` the partition catalog is queried instead, returning
+        only partitions that actually hold data overlapping the window.
+        """
         t = parse_timeframe(tf)
+        if existing_only:
+            cat = self._indexed_catalog()
+            if cat is None:
+                raise RuntimeError("existing_only requires a complete partition catalog (set catalog_path, run rebuild_catalog)")
+            rows = cat.partitions(symbol=symbol, tf=t.label, start_ms=start_ms, end_ms=end_ms)
+            return [PartitionKey(**{k: r[k] for k in ("symbol", "tf", "date", "hour", "region")}) for r in rows]
+
+        # Fast path: when the candle span divides the partition span, every partition
+        # between the first and last candle open is covered, so step per partition
+        # instead of per candle (365 steps instead of 525k for a year of 1m bars).
+        span = tf_to_ms(t)
+        part_ms = 3_600_000 if self.policy.hourly() else 86_400_000
+        if span and span <= part_ms and part_ms % span == 0:
+            if end_ms < start_ms:
+                raise ValueError("end_ms must be >= start_ms")
+            first = candle_open_ms(start_ms, t)
+            count = -(-(end_ms - first - span) // span)  # candles with close < end_ms
+            if count <= 0:
+                return []
+            last = first + (count - 1) * span
+            return [
+                self.key_for_bounds(symbol=symbol, tf=t.label, open_ms=o)
+                for o in range(first - first % part_ms, last + 1, part_ms)
+            ]
+
         out: list[PartitionKey] = []
         for o, _c in iter_candles(start_ms, end_ms, t):
             out.append(self.key_for_bounds(symbol=symbol, tf=t.label, open_ms=o))
@@ -423,6 +628,30 @@ class PartitionManager:
                 uniq.append(k)
         return uniq
 
+    _HIVE_RE = re.compile(
+        r"symbol=(?P<symbol>[^/]+)/tf=(?P<tf>[^/]+)/date=(?P<date>\d{4}-\d{2}-\d{2})"
+        r"(?:/hour=(?P<hour>\d{2}))?(?:/region=(?P<region>[^/]+))?/[^/]+\.(?P<ext>parquet|jsonl)$"
+    )
+
+    def rebuild_catalog(self) -> int:
+        """(Re)index every data file under the dataset root; returns the number of files indexed.
+
+        One-off migration for lakes written before the catalog existed: reads each
+        part once to recover row counts and min/max `ts_event`, then marks the
+        catalog complete so planning switches to indexed lookups.
+        """
+        cat = self.partition_catalog
+        if cat is None:
+            raise RuntimeError("no partition catalog configured (set catalog_path)")
+        n = 0
+        for key, p, ext in self._data_files():
+            data = self.backend.read_bytes(p)
+            stats = self._record_stats(self._decode_records(data, ext))
+            cat.add_file(key, p, ext=ext, size=len(data), **stats)
+            n += 1
+        cat.mark_complete()
+        return n
+
     # ---------- SQL helpers (ClickHouse / Timescale) ----------
     def clickhouse_merge_tree(self, *, table: str, order_by: str = "(symbol, tf, ts_event)") -> str:
         """DDL for a MergeTree table aligned with our partitioning policy."""
@@ -469,28 +698,186 @@ SETTINGS index_granularity = 8192
     # ---------- compaction planning ----------
     def plan_compaction(self, key: PartitionKey, *, target_file_size_mb: int = 64) -> dict:
         """Return a simple compaction plan summary for a partition (counts, bytes, small_files)."""
-        part_dir = self.partition_path(key)
-        files = [p for p in self.backend.listdir(part_dir) if re.search(r"\.(parquet|jsonl)$", p)]
+        cat = self._indexed_catalog()
+        if cat is not None:
+            indexed = {f["path"]: int(f["size"]) for f in cat.files(key)}
+        else:
+            part_dir = self.partition_path(key)
+            indexed = {p: -1 for p in self.backend.listdir(part_dir) if re.search(r"\.(parquet|jsonl)$", p)}
+        files = list(indexed)
         sizes = []
         total = 0
         small = []
         for p in files:
-            try:
-                sz = os.path.getsize(p.replace("file://", "")) if isinstance(self.backend, LocalFS) else 0
-            except Exception:
-                sz = 0
+            sz = indexed[p]
+            if sz < 0:
+                try:
+                    sz = self.backend.size(p)
+                except Exception:
+                    sz = 0
             sizes.append({"path": p, "size": sz})
             total += sz
             if sz < target_file_size_mb * 1024 * 1024 * 0.25:
                 small.append(p)
         return {"partition": key.dict(), "total_files": len(files), "total_bytes": total, "small_files": small}
 
+    # ---------- compaction execution ----------
+    @staticmethod
+    def _decode_records(data: bytes, ext: str) -> list[dict]:
+        """Decode a data file written by `_encode_records` back into records."""
+        if ext == "parquet":
+            if pq is None:
+                raise RuntimeError("pyarrow is required to read parquet parts")
+            return pq.read_table(io.BytesIO(data)).to_pylist()
+        return [json.loads(line) for line in data.decode("utf-8").splitlines() if line.strip()]
+
+    def compact_partition(self, key: PartitionKey, *, target_file_size_mb: int = 64, dry_run: bool = False) -> CompactionResult:
+        """Merge the small parts of one partition into target-sized files sorted by `ts_event`.
+
+        Order of operations keeps readers consistent: new parts are written first, the
+        manifest is then replaced atomically, and superseded parts are deleted last.
+        """
+        t0 = time.perf_counter()
+        res = CompactionResult(partition=key, dry_run=dry_run)
+        plan = self.plan_compaction(key, target_file_size_mb=target_file_size_mb)
+        small: list[str] = plan["small_files"]
+        if len(small) < 2:
+            res.elapsed_s = time.perf_counter() - t0
+            return res
+
+        records: list[dict] = []
+        for p in small:
+            data = self.backend.read_bytes(p)
+            res.bytes_read += len(data)
+            records.extend(self._decode_records(data, p.rsplit(".", 1)[-1]))
+        res.files_in = len(small)
+        res.rows = len(records)
+        if dry_run or not records:
+            res.elapsed_s = time.perf_counter() - t0
+            return res
+
+        records.sort(key=lambda r: (r.get("ts_event") is None, r.get("ts_event") or 0))
+        target_bytes = target_file_size_mb * 1024 * 1024
+        rows_per_file = max(1, int(target_bytes / max(1.0, res.bytes_read / len(records))))
+
+        new_files: list[dict] = []
+        stats: list[dict] = []
+        for i in range(0, len(records), rows_per_file):
+            chunk = records[i:i + rows_per_file]
+            data, ext, payload_hash = self._encode_records(chunk)
+            final_path = self.data_file_path(key, file_hash=payload_hash, ext=ext)
+            tmp_path = self.backend.join(".tmp", _uuid.uuid4().hex)
+            self.backend.write_bytes(tmp_path, data, overwrite=True)
+            self.backend.atomic_replace(tmp_path, final_path)
+            new_files.append({"path": final_path, "size": len(data), "ext": ext})
+            stats.append(self._record_stats(chunk))
+            res.bytes_written += len(data)
+        res.written = [f["path"] for f in new_files]
+        res.files_out = len(new_files)
+
+        # Commit point: once the manifest is replaced, readers only see the merged parts.
+        # LocalFS listings are bare paths while manifests hold file:// URIs; compare both bare.
+        # Re-read under the partition lock so parts appended during the merge are kept.
+        superseded = {p.replace("file://", "") for p in small}
+        with self._manifest_lock(key):
+            meta = self.read_manifest(key) or self._new_manifest(key, new_files[0]["ext"])
+            meta["files"] = [f for f in meta.get("files", []) if str(f.get("path", "")).replace("file://", "") not in superseded] + new_files
+            self._write_manifest(key, meta)
+        cat = self.partition_catalog
+        if cat is not None:
+            cat.replace_files(key, small, [{**f, **st} for f, st in zip(new_files, stats)])
+
+        for p in small:
+            try:
+                self.backend.delete(p)
+                res.removed.append(p)
+            except Exception as e:
+                log.warning("compaction: failed to delete superseded part %s: %s", p, e)
+        res.elapsed_s = time.perf_counter() - t0
+        log.info(
+            "compacted %s: %d→%d files, read=%dB written=%dB in %.3fs",
+            self.partition_path(key), res.files_in, res.files_out, res.bytes_read, res.bytes_written, res.elapsed_s,
+        )
+        return res
+
+    def compaction_candidates(self, *, target_file_size_mb: int = 64) -> list[PartitionKey]:
+        """Return partitions holding two or more small parts.
+
+        Looked up in the partition catalog when it is complete; otherwise the lake is
+        walked and part sizes are read from the backend.
+        """
+        small_bytes = int(target_file_size_mb * 1024 * 1024 * 0.25)
+        cat = self._indexed_catalog()
+        if cat is not None:
+            rows = cat.compaction_candidates(small_bytes=small_bytes)
+            return [PartitionKey(**{k: r[k] for k in ("symbol", "tf", "date", "hour", "region")}) for r in rows]
+        counts: dict[PartitionKey, int] = {}
+        for key, p, _ext in self._data_files():
+            try:
+                sz = self.backend.size(p)
+            except Exception:
+                continue
+            if sz < small_bytes:
+                counts[key] = counts.get(key, 0) + 1
+        return [k for k, n in counts.items() if n >= 2]
+
+    def compact(
+        self,
+        keys: T.Iterable[PartitionKey] | None = None,
+        *,
+        target_file_size_mb: int = 64,
+        max_workers: int = 4,
+        dry_run: bool = False,
+    ) -> list[CompactionResult]:
+        """Compact many partitions with at most `max_workers` running concurrently.
+
+        `keys=None` compacts every candidate found in the partition catalog.
+        Partitions are independent, so each worker owns one partition end to end; a
+        failure in one partition is logged and does not abort the others.
+        """
+        if keys is None:
+            keys = self.compaction_candidates(target_file_size_mb=target_file_size_mb)
+        keys = list(keys)
+        results: list[CompactionResult] = []
+        with ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="compact") as pool:
+            futures = [
+                (k, pool.submit(self.compact_partition, k, target_file_size_mb=target_file_size_mb, dry_run=dry_run))
+                for k in keys
+            ]
+            for k, fut in futures:
+                try:
+                    results.append(fut.result())
+                except Exception as e:
+                    log.error("compaction failed for %s: %s", self.partition_path(k), e)
+        return results
+
     # ---------- retention planning ----------
     def plan_retention(self, now_ms: int | None = None) -> list[dict]:
-        """Plan tiering/retention actions by scanning partition dates (local FS only)."""
+        """Plan tiering/retention actions per date partition.
+
+        Uses the partition catalog when it is complete; otherwise falls back to
+        scanning partition dates (local FS only).
+        """
         now = _dt.datetime.utcfromtimestamp((now_ms or int(_dt.datetime.now(tz=_dt.timezone.utc).timestamp()*1000))/1000.0)
         dataset_root = self.dataset_root()
         plans: list[dict] = []
+        cat = self._indexed_catalog()
+        if cat is not None:
+            by_date: dict[tuple[str, str, str], dict] = {}
+            for r in cat.partitions():
+                agg = by_date.setdefault((r["symbol"], r["tf"], r["date"]), {"files": 0, "bytes": 0, "rows": 0})
+                agg["files"] += r["files"]
+                agg["bytes"] += r["bytes"]
+                agg["rows"] += r["rows"]
+            for (symbol, tf, date_str), agg in by_date.items():
+                age_days = (now - _dt.datetime.strptime(date_str, "%Y-%m-%d")).days
+                tier = self.retention.tier_for_age_days(age_days)
+                path = self.backend.join(self.policy.dataset, f"symbol={symbol}", f"tf={tf}", f"date={date_str}")
+                plans.append({
+                    "path": path.replace("file://", ""), "date": date_str, "age_days": age_days,
+                    "tier": dataclasses.asdict(tier), **agg,
+                })
+            return plans
         # naive scan (local only):
         if isinstance(self.backend, LocalFS):
             root = _pl.Path(dataset_root.replace("file://", ""))
@@ -512,7 +899,7 @@ SETTINGS index_granularity = 8192
 # --------------------------- CLI ---------------------------
 
 def _cli(argv: list[str]) -> int:  # pragma: no cover
-    """Simple CLI for key/path/write/prune operations. Returns process exit code."""
+    """Simple CLI for key/path/write/compact/prune operations. Returns process exit code."""
     import argparse
     ap = argparse.ArgumentParser(prog="partition_manager", description="NEXUSA partition manager")
     ap.add_argument("root", help="root URI (file:///data/lake or s3://bucket/prefix)")
@@ -540,6 +927,13 @@ def _cli(argv: list[str]) -> int:  # pragma: no cover
     ap_prune.add_argument("start_ms", type=int)
     ap_prune.add_argument("end_ms", type=int)
 
+    ap_compact = sub.add_parser("compact", help="merge small parts of a partition")
+    ap_compact.add_argument("symbol")
+    ap_compact.add_argument("tf")
+    ap_compact.add_argument("ts_event_ms", type=int)
+    ap_compact.add_argument("--target-mb", type=int, default=64)
+    ap_compact.add_argument("--dry-run", action="store_true")
+
     ns = ap.parse_args(argv)
 
     pm = PartitionManager(root_uri=ns.root, policy=PartitionPolicy())
@@ -563,6 +957,12 @@ def _cli(argv: list[str]) -> int:  # pragma: no cover
         log.info(json.dumps(dataclasses.asdict(res), ensure_ascii=False, indent=2))
         return 0
 
+    if ns.cmd == "compact":
+        k = pm.derive_key(symbol=ns.symbol, tf=ns.tf, ts_event_ms=ns.ts_event_ms)
+        res = pm.compact_partition(k, target_file_size_mb=ns.target_mb, dry_run=ns.dry_run)
+        log.info(json.dumps(res.dict(), ensure_ascii=False, indent=2))
+        return 0
+
     if ns.cmd == "prune":
         log.info(pm.prune_predicate(symbol=ns.symbol, tf=ns.tf, start_ms=ns.start_ms, end_ms=ns.end_ms))
         return 0
@@ -0,0 +1,342 @@
+# storage/retention_executor.py
+
+"""NEXUSA — retention_executor.py
+
+Executes `PartitionManager` retention plans: moves partitions between tiers.
+
+For every partition in the source dataset's partition catalog whose age maps
+to a colder tier than the source holds, the executor:
+
+1. copies each data file to the target tier's `PartitionManager` backend,
+   verifying a SHA-256 read-back of the written object;
+2. publishes a manifest on the target with the new paths and checksums
+   (and records the files in the target catalog, if any);
+3. deletes the source files and manifest and drops the partition from the
+   source catalog.
+
+Partitions in the `delete` tier are removed outright. Progress is journaled to
+a JSONL file, so an interrupted run resumes without re-copying verified files.
+Copies share one token-bucket throttle to cap bandwidth.
+
+`plan()` is the dry run: per-tier partition/file/byte totals straight from the
+catalog, with no data I/O.
+
+The source catalog must be complete (see `PartitionCatalog.is_complete`): a
+partial index would silently hide un-indexed partitions from retention. By
+default the executor runs `rebuild_catalog()` once on such lakes.
+"""
+from __future__ import annotations
+
+import dataclasses
+import datetime as _dt
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+import typing as T
+import uuid as _uuid
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    from .partition_manager import PartitionKey, PartitionManager, Tier
+except Exception:  # fallback for relative import when run as script
+    from partition_manager import PartitionKey, PartitionManager, Tier  # type: ignore
+
+log = logging.getLogger("retention_executor")
+
+_KEY_FIELDS = ("symbol", "tf", "date", "hour", "region")
+
+
+class _Throttle:
+    """Thread-safe token bucket limiting aggregate throughput to `rate` bytes/s."""
+
+    def __init__(self, rate: float | None, burst: float | None = None) -> None:
+        """Create a bucket; `rate=None` disables throttling."""
+        self.rate = rate
+        self.capacity = burst if burst is not None else (rate or 0.0)
+        self._tokens = self.capacity
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def consume(self, n: int) -> None:
+        """Block until `n` bytes may be transferred."""
+        if not self.rate:
+            return
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+            self._last = now
+            self._tokens -= n
+            wait_s = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        if wait_s > 0:
+            time.sleep(wait_s)
+
+
+class _Journal:
+    """Append-only JSONL progress log used to resume interrupted runs."""
+
+    def __init__(self, path: str | None) -> None:
+        """Open (and replay) the journal at `path`; `None` keeps progress in memory only."""
+        self.path = path
+        self._lock = threading.Lock()
+        self.verified: dict[str, dict] = {}  # src path -> {"dst", "sha256", "size"}
+        if path and os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        ev = json.loads(line)
+                    except ValueError:
+                        continue  # torn last line after a crash
+                    if ev.get("event") == "verified":
+                        self.verified[ev["src"]] = ev
+        self._fh = None
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self._fh = open(path, "a", encoding="utf-8")
+
+    def record(self, ev: dict) -> None:
+        """Append one event and flush it to the OS."""
+        with self._lock:
+            if ev.get("event") == "verified":
+                self.verified[ev["src"]] = ev
+            if self._fh is not None:
+                self._fh.write(json.dumps(ev, separators=(",", ":")) + "\n")
+                self._fh.flush()
+
+    def close(self) -> None:
+        """Close the journal file handle."""
+        if self._fh is not None:
+            self._fh.close()
+            self._fh = None
+
+
+@dataclasses.dataclass
+class MoveResult:
+    """Outcome of moving (or deleting) one partition."""
+    partition: dict
+    tier: str
+    action: str  # move|delete|skip
+    files: int = 0
+    bytes_copied: int = 0
+    bytes_freed: int = 0
+    elapsed_s: float = 0.0
+    error: str | None = None
+
+
+class RetentionExecutor:
+    """Move partitions from a source `PartitionManager` to colder tiers per its retention policy."""
+
+    def __init__(
+        self,
+        source: PartitionManager,
+        targets: T.Mapping[str, PartitionManager],
+        *,
+        source_tier: str = "hot",
+        journal_path: str | None = None,
+        bandwidth_bytes_per_s: float | None = None,
+        max_workers: int = 4,
+        verify: bool = True,
+        rebuild_catalog: bool = True,
+    ) -> None:
+        """Bind a source dataset to target managers keyed by tier target (e.g. ``{"s3": warm_pm}``).
+
+        `source_tier` names the tier the source already holds; partitions in that
+        tier or any warmer one are left in place. A source catalog that is not
+        complete is rebuilt from the lake (`rebuild_catalog=True`) or rejected.
+        """
+        if source.partition_catalog is None:
+            raise RuntimeError("retention executor requires a source partition catalog")
+        if source._indexed_catalog() is None:
+            if not rebuild_catalog:
+                raise RuntimeError("source partition catalog is incomplete; run PartitionManager.rebuild_catalog()")
+            n = source.rebuild_catalog()
+            log.info("retention: indexed %d data files into the incomplete source catalog", n)
+        self.source = source
+        self.targets = dict(targets)
+        self.tiers = list(source.retention.tiers)
+        names = [t.name for t in self.tiers]
+        if source_tier not in names:
+            raise ValueError(f"unknown source tier {source_tier!r}; expected one of {names}")
+        self._source_rank = names.index(source_tier)
+        if journal_path is None and source.catalog_path:
+            journal_path = os.path.join(os.path.dirname(source.catalog_path), "_retention_journal.jsonl")
+        self.journal = _Journal(journal_path)
+        self.throttle = _Throttle(bandwidth_bytes_per_s)
+        self.max_workers = max(1, max_workers)
+        self.verify = verify
+
+    def close(self) -> None:
+        """Release the journal file handle."""
+        self.journal.close()
+
+    def _catalog(self) -> T.Any:
+        """The complete source catalog (raises if it was replaced by a partial one)."""
+        cat = self.source._indexed_catalog()
+        if cat is None:
+            raise RuntimeError("source partition catalog is incomplete; run PartitionManager.rebuild_catalog()")
+        return cat
+
+    # ---------- planning ----------
+    @staticmethod
+    def _pid(key: PartitionKey) -> str:
+        """Stable identifier of a partition key for the journal."""
+        return "|".join("" if getattr(key, f) is None else str(getattr(key, f)) for f in _KEY_FIELDS)
+
+    def _actions(self, now_ms: int | None) -> list[tuple[PartitionKey, Tier, dict]]:
+        """Return (key, tier, catalog aggregates) for every catalogued partition."""
+        now = _dt.datetime.utcfromtimestamp((now_ms or int(time.time() * 1000)) / 1000.0)
+        out = []
+        for r in self._catalog().partitions():
+            key = PartitionKey(**{f: r[f] for f in _KEY_FIELDS})
+            age_days = (now - _dt.datetime.strptime(key.date, "%Y-%m-%d")).days
+            out.append((key, self.source.retention.tier_for_age_days(age_days), r))
+        return out
+
+    def _rank(self, tier: Tier) -> int:
+        """Position of `tier` in the retention policy (0 = hottest)."""
+        return [t.name for t in self.tiers].index(tier.name)
+
+    def plan(self, now_ms: int | None = None) -> dict:
+        """Dry run: per-tier partition/file/byte/row totals and pending actions, without I/O."""
+        tiers: dict[str, dict] = {t.name: {"target": t.target, "partitions": 0, "files": 0, "bytes": 0, "rows": 0} for t in self.tiers}
+        pending: list[dict] = []
+        for key, tier, agg in self._actions(now_ms):
+            tot = tiers[tier.name]
+            tot["partitions"] += 1
+            tot["files"] += agg["files"]
+            tot["bytes"] += agg["bytes"]
+            tot["rows"] += agg["rows"]
+            if self._rank(tier) > self._source_rank:
+                action = "delete" if tier.target == "delete" else ("move" if tier.target in self.targets else "skip")
+                pending.append({"partition": key.dict(), "tier": tier.name, "action": action, "bytes": agg["bytes"]})
+        moved = sum(a["bytes"] for a in pending if a["action"] == "move")
+        freed = sum(a["bytes"] for a in pending if a["action"] in ("move", "delete"))
+        return {"tiers": tiers, "pending": pending, "bytes_to_copy": moved, "bytes_to_free": freed}
+
+    # ---------- execution ----------
+    def run(self, now_ms: int | None = None) -> list[MoveResult]:
+        """Move/delete every partition that aged out of the source tier; returns per-partition results."""
+        todo = [(k, t) for k, t, _agg in self._actions(now_ms) if self._rank(t) > self._source_rank]
+        results: list[MoveResult] = []
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="retention") as pool:
+            for res in pool.map(lambda kt: self._process(*kt), todo):
+                results.append(res)
+        copied = sum(r.bytes_copied for r in results)
+        freed = sum(r.bytes_freed for r in results)
+        log.info("retention: %d partitions processed, copied=%dB freed=%dB", len(results), copied, freed)
+        return results
+
+    def _process(self, key: PartitionKey, tier: Tier) -> MoveResult:
+        """Handle one partition, converting failures into an error result."""
+        t0 = time.perf_counter()
+        res = MoveResult(partition=key.dict(), tier=tier.name, action="skip")
+        try:
+            if tier.target == "delete":
+                res.action = "delete"
+                self._drop_source(key, res)
+            elif tier.target in self.targets:
+                res.action = "move"
+                self._move(key, self.targets[tier.target], res)
+                self._drop_source(key, res)
+            if res.action != "skip":
+                self.journal.record({"event": "done", "partition": self._pid(key), "action": res.action})
+        except Exception as e:
+            res.error = f"{type(e).__name__}: {e}"
+            log.error("retention failed for %s: %s", self.source.partition_path(key), res.error)
+        res.elapsed_s = time.perf_counter() - t0
+        return res
+
+    def _move(self, key: PartitionKey, target: PartitionManager, res: MoveResult) -> None:
+        """Copy and verify every file of `key` to `target`, then publish the target manifest."""
+        files = self._catalog().files(key)
+        src_dir = self.source.partition_path(key)
+        dst_dir = target.partition_path(key)
+        entries: list[dict] = []
+        for f in files:
+            src = f["path"]
+            done = self.journal.verified.get(src)
+            if done is None:
+                data = self.source.backend.read_bytes(src)
+                digest = hashlib.sha256(data).hexdigest()
+                dst = dst_dir + src[len(src_dir):] if src.startswith(src_dir) else "/".join([dst_dir, src.rsplit("/", 1)[-1]])
+                self.throttle.consume(len(data))
+                tmp = target.backend.join(".tmp", _uuid.uuid4().hex)
+                target.backend.write_bytes(tmp, data, overwrite=True)
+                target.backend.atomic_replace(tmp, dst)
+                if self.verify and hashlib.sha256(target.backend.read_bytes(dst)).hexdigest() != digest:
+                    raise IOError(f"checksum mismatch after copy: {dst}")
+                done = {"event": "verified", "src": src, "dst": dst, "sha256": digest, "size": len(data)}
+                self.journal.record(done)
+                res.bytes_copied += len(data)
+            entries.append({**f, "path": done["dst"], "size": done["size"], "sha256": done["sha256"]})
+
+        meta = target.read_manifest(key) or target._new_manifest(key, entries[0]["ext"] if entries else "parquet")
+        known = {e["path"] for e in entries}
+        meta["files"] = [x for x in meta.get("files", []) if x.get("path") not in known] + [
+            {"path": e["path"], "size": e["size"], "ext": e["ext"], "sha256": e["sha256"]} for e in entries
+        ]
+        meta["tier"] = res.tier
+        target._write_manifest(key, meta)
+        cat = target.partition_catalog
+        if cat is not None:
+            cat.replace_files(key, [], entries)
+        res.files = len(entries)
+
+    def _drop_source(self, key: PartitionKey, res: MoveResult) -> None:
+        """Delete the source files and manifest of `key` and forget it in the source catalog."""
+        cat = self._catalog()
+        files = cat.files(key)
+        for f in files:
+            self.source.backend.delete(f["path"])
+            res.bytes_freed += int(f["size"])
+        self.source.backend.delete(self.source.manifest_path(key))
+        cat.remove_partition(key)
+        if not res.files:
+            res.files = len(files)
+
+
+# --------------------------- CLI ---------------------------
+
+def _cli(argv: list[str]) -> int:  # pragma: no cover
+    """Run or dry-run retention for a local hot dataset. Returns process exit code."""
+    import argparse
+
+    ap = argparse.ArgumentParser(prog="retention_executor", description="NEXUSA retention tier mover")
+    ap.add_argument("root", help="source root URI (file:///data/lake)")
+    ap.add_argument("--dataset", default="ticks")
+    ap.add_argument("--target", action="append", default=[], help="tier target mapping, e.g. s3=s3://bucket/warm")
+    ap.add_argument("--bandwidth-mbps", type=float, default=None, help="cap copy throughput (MB/s)")
+    ap.add_argument("--workers", type=int, default=4)
+    ap.add_argument("--dry-run", action="store_true")
+    ns = ap.parse_args(argv)
+
+    try:
+        from .partition_manager import PartitionPolicy
+    except Exception:
+        from partition_manager import PartitionPolicy  # type: ignore
+    policy = PartitionPolicy(dataset=ns.dataset)
+    source = PartitionManager(root_uri=ns.root, policy=policy)
+    targets = {}
+    for spec in ns.target:
+        name, uri = spec.split("=", 1)
+        targets[name] = PartitionManager(root_uri=uri, policy=policy)
+    ex = RetentionExecutor(
+        source, targets, max_workers=ns.workers,
+        bandwidth_bytes_per_s=ns.bandwidth_mbps * 1024 * 1024 if ns.bandwidth_mbps else None,
+    )
+    try:
+        if ns.dry_run:
+            log.info(json.dumps(ex.plan(), ensure_ascii=False, indent=2))
+        else:
+            log.info(json.dumps([dataclasses.asdict(r) for r in ex.run()], ensure_ascii=False, indent=2))
+    finally:
+        ex.close()
+    return 0
+
+
+if __name__ == "__main__":  # pragma: no cover
+    import sys as _sys
+    logging.basicConfig(level=logging.INFO)
+    raise SystemExit(_cli(_sys.argv[1:]))
@@ -0,0 +1,343 @@
+# storage/s3_backend.py
+
+"""NEXUSA — s3_backend.py
+
+Bulk-transfer S3 backend for `PartitionManager`.
+
+`PooledS3` keeps the `StorageBackend` contract of `partition_manager.S3` but is
+built for moving many partitions at once (e.g. hot → warm tiering):
+
+- one boto3 client with a sized urllib3 connection pool, shared by all workers;
+- paginated listings (no 1000-key truncation);
+- batched existence checks: one listing per distinct parent prefix instead of
+  one HEAD per object;
+- multipart uploads and ranged downloads whose parts run concurrently under a
+  bounded in-flight window, plus `upload_many` / `download_many` for file-level
+  fan-out;
+- asyncio wrappers (`a*` methods) that run the blocking transfers on the
+  backend's own executor.
+
+Works against AWS S3 and S3-compatible stores (MinIO, moto) via `endpoint_url`.
+
+CLI (throughput benchmark):
+    python -m storage.s3_backend bench s3://bucket/prefix --endpoint-url http://localhost:9000
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import time
+import typing as T
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+
+try:
+    from .partition_manager import S3
+except Exception:  # fallback for relative import when run as script
+    from partition_manager import S3  # type: ignore
+
+try:  # pragma: no cover
+    import boto3  # type: ignore
+    from botocore.config import Config as _BotoConfig  # type: ignore
+except Exception:  # pragma: no cover
+    boto3 = None  # type: ignore
+    _BotoConfig = None  # type: ignore
+
+log = logging.getLogger("s3_backend")
+
+MiB = 1024 * 1024
+_MIN_PART_SIZE = 5 * MiB  # S3 lower bound for every part except the last
+
+_X = T.TypeVar("_X")
+_R = T.TypeVar("_R")
+
+
+def _bounded_map(pool: ThreadPoolExecutor, fn: T.Callable[[_X], _R], items: T.Iterable[_X], window: int) -> list[_R]:
+    """Run `fn` over `items` on `pool` with at most `window` calls in flight; keep input order.
+
+    Unlike `pool.map`, items are submitted lazily, so a large batch never queues
+    more than `window` payloads in memory at once. The first failure cancels the
+    remaining work and is re-raised.
+    """
+    results: dict[int, _R] = {}
+    pending: dict[Future, int] = {}
+    it = iter(enumerate(items))
+    exhausted = False
+    try:
+        while True:
+            while not exhausted and len(pending) < window:
+                try:
+                    i, item = next(it)
+                except StopIteration:
+                    exhausted = True
+                    break
+                pending[pool.submit(fn, item)] = i
+            if not pending:
+                break
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for fut in done:
+                results[pending.pop(fut)] = fut.result()
+    finally:
+        for fut in pending:
+            fut.cancel()
+    return [results[i] for i in range(len(results))]
+
+
+class PooledS3(S3):  # pragma: no cover (requires boto3 + an S3 endpoint)
+    """S3 backend with a pooled client and concurrent, windowed multipart transfers."""
+
+    def __init__(
+        self,
+        root_uri: str,
+        *,
+        endpoint_url: str | None = None,
+        region_name: str | None = None,
+        max_pool_connections: int = 32,
+        max_in_flight: int = 8,
+        max_files_in_flight: int = 8,
+        multipart_threshold: int = 16 * MiB,
+        part_size: int = 8 * MiB,
+        list_page_size: int = 1000,
+        client: T.Any = None,
+    ) -> None:
+        """Build the pooled client and the file/part executors.
+
+        `max_in_flight` bounds concurrent parts of one multipart transfer;
+        `max_files_in_flight` bounds concurrent objects in `upload_many` /
+        `download_many`. The connection pool is sized to cover both.
+        """
+        if client is None:
+            if boto3 is None:
+                raise RuntimeError("boto3 not installed")
+            pool = max(max_pool_connections, max_in_flight * max_files_in_flight // 2, max_files_in_flight)
+            client = boto3.client(
+                "s3",
+                endpoint_url=endpoint_url,
+                region_name=region_name,
+                config=_BotoConfig(max_pool_connections=pool, retries={"mode": "adaptive", "max_attempts": 5}),
+            )
+        super().__init__(root_uri, client=client)
+        if part_size < _MIN_PART_SIZE:
+            raise ValueError(f"part_size must be >= {_MIN_PART_SIZE} bytes")
+        self.max_in_flight = max(1, max_in_flight)
+        self.max_files_in_flight = max(1, max_files_in_flight)
+        self.multipart_threshold = max(multipart_threshold, part_size)
+        self.part_size = part_size
+        self.list_page_size = list_page_size
+        # Separate pools: file-level tasks block on their own part tasks, so sharing
+        # one executor could deadlock once every worker waits on queued parts.
+        self._files = ThreadPoolExecutor(max_workers=self.max_files_in_flight, thread_name_prefix="s3-file")
+        self._parts = ThreadPoolExecutor(max_workers=self.max_in_flight, thread_name_prefix="s3-part")
+
+    def close(self) -> None:
+        """Shut down the transfer executors."""
+        self._files.shutdown(wait=True)
+        self._parts.shutdown(wait=True)
+
+    def __enter__(self) -> "PooledS3":
+        """Context-manager entry; returns self."""
+        return self
+
+    def __exit__(self, *exc: T.Any) -> None:
+        """Context-manager exit; closes executors."""
+        self.close()
+
+    # ---------- listing / existence ----------
+    def listdir(self, prefix: str) -> list[str]:
+        """List every object under `prefix`, following continuation tokens."""
+        b, k = self._split(prefix)
+        paginator = self._s3.get_paginator("list_objects_v2")
+        out: list[str] = []
+        for page in paginator.paginate(Bucket=b, Prefix=k, PaginationConfig={"PageSize": self.list_page_size}):
+            out.extend(f"s3://{b}/{it['Key']}" for it in page.get("Contents", []))
+        return out
+
+    def _list_children(self, bucket_prefix: tuple[str, str]) -> set[str]:
+        """Return the keys directly under one `(bucket, prefix/)` (delimited listing)."""
+        b, p = bucket_prefix
+        paginator = self._s3.get_paginator("list_objects_v2")
+        keys: set[str] = set()
+        for page in paginator.paginate(Bucket=b, Prefix=p, Delimiter="/", PaginationConfig={"PageSize": self.list_page_size}):
+            keys.update(it["Key"] for it in page.get("Contents", []))
+        return keys
+
+    def exists_many(self, paths: T.Iterable[str]) -> dict[str, bool]:
+        """Check many paths at once with one listing per distinct parent prefix."""
+        paths = list(paths)
+        split = [self._split(p) for p in paths]
+        groups = sorted({(b, k.rsplit("/", 1)[0] + "/" if "/" in k else "") for b, k in split})
+        listed = _bounded_map(self._files, self._list_children, groups, self.max_files_in_flight)
+        present = {(b, key) for (b, _p), keys in zip(groups, listed) for key in keys}
+        return {p: (b, k) in present for p, (b, k) in zip(paths, split)}
+
+    # ---------- single-object transfers ----------
+    def write_bytes(self, path: str, data: bytes, *, overwrite: bool = False) -> None:
+        """Upload bytes; objects above `multipart_threshold` go through a parallel multipart upload."""
+        b, k = self._split(path)
+        if not overwrite and self.exists(path):
+            raise FileExistsError(f"exists: {path}")
+        if len(data) < self.multipart_threshold:
+            self._s3.put_object(Bucket=b, Key=k, Body=data)
+            return
+        self._multipart_upload(b, k, data)
+
+    def _multipart_upload(self, bucket: str, key: str, data: bytes) -> None:
+        """Upload `data` in `part_size` parts with at most `max_in_flight` parts outstanding."""
+        upload_id = self._s3.create_multipart_upload(Bucket=bucket, Key=key)["UploadId"]
+        view = memoryview(data)
+        offsets = range(0, len(data), self.part_size)
+
+        def _put(arg: tuple[int, int]) -> dict:
+            """Upload one part and return its completion entry."""
+            n, off = arg
+            resp = self._s3.upload_part(
+                Bucket=bucket, Key=key, UploadId=upload_id, PartNumber=n,
+                Body=view[off:off + self.part_size].tobytes(),
+            )
+            return {"PartNumber": n, "ETag": resp["ETag"]}
+
+        try:
+            parts = _bounded_map(self._parts, _put, enumerate(offsets, start=1), self.max_in_flight)
+            self._s3.complete_multipart_upload(
+                Bucket=bucket, Key=key, UploadId=upload_id, MultipartUpload={"Parts": parts}
+            )
+        except Exception:
+            self._s3.abort_multipart_upload(Bucket=bucket, Key=key, UploadId=upload_id)
+            raise
+
+    def read_bytes(self, path: str) -> bytes:
+        """Download an object; large objects are fetched as concurrent ranged GETs."""
+        b, k = self._split(path)
+        try:
+            total = int(self._s3.head_object(Bucket=b, Key=k)["ContentLength"])
+        except Exception as e:
+            raise FileNotFoundError(path) from e
+        if total < self.multipart_threshold:
+            return self._s3.get_object(Bucket=b, Key=k)["Body"].read()
+
+        def _get(off: int) -> bytes:
+            """Fetch one byte range."""
+            end = min(off + self.part_size, total) - 1
+            return self._s3.get_object(Bucket=b, Key=k, Range=f"bytes={off}-{end}")["Body"].read()
+
+        chunks = _bounded_map(self._parts, _get, range(0, total, self.part_size), self.max_in_flight)
+        return b"".join(chunks)
+
+    # ---------- bulk transfers ----------
+    def upload_many(self, items: T.Iterable[tuple[str, bytes]], *, overwrite: bool = True) -> int:
+        """Upload `(path, data)` pairs concurrently; return total bytes uploaded."""
+        def _one(item: tuple[str, bytes]) -> int:
+            """Upload a single object."""
+            path, data = item
+            self.write_bytes(path, data, overwrite=overwrite)
+            return len(data)
+
+        return sum(_bounded_map(self._files, _one, items, self.max_files_in_flight))
+
+    def download_many(self, paths: T.Iterable[str]) -> dict[str, bytes]:
+        """Download many objects concurrently; return a `{path: bytes}` mapping."""
+        paths = list(paths)
+        blobs = _bounded_map(self._files, self.read_bytes, paths, self.max_files_in_flight)
+        return dict(zip(paths, blobs))
+
+    def delete_many(self, paths: T.Iterable[str]) -> None:
+        """Delete objects in batches of 1000 keys per bucket (S3 DeleteObjects limit)."""
+        by_bucket: dict[str, list[str]] = {}
+        for p in paths:
+            b, k = self._split(p)
+            by_bucket.setdefault(b, []).append(k)
+        for b, keys in by_bucket.items():
+            for i in range(0, len(keys), 1000):
+                self._s3.delete_objects(
+                    Bucket=b, Delete={"Objects": [{"Key": k} for k in keys[i:i + 1000]], "Quiet": True}
+                )
+
+    # ---------- asyncio wrappers ----------
+    async def aread_bytes(self, path: str) -> bytes:
+        """Async `read_bytes` on the backend's file executor."""
+        return await asyncio.get_running_loop().run_in_executor(self._files, self.read_bytes, path)
+
+    async def awrite_bytes(self, path: str, data: bytes, *, overwrite: bool = False) -> None:
+        """Async `write_bytes` on the backend's file executor."""
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self._files, lambda: self.write_bytes(path, data, overwrite=overwrite))
+
+    async def aexists_many(self, paths: T.Iterable[str]) -> dict[str, bool]:
+        """Async `exists_many`."""
+        paths = list(paths)
+        return await asyncio.to_thread(self.exists_many, paths)
+
+    async def aupload_many(self, items: T.Iterable[tuple[str, bytes]], *, overwrite: bool = True) -> int:
+        """Async `upload_many`."""
+        items = list(items)
+        return await asyncio.to_thread(self.upload_many, items, overwrite=overwrite)
+
+    async def adownload_many(self, paths: T.Iterable[str]) -> dict[str, bytes]:
+        """Async `download_many`."""
+        paths = list(paths)
+        return await asyncio.to_thread(self.download_many, paths)
+
+
+# --------------------------- benchmark CLI ---------------------------
+
+def _bench(backend: S3, root: str, *, small_count: int, small_kb: int, large_count: int, large_mb: int) -> dict:
+    """Time uploads/downloads of many small and a few large objects through `backend`."""
+    small = [(f"{root}/small/{i:06d}.bin", os.urandom(small_kb * 1024)) for i in range(small_count)]
+    large = [(f"{root}/large/{i:03d}.bin", os.urandom(large_mb * MiB)) for i in range(large_count)]
+    out: dict[str, dict] = {}
+    for label, items in (("small", small), ("large", large)):
+        nbytes = sum(len(d) for _, d in items)
+        t0 = time.perf_counter()
+        if isinstance(backend, PooledS3):
+            backend.upload_many(items)
+        else:
+            for p, d in items:
+                backend.write_bytes(p, d, overwrite=True)
+        up = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        if isinstance(backend, PooledS3):
+            backend.download_many([p for p, _ in items])
+        else:
+            for p, _ in items:
+                backend.read_bytes(p)
+        down = time.perf_counter() - t0
+        out[label] = {
+            "files": len(items),
+            "bytes": nbytes,
+            "upload_MBps": round(nbytes / MiB / max(up, 1e-9), 2),
+            "download_MBps": round(nbytes / MiB / max(down, 1e-9), 2),
+            "upload_files_per_s": round(len(items) / max(up, 1e-9), 1),
+        }
+    return out
+
+
+def _cli(argv: list[str]) -> int:  # pragma: no cover
+    """Benchmark `S3` vs `PooledS3` throughput against a bucket/prefix. Returns exit code."""
+    import argparse
+    import json
+
+    ap = argparse.ArgumentParser(prog="s3_backend", description="NEXUSA S3 backend tools")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    ap_b = sub.add_parser("bench", help="upload/download throughput benchmark")
+    ap_b.add_argument("root", help="s3://bucket/prefix (objects are written under it)")
+    ap_b.add_argument("--endpoint-url", default=os.getenv("S3_ENDPOINT_URL"))
+    ap_b.add_argument("--small-count", type=int, default=500)
+    ap_b.add_argument("--small-kb", type=int, default=64)
+    ap_b.add_argument("--large-count", type=int, default=3)
+    ap_b.add_argument("--large-mb", type=int, default=64)
+    ap_b.add_argument("--in-flight", type=int, default=8)
+    ns = ap.parse_args(argv)
+
+    sizes = dict(small_count=ns.small_count, small_kb=ns.small_kb, large_count=ns.large_count, large_mb=ns.large_mb)
+    baseline = S3(ns.root, client=boto3.client("s3", endpoint_url=ns.endpoint_url))
+    report = {"S3": _bench(baseline, ns.root.rstrip("/") + "/bench-s3", **sizes)}
+    with PooledS3(ns.root, endpoint_url=ns.endpoint_url, max_in_flight=ns.in_flight, max_files_in_flight=ns.in_flight) as pooled:
+        report["PooledS3"] = _bench(pooled, ns.root.rstrip("/") + "/bench-pooled", **sizes)
+    log.info(json.dumps(report, indent=2))
+    return 0
+
+
+if __name__ == "__main__":  # pragma: no cover
+    import sys as _sys
+    logging.basicConfig(level=logging.INFO)
+    raise SystemExit(_cli(_sys.argv[1:]))
@@ -26,6 +26,8 @@ try:  # pragma: no cover
 except Exception:
     jsonschema = None
 
+from core.schema.validator_cache import CompiledValidator, ValidatorCache
+
 
 _SUBJECT_SAFE_RE = re.compile(r"^[A-Za-z0-9._-]+$")
 
@@ -65,11 +67,17 @@ class FileSchemaRegistry:
           latest     (text file containing the latest version number)
     """
 
-    def __init__(self, root_dir: str) -> None:
-        """Initialize the registry under an absolute `root_dir` (created if missing)."""
+    def __init__(self, root_dir: str, *, fast: bool = False) -> None:
+        """Initialize the registry under an absolute `root_dir` (created if missing).
+
+        Compiled validators are cached per (subject, version); `fast=True` adds the
+        optional fastjsonschema code-generated path.
+        """
         self.root = os.path.abspath(root_dir)
         os.makedirs(self.root, exist_ok=True)
         self._lock = threading.Lock()
+        self._validators = ValidatorCache(fast=fast, check_schema=True, auto_draft=True)
+        self._latest: Dict[str, tuple[int, int]] = {}  # subject -> (mtime_ns of `latest`, version)
 
     def _subject_dir(self, subject: str) -> str:
         """Return/ensure the directory path for a given `subject`."""
@@ -101,8 +109,33 @@ class FileSchemaRegistry:
             schema_path = os.path.join(sdir, f"{next_ver}.json")
             _atomic_write_json(schema_path, schema)
             _atomic_write_text(self._latest_path(subject), str(next_ver))
+            self._forget(subject)
             return next_ver
 
+    def _forget(self, subject: str) -> None:
+        """Drop the cached latest marker and compiled validators of `subject`."""
+        self._latest.pop(subject, None)
+        self._validators.invalidate(lambda k: k[0] == subject)
+
+    def _resolve_version(self, subject: str, version: Optional[int]) -> int:
+        """Return `version`, or the latest version re-read only when the `latest` file's mtime changed."""
+        if version is not None:
+            return int(version)
+        latest_path = self._latest_path(subject)
+        try:
+            mtime = os.stat(latest_path).st_mtime_ns
+        except FileNotFoundError:
+            raise FileNotFoundError(f"No versions found for subject {subject!r}") from None
+        cached = self._latest.get(subject)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+        if cached is not None:
+            self._forget(subject)  # marker rewritten → schema files may have been replaced too
+        with open(latest_path, "r", encoding="utf-8") as f:
+            ver = int(f.read().strip())
+        self._latest[subject] = (mtime, ver)
+        return ver
+
     def get(self, subject: str, version: Optional[int] = None) -> Dict[str, Any]:
         """Fetch a schema by `subject` and `version`; if `version` is None, load latest."""
         sdir = self._subject_dir(subject)
@@ -123,18 +156,51 @@ class FileSchemaRegistry:
         with open(self._latest_path(subject), "r", encoding="utf-8") as f:
             return int(f.read().strip())
 
+    def schema_mtime(self, subject: str, version: Optional[int] = None) -> Optional[int]:
+        """Return the mtime (ns) of the schema file for `subject`/`version` (None if it does not exist)."""
+        try:
+            ver = self._resolve_version(subject, version)
+            return os.stat(os.path.join(self._subject_dir(subject), f"{ver}.json")).st_mtime_ns
+        except (OSError, ValueError):
+            return None
+
+    def validator(self, subject: str, version: Optional[int] = None) -> Optional[CompiledValidator]:
+        """Return the cached compiled validator for `subject` (None when jsonschema is unavailable).
+
+        Recompiled when the schema file's mtime changes, so in-place edits are picked up.
+        """
+        ver = self._resolve_version(subject, version)
+        return self._validators.get(
+            (subject, ver), lambda: self.get(subject, ver), token=self.schema_mtime(subject, ver)
+        )
+
     def validate(self, subject: str, instance: Dict[str, Any], version: Optional[int] = None) -> None:
         """Validate `instance` against the (optionally versioned) schema for `subject`."""
-        schema = self.get(subject, version)
-        if jsonschema is not None:
-            jsonschema.validate(instance=instance, schema=schema)
+        compiled = self.validator(subject, version)
+        if compiled is not None:
+            compiled.validate(instance)
         else:
             # Fallback: very shallow validation on required keys
+            schema = self.get(subject, version)
             required = schema.get("required", [])
             missing = [k for k in required if k not in instance]
             if missing:
                 raise ValueError(f"Missing required keys: {', '.join(missing)}")
 
+    def validate_many(
+        self, subject: str, instances: List[Dict[str, Any]], version: Optional[int] = None
+    ) -> List[Optional[Exception]]:
+        """Validate a batch against one resolved schema; return the error (or None) per instance."""
+        compiled = self.validator(subject, version)
+        if compiled is not None:
+            return list(compiled.validate_many(instances))
+        required = self.get(subject, version).get("required", [])
+        out: List[Optional[Exception]] = []
+        for inst in instances:
+            missing = [k for k in required if k not in inst]
+            out.append(ValueError(f"Missing required keys: {', '.join(missing)}") if missing else None)
+        return out
+
 
 @dataclass(frozen=True)
 class PartitionKey:
@@ -178,19 +244,51 @@ class TTLPolicy:
         """
         return f"TTL {ts_col} + toIntervalDay({self.cold_days}) DELETE"
 
-    def compute_partition(symbol: str, tf: Optional[str], ts_ms: int) -> PartitionKey:
-        """Compute a UTC day partition from a millisecond timestamp."""
-        # Ensure UTC date from milliseconds
-        dt = _dt.datetime.utcfromtimestamp(ts_ms / 1000.0).date()
-        return PartitionKey(symbol=symbol, tf=tf, date=dt)
 
-        # Default singleton registry + thin wrappers
-        registry = FileSchemaRegistry(root_dir="schemas")
 
-    def register(subject: str, schema: dict) -> int:
-        """Module-level helper: register `schema` under `subject` on the default registry."""
-        return registry.register(subject, schema)
+def compute_partition(symbol: str, tf: Optional[str], ts_ms: int) -> PartitionKey:
+    """Compute a UTC day partition from a millisecond timestamp."""
+    # Ensure UTC date from milliseconds
+    dt = _dt.datetime.utcfromtimestamp(ts_ms / 1000.0).date()
+    return PartitionKey(symbol=symbol, tf=tf, date=dt)
+
+
+# Default singleton registry (created on first use, so importing this module
+# does not create ./schemas in the importer's cwd) + thin wrappers
+_registry: Optional[FileSchemaRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def default_registry() -> FileSchemaRegistry:
+    """Return the default registry rooted at ./schemas, creating it on first call."""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = FileSchemaRegistry(root_dir="schemas")
+    return _registry
+
+
+def register(subject: str, schema: dict) -> int:
+    """Module-level helper: register `schema` under `subject` on the default registry."""
+    return default_registry().register(subject, schema)
+
+
+def get(subject: str, version: int | None = None) -> dict:
+    """Module-level helper: fetch a schema (latest if `version` is None)."""
+    return default_registry().get(subject, version)
+
+
+def schema_mtime(subject: str, version: int | None = None) -> Optional[int]:
+    """Module-level helper: mtime (ns) of a schema file on the default registry (None if missing)."""
+    return default_registry().schema_mtime(subject, version)
+
+
+def validate(subject: str, instance: dict, version: int | None = None) -> None:
+    """Module-level helper: validate `instance` with the cached validator of the default registry."""
+    default_registry().validate(subject, instance, version)
+
 
-    def get(subject: str, version: int | None = None) -> dict:
-        """Module-level helper: fetch a schema (latest if `version` is None)."""
-        return registry.get(subject, version)
+def validate_many(subject: str, instances: list[dict], version: int | None = None) -> list[Optional[Exception]]:
+    """Module-level helper: batch-validate `instances`; returns the error (or None) per instance."""
+    return default_registry().validate_many(subject, instances, version)